@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""Offline, in-process benchmark for tier_detector_fast.
+
+Runs the labelled prompt JSONL (the same file run-tier-detector-benchmark.py
+sends to the LLM agent) through the detector's own stage pipeline (rules_only,
+common_heuristics, then embed_similarity or the rules-only default) and reports
+per-stage latency percentiles (with per-tier and per-source breakdowns),
+accuracy per deciding stage, a confusion matrix and a stage-hit histogram as
+JSON. --history appends the latency histograms to the shared history file read
+by latency_metrics.py.
+
+Usage:
+  pkgx python /home/dxta/.dotfiles/opencode/scripts/benchmark-tier-detector-fast.py --rules-only
+  pkgx python /home/dxta/.dotfiles/opencode/scripts/benchmark-tier-detector-fast.py \\
+      --output after.json --baseline before.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import tier_detector_fast as detector  # noqa: E402
+from latency_metrics import (  # noqa: E402
+    HISTORY_PATH,
+    LatencyHistogram,
+    LatencyMetrics,
+    append_history,
+)
+
+ROOT = Path(__file__).resolve().parents[2]
+PROMPTS_PATH = ROOT / "opencode" / "benchmarks" / "tier-detector-prompts.jsonl"
+STAGES = (
+    "rules_only",
+    "common_heuristics",
+    "rules_only_default",
+    "embed_similarity",
+)
+
+
+def load_prompts(path):
+    lines = Path(path).read_text().splitlines()
+    return [json.loads(line) for line in lines if line.strip()]
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    value = fn(*args)
+    return value, (time.perf_counter() - started) * 1000
+
+
+def classify_staged(task, model, backend, rules_only, min_confidence=0.0):
+    """Run the detector's own pipeline; return its answer, the time of every
+    stage that ran and the name of the stage whose answer it returned."""
+    trace = []
+    best, _ = detector.run_pipeline(
+        detector.normalize(task),
+        detector.build_pipeline(model, rules_only, backend),
+        min_confidence,
+        trace=trace,
+    )
+    timings = {name: ms for name, ms, _ in trace}
+    deciding = next(name for name, _, result in reversed(trace) if result is best)
+    return best, timings, deciding
+
+
+def run(prompts, model, backend, rules_only, min_confidence=0.0):
+    """Return the JSON report and the end-to-end LatencyMetrics behind it."""
+    warmup_ms = None
+    if not rules_only:
+        # Keep one-off model/bank loading out of the per-stage numbers.
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(
+            io.StringIO()
+        ):
+            _, warmup_ms = timed(detector.embed_similarity, model, "warm up", backend)
+
+    stage_latencies = {stage: LatencyHistogram() for stage in STAGES}
+    latency = LatencyMetrics()
+    stage_correct = {stage: 0 for stage in STAGES}
+    stage_total = {stage: 0 for stage in STAGES}
+    stage_hits = {}
+    confusion = {}
+    results = []
+    for item in prompts:
+        result, timings, deciding = classify_staged(
+            item["task"], model, backend, rules_only, min_confidence
+        )
+        for stage, ms in timings.items():
+            stage_latencies[stage].record(ms)
+        expected = item.get("expected_tier")
+        correct = expected is not None and result.tier == expected
+        stage_total[deciding] += 1
+        stage_correct[deciding] += int(correct)
+        stage_hits[result.source] = stage_hits.get(result.source, 0) + 1
+        row = confusion.setdefault(str(expected), {})
+        row[str(result.tier)] = row.get(str(result.tier), 0) + 1
+        latency.record(
+            sum(timings.values()),
+            tier=result.tier,
+            source=result.source,
+            stage=deciding,
+        )
+        results.append(
+            {
+                "id": item.get("id"),
+                "expected_tier": expected,
+                "tier": result.tier,
+                "source": result.source,
+                "confidence": round(result.confidence, 3),
+                "correct": correct,
+                "latency_ms": sum(timings.values()),
+            }
+        )
+
+    labelled = [r for r in results if r["expected_tier"] is not None]
+    stages = {}
+    for stage in STAGES:
+        summary = stage_latencies[stage].summary()
+        summary["decided"] = stage_total[stage]
+        summary["accuracy"] = (
+            stage_correct[stage] / stage_total[stage] if stage_total[stage] else None
+        )
+        stages[stage] = summary
+    report = {
+        "count": len(results),
+        "accuracy": (
+            sum(r["correct"] for r in labelled) / len(labelled) if labelled else None
+        ),
+        "warmup_ms": warmup_ms,
+        "end_to_end": latency.overall.summary(),
+        "latency_breakdowns": {
+            key: value for key, value in latency.summary().items() if key != "all"
+        },
+        "stages": stages,
+        "stage_hits": dict(sorted(stage_hits.items())),
+        "confusion": confusion,
+        "results": results,
+    }
+    return report, latency
+
+
+def delta(report, baseline):
+    def diff(a, b):
+        return None if a is None or b is None else a - b
+
+    keys = ("p50_ms", "p90_ms", "p95_ms", "p99_ms", "max_ms")
+    out = {"accuracy": diff(report["accuracy"], baseline.get("accuracy"))}
+    before = baseline.get("end_to_end", {})
+    out["end_to_end"] = {
+        key: diff(report["end_to_end"][key], before.get(key)) for key in keys
+    }
+    for stage, summary in report["stages"].items():
+        before = baseline.get("stages", {}).get(stage, {})
+        out[stage] = {
+            key: diff(summary[key], before.get(key)) for key in keys + ("accuracy",)
+        }
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark tier-detector-fast offline")
+    parser.add_argument("--prompts", default=str(PROMPTS_PATH))
+    parser.add_argument("--model", default="BAAI/bge-small-en-v1.5")
+    parser.add_argument("--backend", default="torch", choices=detector.BACKENDS)
+    parser.add_argument("--rules-only", action="store_true")
+    parser.add_argument(
+        "--min-confidence",
+        type=float,
+        default=0.0,
+        help="Escalate to the next stage while the answer is less confident",
+    )
+    parser.add_argument(
+        "--exemplars",
+        default="",
+        help="kNN exemplar JSONL; off by default since the prompts would leak",
+    )
+    parser.add_argument("--output", help="Also write the report to this file")
+    parser.add_argument("--baseline", help="Earlier report to compute deltas against")
+    parser.add_argument(
+        "--details", action="store_true", help="Include per-prompt results"
+    )
+    parser.add_argument(
+        "--history",
+        nargs="?",
+        const=str(HISTORY_PATH),
+        help="Append latency histograms to this JSONL history "
+        "(default path when given without a value)",
+    )
+    parser.add_argument("--label", help="Free-form label stored with --history")
+    args = parser.parse_args()
+
+    detector.EXEMPLARS_PATH = args.exemplars
+    prompts = load_prompts(args.prompts)
+    report, latency = run(
+        prompts, args.model, args.backend, args.rules_only, args.min_confidence
+    )
+    if args.history:
+        append_history(
+            args.history,
+            latency,
+            benchmark="tier-detector-fast",
+            label=args.label,
+            backend="rules-only" if args.rules_only else args.backend,
+            min_confidence=args.min_confidence,
+            model=None if args.rules_only else args.model,
+            accuracy=report["accuracy"],
+        )
+    if args.baseline:
+        report["delta"] = delta(report, json.loads(Path(args.baseline).read_text()))
+    if not args.details:
+        report.pop("results")
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""Mergeable latency histograms and an append-only benchmark history.
+
+Samples are bucketed HDR-style: exact below 256us, then 128 linear
+sub-buckets per power of two, so any reported percentile is within ~0.8% of
+the true sample while memory stays bounded no matter how many samples are
+recorded. Histograms serialise to plain JSON and merge by adding counts,
+which is what lets runs from different commits/branches be combined later.
+
+Usage:
+  metrics = LatencyMetrics()
+  metrics.record(12.5, tier=2, source="rules:t4")
+  metrics.summary()  # {"all": {...}, "tier": {"2": {...}}, "source": {...}}
+  append_history(HISTORY_PATH, metrics, label="rules-only")
+
+  pkgx python /home/dxta/.dotfiles/opencode/scripts/latency_metrics.py \\
+      --history opencode/benchmarks/latency-history.jsonl --by branch
+"""
+
+import argparse
+import json
+import math
+import subprocess
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+HISTORY_PATH = ROOT / "opencode" / "benchmarks" / "latency-history.jsonl"
+
+# Samples are stored as integer microseconds.
+SUB_BUCKETS = 256
+HALF_BUCKETS = SUB_BUCKETS // 2
+SUB_BUCKET_BITS = SUB_BUCKETS.bit_length() - 1
+PERCENTILES = (0.50, 0.90, 0.95, 0.99)
+
+
+def _bucket(us):
+    if us < SUB_BUCKETS:
+        return us
+    shift = us.bit_length() - SUB_BUCKET_BITS
+    return SUB_BUCKETS + (shift - 1) * HALF_BUCKETS + (us >> shift) - HALF_BUCKETS
+
+
+def _bucket_range(index):
+    """Lowest value and width (us) covered by a bucket."""
+    if index < SUB_BUCKETS:
+        return index, 1
+    shift, offset = divmod(index - SUB_BUCKETS, HALF_BUCKETS)
+    shift += 1
+    return (offset + HALF_BUCKETS) << shift, 1 << shift
+
+
+def _pct_key(p):
+    return f"p{p * 100:g}_ms"
+
+
+class LatencyHistogram:
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total_us = 0
+        self.min_us = None
+        self.max_us = None
+
+    def record(self, ms):
+        us = max(0, int(round(ms * 1000)))
+        index = _bucket(us)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total_us += us
+        self.min_us = us if self.min_us is None else min(self.min_us, us)
+        self.max_us = us if self.max_us is None else max(self.max_us, us)
+
+    def merge(self, other):
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total_us += other.total_us
+        for attr, pick in (("min_us", min), ("max_us", max)):
+            theirs = getattr(other, attr)
+            if theirs is not None:
+                ours = getattr(self, attr)
+                setattr(self, attr, theirs if ours is None else pick(ours, theirs))
+        return self
+
+    def percentile(self, p):
+        """Nearest-rank percentile in ms, or None when empty."""
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(self.count * p))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                low, width = _bucket_range(index)
+                value = low + (width - 1) / 2
+                return min(max(value, self.min_us), self.max_us) / 1000
+        return self.max_us / 1000
+
+    def summary(self, percentiles=PERCENTILES):
+        out = {"count": self.count}
+        for p in percentiles:
+            out[_pct_key(p)] = self.percentile(p)
+        out["max_ms"] = self.max_us / 1000 if self.count else None
+        out["mean_ms"] = self.total_us / self.count / 1000 if self.count else None
+        return out
+
+    def to_dict(self):
+        return {
+            "counts": {str(index): count for index, count in self.counts.items()},
+            "count": self.count,
+            "total_us": self.total_us,
+            "min_us": self.min_us,
+            "max_us": self.max_us,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls()
+        histogram.counts = {int(k): v for k, v in data.get("counts", {}).items()}
+        histogram.count = data.get("count", 0)
+        histogram.total_us = data.get("total_us", 0)
+        histogram.min_us = data.get("min_us")
+        histogram.max_us = data.get("max_us")
+        return histogram
+
+
+class LatencyMetrics:
+    """An overall histogram plus one per value of each breakdown dimension."""
+
+    def __init__(self):
+        self.overall = LatencyHistogram()
+        self.breakdowns = {}
+
+    def record(self, ms, **dimensions):
+        self.overall.record(ms)
+        for dimension, value in dimensions.items():
+            if value is None:
+                continue
+            group = self.breakdowns.setdefault(dimension, {})
+            group.setdefault(str(value), LatencyHistogram()).record(ms)
+
+    def merge(self, other):
+        self.overall.merge(other.overall)
+        for dimension, group in other.breakdowns.items():
+            ours = self.breakdowns.setdefault(dimension, {})
+            for value, histogram in group.items():
+                ours.setdefault(value, LatencyHistogram()).merge(histogram)
+        return self
+
+    def summary(self, percentiles=PERCENTILES):
+        out = {"all": self.overall.summary(percentiles)}
+        for dimension, group in sorted(self.breakdowns.items()):
+            out[dimension] = {
+                value: group[value].summary(percentiles) for value in sorted(group)
+            }
+        return out
+
+    def to_dict(self):
+        return {
+            "all": self.overall.to_dict(),
+            "breakdowns": {
+                dimension: {value: h.to_dict() for value, h in group.items()}
+                for dimension, group in self.breakdowns.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        metrics = cls()
+        metrics.overall = LatencyHistogram.from_dict(data.get("all", {}))
+        metrics.breakdowns = {
+            dimension: {
+                value: LatencyHistogram.from_dict(h) for value, h in group.items()
+            }
+            for dimension, group in data.get("breakdowns", {}).items()
+        }
+        return metrics
+
+
+def git_revision(cwd=ROOT):
+    """(commit, branch) of the working tree, or (None, None) outside git."""
+    def rev_parse(*args):
+        return subprocess.check_output(
+            ["git", "rev-parse", *args, "HEAD"],
+            cwd=cwd,
+            text=True,
+            stderr=subprocess.DEVNULL,
+        ).strip()
+
+    try:
+        return rev_parse("--short"), rev_parse("--abbrev-ref")
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def append_history(path, metrics, **meta):
+    """Append one run to a JSONL history file; earlier lines are never rewritten."""
+    commit, branch = git_revision()
+    entry = {
+        "timestamp_ms": int(time.time() * 1000),
+        "commit": commit,
+        "branch": branch,
+        **meta,
+        "metrics": metrics.to_dict(),
+    }
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a") as handle:
+        handle.write(json.dumps(entry) + "\n")
+    return entry
+
+
+def read_history(path):
+    entries = []
+    try:
+        lines = Path(path).read_text().splitlines()
+    except FileNotFoundError:
+        return entries
+    for line in lines:
+        try:
+            entries.append(json.loads(line))
+        except ValueError:
+            continue  # a torn final line from an interrupted run
+    return entries
+
+
+def merge_history(entries, by, **filters):
+    """Merge history entries into one LatencyMetrics per value of ``by``."""
+    merged = {}
+    for entry in entries:
+        if any(entry.get(key) != value for key, value in filters.items()):
+            continue
+        metrics = LatencyMetrics.from_dict(entry.get("metrics", {}))
+        key = str(entry.get(by))
+        if key in merged:
+            merged[key].merge(metrics)
+        else:
+            merged[key] = metrics
+    return merged
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarise benchmark latency history")
+    parser.add_argument("--history", type=Path, default=HISTORY_PATH)
+    parser.add_argument(
+        "--by",
+        default="commit",
+        help="Entry field to group runs by (commit, branch, label, benchmark, ...)",
+    )
+    parser.add_argument("--benchmark", help="Only runs from this benchmark")
+    parser.add_argument("--label", help="Only runs with this label")
+    args = parser.parse_args()
+
+    filters = {}
+    if args.benchmark:
+        filters["benchmark"] = args.benchmark
+    if args.label:
+        filters["label"] = args.label
+    merged = merge_history(read_history(args.history), args.by, **filters)
+    report = {key: metrics.summary() for key, metrics in merged.items()}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
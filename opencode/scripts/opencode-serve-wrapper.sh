@@ -6,5 +6,11 @@
 source ~/.config/opencode/scripts/load-mcp-credentials-safe.sh
 export OPENCODE_OPENAI_STRATEGY=hybrid
 
+# Warm the tier detector model in the background (detaches immediately)
+if command -v pkgx >/dev/null 2>&1; then
+  pkgx python /home/dxta/.dotfiles/opencode/scripts/tier-detector-fast.py \
+    --prewarm --serve --idle-timeout 3600 >/dev/null 2>&1 || true
+fi
+
 # Start opencode serve with all arguments passed through
 exec /home/dxta/.opencode/bin/opencode "$@"
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""Incremental SQLite index over opencode message/part storage.
+
+opencode keeps one JSON file per message (storage/message/<session>/msg_*.json)
+and per part (storage/part/<message>/prt_*.json). Scanning and parsing that
+tree for every query gets slow once it holds hundreds of thousands of files,
+so this module mirrors the fields benchmark/retrospective scripts need into a
+small SQLite database and only re-parses files whose mtime/size changed.
+
+Usage:
+  pkgx python /home/dxta/.dotfiles/opencode/scripts/opencode_storage_index.py \\
+      --agent tier-detector-bench --role assistant --since 1735689600000
+
+  from opencode_storage_index import StorageIndex
+  with StorageIndex() as index:
+      index.update()
+      rows = index.messages(agent="tier-detector-bench", role="assistant", since=t)
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+from pathlib import Path
+
+STORAGE_ROOT = Path.home() / ".local" / "share" / "opencode" / "storage"
+INDEX_PATH = Path.home() / ".cache" / "opencode" / "storage-index.sqlite3"
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS messages (
+    id TEXT PRIMARY KEY,
+    session_id TEXT,
+    agent TEXT,
+    role TEXT,
+    created INTEGER,
+    completed INTEGER,
+    parent_id TEXT,
+    error INTEGER NOT NULL DEFAULT 0,
+    text TEXT NOT NULL DEFAULT '',
+    parts_mtime_ns INTEGER NOT NULL DEFAULT 0,
+    path TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS messages_agent_role_created
+    ON messages (agent, role, created);
+CREATE INDEX IF NOT EXISTS messages_parent ON messages (parent_id);
+CREATE INDEX IF NOT EXISTS messages_path ON messages (path);
+"""
+
+COLUMNS = (
+    "id",
+    "session_id",
+    "agent",
+    "role",
+    "created",
+    "completed",
+    "parent_id",
+    "error",
+    "text",
+)
+
+
+def _scan(directory, prefix):
+    """Yield (path, stat) for ``prefix*.json`` files one level below ``directory``."""
+    try:
+        groups = list(os.scandir(directory))
+    except FileNotFoundError:
+        return
+    for group in groups:
+        if not group.is_dir():
+            continue
+        with os.scandir(group.path) as entries:
+            for entry in entries:
+                if entry.name.startswith(prefix) and entry.name.endswith(".json"):
+                    yield entry.path, entry.stat()
+
+
+class StorageIndex:
+    def __init__(self, db_path=INDEX_PATH, storage_root=STORAGE_ROOT):
+        self.storage_root = Path(storage_root)
+        db_path = Path(db_path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(db_path))
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self._ensure_schema()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.db.close()
+
+    def _ensure_schema(self):
+        row = None
+        try:
+            row = self.db.execute(
+                "SELECT value FROM meta WHERE key = 'schema_version'"
+            ).fetchone()
+        except sqlite3.OperationalError:
+            pass
+        if row is not None and int(row[0]) != SCHEMA_VERSION:
+            # Derived data only: rebuild rather than migrate.
+            self.db.executescript(
+                "DROP TABLE IF EXISTS messages; DROP TABLE IF EXISTS files;"
+            )
+        self.db.executescript(SCHEMA)
+        self.db.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('schema_version', ?)",
+            (str(SCHEMA_VERSION),),
+        )
+        self.db.commit()
+
+    def _message_text(self, message_id):
+        part_dir = self.storage_root / "part" / message_id
+        texts = []
+        try:
+            names = sorted(
+                name
+                for name in os.listdir(part_dir)
+                if name.startswith("prt_") and name.endswith(".json")
+            )
+        except FileNotFoundError:
+            return ""
+        for name in names:
+            try:
+                data = json.loads((part_dir / name).read_text())
+            except (OSError, ValueError):
+                continue
+            if data.get("type") == "text":
+                texts.append(data.get("text", ""))
+        return "\n".join(texts)
+
+    def update(self):
+        """Sync the index with storage; returns counts of scanned/updated/removed."""
+        known = {
+            row["path"]: (row["mtime_ns"], row["size"])
+            for row in self.db.execute("SELECT path, mtime_ns, size FROM files")
+        }
+        # Parts stream in after their message file is written, so text is
+        # re-extracted whenever the newest part of a message changes.
+        indexed_parts = {
+            row["path"]: row["parts_mtime_ns"]
+            for row in self.db.execute("SELECT path, parts_mtime_ns FROM messages")
+        }
+        part_dirs = {}
+        for path, stat in _scan(self.storage_root / "part", "prt_"):
+            message_id = os.path.basename(os.path.dirname(path))
+            part_dirs[message_id] = max(part_dirs.get(message_id, 0), stat.st_mtime_ns)
+
+        seen = set()
+        updated = 0
+        for path, stat in _scan(self.storage_root / "message", "msg_"):
+            seen.add(path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+            parts_mtime_ns = part_dirs.get(Path(path).stem, 0)
+            if (
+                known.get(path) == signature
+                and indexed_parts.get(path) == parts_mtime_ns
+            ):
+                continue
+            try:
+                data = json.loads(Path(path).read_text())
+            except (OSError, ValueError):
+                continue
+            timing = data.get("time") or {}
+            message_id = data.get("id") or Path(path).stem
+            text = self._message_text(message_id) if parts_mtime_ns else ""
+            self.db.execute(
+                "INSERT OR REPLACE INTO messages"
+                " (id, session_id, agent, role, created, completed, parent_id,"
+                " error, text, parts_mtime_ns, path)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    message_id,
+                    data.get("sessionID"),
+                    data.get("agent") or data.get("mode"),
+                    data.get("role"),
+                    timing.get("created"),
+                    timing.get("completed"),
+                    data.get("parentID"),
+                    int(bool(data.get("error"))),
+                    text,
+                    parts_mtime_ns,
+                    path,
+                ),
+            )
+            self.db.execute(
+                "INSERT OR REPLACE INTO files (path, mtime_ns, size) VALUES (?, ?, ?)",
+                (path, *signature),
+            )
+            updated += 1
+
+        removed = [path for path in known if path not in seen]
+        for path in removed:
+            self.db.execute("DELETE FROM files WHERE path = ?", (path,))
+            self.db.execute("DELETE FROM messages WHERE path = ?", (path,))
+        self.db.commit()
+        return {"scanned": len(seen), "updated": updated, "removed": len(removed)}
+
+    def get(self, message_id):
+        row = self.db.execute(
+            f"SELECT {', '.join(COLUMNS)} FROM messages WHERE id = ?", (message_id,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def messages(self, agent=None, role=None, since=None, include_errors=False):
+        """Messages matching the filters, oldest first."""
+        clauses = []
+        params = []
+        if agent is not None:
+            clauses.append("agent = ?")
+            params.append(agent)
+        if role is not None:
+            clauses.append("role = ?")
+            params.append(role)
+        if since is not None:
+            clauses.append("created >= ?")
+            params.append(since)
+        if not include_errors:
+            clauses.append("error = 0")
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self.db.execute(
+            f"SELECT {', '.join(COLUMNS)} FROM messages{where} ORDER BY created",
+            params,
+        )
+        return [dict(row) for row in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the opencode storage index")
+    parser.add_argument("--storage", type=Path, default=STORAGE_ROOT)
+    parser.add_argument("--index", type=Path, default=INDEX_PATH)
+    parser.add_argument("--agent")
+    parser.add_argument("--role")
+    parser.add_argument("--since", type=int, help="Created at or after (epoch ms)")
+    parser.add_argument("--include-errors", action="store_true")
+    parser.add_argument(
+        "--no-update", action="store_true", help="Query without syncing first"
+    )
+    args = parser.parse_args()
+
+    with StorageIndex(args.index, args.storage) as index:
+        if not args.no_update:
+            stats = index.update()
+            print(json.dumps({"update": stats}), flush=True)
+        for row in index.messages(
+            args.agent, args.role, args.since, args.include_errors
+        ):
+            print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
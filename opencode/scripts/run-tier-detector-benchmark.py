@@ -1,27 +1,29 @@
+import argparse
 import json
-import os
 import re
 import subprocess
+import sys
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from latency_metrics import HISTORY_PATH, LatencyMetrics, append_history  # noqa: E402
+
 ROOT = Path(__file__).resolve().parents[2]
 PROMPTS_PATH = ROOT / "opencode" / "benchmarks" / "tier-detector-prompts.jsonl"
 OUTPUT_PATH = ROOT / "opencode" / "benchmarks" / "tier-detector-benchmark-results.json"
+CHECKPOINT_PATH = OUTPUT_PATH.with_suffix(".checkpoint.jsonl")
 
 OPENCODE_BIN = Path.home() / ".opencode" / "bin" / "opencode"
 STORAGE_ROOT = Path.home() / ".local" / "share" / "opencode" / "storage"
-MSG_ROOT = STORAGE_ROOT / "message"
 PART_ROOT = STORAGE_ROOT / "part"
 
 TIER_RE = re.compile(r"TIER:\s*\[?(\d)\]?", re.IGNORECASE)
 TASK_ID_RE = re.compile(r"TaskID:\s*(\d+)")
 
 
-def run_cmd(args):
-    subprocess.run(args, check=True)
-
-
 def git_branch():
     try:
         return subprocess.check_output(
@@ -43,119 +45,267 @@ def read_text_part(message_id):
     return "\n".join(texts)
 
 
-def main():
-    if not OPENCODE_BIN.exists():
-        raise SystemExit("opencode binary not found at ~/.opencode/bin/opencode")
+def parse_run_output(stdout):
+    """Collect assistant text and timing from `opencode run --format json` events."""
+    texts = []
+    message_ids = []
+    stamps = []
+    for line in stdout.splitlines():
+        try:
+            event = json.loads(line)
+        except ValueError:
+            continue
+        if not isinstance(event, dict):
+            continue
+        part = event.get("part") if isinstance(event.get("part"), dict) else {}
+        message_id = part.get("messageID")
+        if message_id and message_id not in message_ids:
+            message_ids.append(message_id)
+        if part.get("type") == "text" and part.get("text"):
+            texts.append(part["text"])
+        timing = part.get("time") if isinstance(part.get("time"), dict) else {}
+        stamps += [
+            v
+            for v in (event.get("timestamp"), timing.get("start"), timing.get("end"))
+            if isinstance(v, (int, float))
+        ]
+    # Model-side time (first to last event), excluding process start-up.
+    duration_ms = max(stamps) - min(stamps) if len(stamps) > 1 else None
+    return "\n".join(texts), message_ids, duration_ms
 
-    prompts = [
-        json.loads(line)
-        for line in PROMPTS_PATH.read_text().splitlines()
-        if line.strip()
+
+def run_prompt(item, cwd, branch, timeout):
+    task_id = item["id"]
+    prompt = (
+        f"Context: cwd={cwd}\n"
+        f"Context: git_branch={branch}\n"
+        f"TaskID: {task_id}\n"
+        f"Task: {item['task']}"
+    )
+    args = [
+        str(OPENCODE_BIN),
+        "run",
+        "--agent",
+        "tier-detector-bench",
+        "--model",
+        "opencode/gpt-5-nano",
+        "--format",
+        "json",
+        prompt,
     ]
+    record = {"task_id": task_id, "tier": None, "error": None}
+    started = time.monotonic()
+    try:
+        completed = subprocess.run(
+            args, capture_output=True, text=True, timeout=timeout
+        )
+    except subprocess.TimeoutExpired:
+        record["error"] = f"timeout after {timeout}s"
+        record["wall_ms"] = int((time.monotonic() - started) * 1000)
+        record["duration_ms"] = None
+        return record
+    record["wall_ms"] = int((time.monotonic() - started) * 1000)
+
+    text, message_ids, duration_ms = parse_run_output(completed.stdout)
+    if not text and message_ids:
+        # Older opencode builds may not stream text parts; read them from storage.
+        text = "\n".join(read_text_part(mid) for mid in message_ids)
+    record["message_id"] = message_ids[-1] if message_ids else None
+    if duration_ms is None:
+        duration_ms = record["wall_ms"]
+    record["duration_ms"] = duration_ms
+    if completed.returncode != 0:
+        record["error"] = (
+            f"exit {completed.returncode}: {completed.stderr.strip()[-500:]}"
+        )
+    tier_match = TIER_RE.search(text)
+    if tier_match:
+        record["tier"] = int(tier_match.group(1))
+    elif record["error"] is None:
+        record["error"] = "no TIER line in output"
+    return record
+
+
+def collect_from_storage(index, since_ms):
+    """Rebuild records for earlier bench runs from the opencode storage index."""
+    index.update()
+    records = []
+    for message in index.messages(
+        agent="tier-detector-bench", role="assistant", since=since_ms
+    ):
+        parent = index.get(message["parent_id"]) if message["parent_id"] else None
+        task_match = TASK_ID_RE.search(parent["text"]) if parent else None
+        if not task_match:
+            continue
+        tier_match = TIER_RE.search(message["text"])
+        completed = message["completed"]
+        records.append(
+            {
+                "task_id": int(task_match.group(1)),
+                "tier": int(tier_match.group(1)) if tier_match else None,
+                "error": None if tier_match else "no TIER line in output",
+                "message_id": message["id"],
+                "duration_ms": (
+                    completed - message["created"] if completed is not None else None
+                ),
+            }
+        )
+    return records
+
+
+def load_checkpoint(path):
+    """Return finished records by task id; errored prompts are retried."""
+    done = {}
+    if not path.exists():
+        return done
+    for line in path.read_text().splitlines():
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue  # a torn final line from an interrupted run
+        if record.get("error") is None:
+            done[record["task_id"]] = record
+    return done
+
+
+def run_pending(args, prompts):
+    """Run prompts missing from the checkpoint; returns records by task id."""
+    if not OPENCODE_BIN.exists():
+        raise SystemExit("opencode binary not found at ~/.opencode/bin/opencode")
     cwd = str(Path.cwd())
     branch = git_branch()
 
-    start_ms = int(time.time() * 1000)
+    if args.fresh and args.checkpoint.exists():
+        args.checkpoint.unlink()
+    done = load_checkpoint(args.checkpoint)
+    pending = [item for item in prompts if item["id"] not in done]
+    print(f"{len(done)} prompts resumed from checkpoint, {len(pending)} to run")
 
-    for item in prompts:
-        task_id = item["id"]
-        task = item["task"]
-        prompt = (
-            f"Context: cwd={cwd}\n"
-            f"Context: git_branch={branch}\n"
-            f"TaskID: {task_id}\n"
-            f"Task: {task}"
-        )
-        run_cmd(
-            [
-                str(OPENCODE_BIN),
-                "run",
-                "--agent",
-                "tier-detector-bench",
-                "--model",
-                "opencode/gpt-5-nano",
-                "--format",
-                "json",
-                prompt,
-            ]
-        )
+    args.checkpoint.parent.mkdir(parents=True, exist_ok=True)
+    with args.checkpoint.open("a") as checkpoint, ThreadPoolExecutor(
+        max_workers=max(1, args.workers)
+    ) as pool:
+        futures = {
+            pool.submit(run_prompt, item, cwd, branch, args.timeout): item
+            for item in pending
+        }
+        for future in as_completed(futures):
+            try:
+                record = future.result()
+            except Exception as exc:  # never let one prompt abort the run
+                record = {
+                    "task_id": futures[future]["id"],
+                    "tier": None,
+                    "duration_ms": None,
+                    "error": f"{type(exc).__name__}: {exc}",
+                }
+            # Results are consumed on this thread only, so appends never interleave.
+            checkpoint.write(json.dumps(record) + "\n")
+            checkpoint.flush()
+            if record["error"] is None:
+                done[record["task_id"]] = record
+            else:
+                done.setdefault(record["task_id"], record)
+            print(
+                f"[{len(done)}/{len(prompts)}] task {record['task_id']}: "
+                f"tier={record['tier']} error={record['error']}",
+                flush=True,
+            )
+    return done
 
-    results = []
-    for msg_file in MSG_ROOT.rglob("msg_*.json"):
-        data = json.loads(msg_file.read_text())
-        if data.get("agent") != "tier-detector-bench":
-            continue
-        if data.get("role") != "assistant":
-            continue
-        if data.get("time", {}).get("created", 0) < start_ms:
-            continue
-        if data.get("error"):
-            continue
 
-        message_id = data["id"]
-        text = read_text_part(message_id)
-        tier_match = TIER_RE.search(text)
-        tier = int(tier_match.group(1)) if tier_match else None
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the LLM tier detector")
+    parser.add_argument("--prompts", type=Path, default=PROMPTS_PATH)
+    parser.add_argument("--output", type=Path, default=OUTPUT_PATH)
+    parser.add_argument("--checkpoint", type=Path, default=CHECKPOINT_PATH)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument(
+        "--timeout", type=float, default=300, help="Per-prompt timeout in seconds"
+    )
+    parser.add_argument(
+        "--fresh", action="store_true", help="Ignore and replace the checkpoint"
+    )
+    parser.add_argument(
+        "--from-storage",
+        type=int,
+        metavar="SINCE_MS",
+        help="Score bench runs already in opencode storage since this epoch ms "
+        "instead of running prompts",
+    )
+    parser.add_argument(
+        "--history",
+        nargs="?",
+        const=str(HISTORY_PATH),
+        help="Append latency histograms to this JSONL history "
+        "(default path when given without a value)",
+    )
+    parser.add_argument("--label", help="Free-form label stored with --history")
+    args = parser.parse_args()
 
-        parent_id = data.get("parentID")
-        task_id = None
-        if parent_id:
-            parent_text = read_text_part(parent_id)
-            task_match = TASK_ID_RE.search(parent_text)
-            if task_match:
-                task_id = int(task_match.group(1))
+    prompts = [
+        json.loads(line)
+        for line in args.prompts.read_text().splitlines()
+        if line.strip()
+    ]
 
-        created = data["time"]["created"]
-        completed = data["time"]["completed"]
-        duration_ms = completed - created
+    if args.from_storage is not None:
+        from opencode_storage_index import StorageIndex
 
-        results.append(
-            {
-                "message_id": message_id,
-                "task_id": task_id,
-                "tier": tier,
-                "duration_ms": duration_ms,
-            }
-        )
+        start_ms = args.from_storage
+        done = {}
+        with StorageIndex(storage_root=STORAGE_ROOT) as index:
+            for record in collect_from_storage(index, start_ms):
+                if record["error"] is None:
+                    done[record["task_id"]] = record
+                else:
+                    done.setdefault(record["task_id"], record)
+        print(f"{len(done)} prompts found in storage since {start_ms}")
+    else:
+        start_ms = int(time.time() * 1000)
+        done = run_pending(args, prompts)
 
     expected = {p["id"]: p["expected_tier"] for p in prompts}
     scored = []
-    for r in results:
-        exp = expected.get(r["task_id"])
+    for task_id in expected:
+        r = done.get(task_id)
+        if r is None:
+            continue
+        exp = expected[task_id]
         r["expected_tier"] = exp
         r["correct"] = exp is not None and r["tier"] == exp
         scored.append(r)
 
-    durations = sorted(
-        [r["duration_ms"] for r in scored if r["duration_ms"] is not None]
-    )
+    ok = [r for r in scored if r["error"] is None]
+    latency = LatencyMetrics()
+    for r in ok:
+        if r["duration_ms"] is not None:
+            latency.record(r["duration_ms"], tier=r["tier"])
+    summary = latency.summary()
 
-    def pct(vals, p):
-        if not vals:
-            return None
-        k = (len(vals) - 1) * p
-        f = int(k)
-        c = min(f + 1, len(vals) - 1)
-        if f == c:
-            return vals[f]
-        return vals[f] + (vals[c] - vals[f]) * (k - f)
-
-    p50 = pct(durations, 0.50)
-    p95 = pct(durations, 0.95)
     accuracy = None
-    if scored:
-        accuracy = sum(1 for r in scored if r["correct"]) / len(scored)
+    if ok:
+        accuracy = sum(1 for r in ok if r["correct"]) / len(ok)
 
     output = {
         "start_ms": start_ms,
         "count": len(scored),
-        "p50_ms": p50,
-        "p95_ms": p95,
+        "errors": len(scored) - len(ok),
+        **{key: value for key, value in summary["all"].items() if key != "count"},
+        "by_tier": summary.get("tier", {}),
         "accuracy": accuracy,
         "results": scored,
     }
+    if args.history:
+        append_history(
+            args.history,
+            latency,
+            benchmark="tier-detector-llm",
+            label=args.label,
+            accuracy=accuracy,
+        )
 
-    OUTPUT_PATH.write_text(json.dumps(output, indent=2))
+    args.output.write_text(json.dumps(output, indent=2))
     print(json.dumps(output, indent=2))
 
 
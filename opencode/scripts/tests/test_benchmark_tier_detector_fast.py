@@ -0,0 +1,64 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+
+SCRIPT = Path(__file__).resolve().parents[1] / "benchmark-tier-detector-fast.py"
+
+
+def test_rules_only_report_has_stage_metrics_and_confusion(tmp_path):
+    prompts = tmp_path / "prompts.jsonl"
+    rows = [
+        {"id": 1, "task": "git status", "expected_tier": 1},
+        {"id": 2, "task": "deploy the api to production", "expected_tier": 4},
+        {"id": 3, "task": "fix typo in readme", "expected_tier": 2},
+        {"id": 4, "task": "tweak sidebar colors", "expected_tier": 2},
+    ]
+    prompts.write_text("\n".join(json.dumps(row) for row in rows))
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps({"accuracy": 0.25, "stages": {}}))
+    history = tmp_path / "history.jsonl"
+
+    completed = subprocess.run(
+        [
+            sys.executable,
+            str(SCRIPT),
+            "--prompts",
+            str(prompts),
+            "--rules-only",
+            "--baseline",
+            str(baseline),
+            "--history",
+            str(history),
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    report = json.loads(completed.stdout)
+
+    assert report["count"] == 4
+    assert report["accuracy"] == 0.5
+    assert report["delta"]["accuracy"] == 0.25
+    assert report["stages"]["rules_only"]["count"] == 4
+    assert report["stages"]["common_heuristics"]["count"] == 2
+    assert report["stages"]["common_heuristics"]["decided"] == 1
+    assert report["stages"]["rules_only_default"]["decided"] == 1
+    assert report["stages"]["embed_similarity"]["count"] == 0
+    assert report["stage_hits"] == {
+        "heuristic:t1": 1,
+        "rules-only": 1,
+        "rules:direct-command": 1,
+        "rules:t4": 1,
+    }
+    assert report["confusion"]["2"] == {"1": 1, "3": 1}
+    assert "results" not in report
+    assert report["latency_breakdowns"]["tier"]["4"]["count"] == 1
+    assert report["latency_breakdowns"]["stage"]["common_heuristics"]["count"] == 1
+    assert report["latency_breakdowns"]["stage"]["rules_only_default"]["count"] == 1
+
+    (entry,) = [json.loads(line) for line in history.read_text().splitlines()]
+    assert entry["benchmark"] == "tier-detector-fast"
+    assert entry["backend"] == "rules-only"
+    assert entry["metrics"]["all"]["count"] == 4
@@ -0,0 +1,71 @@
+import json
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from latency_metrics import (  # noqa: E402
+    LatencyHistogram,
+    LatencyMetrics,
+    append_history,
+    merge_history,
+    read_history,
+)
+
+
+def exact_percentile(values, p):
+    values = sorted(values)
+    rank = max(1, -(-len(values) * p // 1))
+    return values[int(rank) - 1]
+
+
+def test_percentiles_stay_within_one_percent():
+    rng = random.Random(7)
+    samples = [rng.lognormvariate(2, 1.2) for _ in range(5000)]
+    histogram = LatencyHistogram()
+    for ms in samples:
+        histogram.record(ms)
+
+    for p in (0.5, 0.9, 0.99):
+        expected = exact_percentile(samples, p)
+        assert abs(histogram.percentile(p) - expected) <= expected * 0.01 + 0.001
+    summary = histogram.summary()
+    assert summary["count"] == 5000
+    assert summary["max_ms"] == round(max(samples), 3)
+    assert LatencyHistogram().summary()["p50_ms"] is None
+
+
+def test_merge_matches_a_single_histogram_and_round_trips():
+    rng = random.Random(3)
+    samples = [rng.uniform(0.01, 2000) for _ in range(600)]
+    whole = LatencyMetrics()
+    left = LatencyMetrics()
+    right = LatencyMetrics()
+    for i, ms in enumerate(samples):
+        whole.record(ms, tier=i % 4 + 1, source="rules" if i % 2 else "embed")
+        (left if i < 250 else right).record(
+            ms, tier=i % 4 + 1, source="rules" if i % 2 else "embed"
+        )
+
+    restored = LatencyMetrics.from_dict(json.loads(json.dumps(left.to_dict())))
+    assert restored.merge(right).summary() == whole.summary()
+    assert set(whole.summary()["tier"]) == {"1", "2", "3", "4"}
+
+
+def test_history_is_append_only_and_merges_by_field(tmp_path):
+    history = tmp_path / "history.jsonl"
+    for branch, values in (("main", [1, 2, 3]), ("feature", [10]), ("main", [4])):
+        metrics = LatencyMetrics()
+        for ms in values:
+            metrics.record(ms, tier=1)
+        append_history(history, metrics, benchmark="demo", branch=branch)
+    with history.open("a") as handle:
+        handle.write('{"torn": ')
+
+    entries = read_history(history)
+    assert [entry["branch"] for entry in entries] == ["main", "feature", "main"]
+    merged = merge_history(entries, "branch", benchmark="demo")
+    assert merged["main"].summary()["all"]["count"] == 4
+    assert merged["main"].summary()["all"]["max_ms"] == 4
+    assert merged["feature"].overall.percentile(0.5) == 10
@@ -0,0 +1,88 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from opencode_storage_index import StorageIndex  # noqa: E402
+
+
+def write_message(root, session, message_id, **fields):
+    path = root / "message" / session / f"{message_id}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"id": message_id, "sessionID": session, **fields}))
+    return path
+
+
+def write_text_part(root, message_id, part_id, text):
+    path = root / "part" / message_id / f"{part_id}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"type": "text", "text": text}))
+    return path
+
+
+def test_index_queries_and_updates_incrementally(tmp_path):
+    storage = tmp_path / "storage"
+    write_message(storage, "ses_1", "msg_1", role="user", time={"created": 100})
+    write_text_part(storage, "msg_1", "prt_1", "TaskID: 7\nTask: fix typo")
+    write_message(
+        storage,
+        "ses_1",
+        "msg_2",
+        role="assistant",
+        agent="tier-detector-bench",
+        parentID="msg_1",
+        time={"created": 110, "completed": 150},
+    )
+    write_text_part(storage, "msg_2", "prt_1", "**TIER: 1**")
+    write_message(
+        storage,
+        "ses_1",
+        "msg_3",
+        role="assistant",
+        agent="build",
+        time={"created": 200, "completed": 250},
+    )
+
+    with StorageIndex(tmp_path / "index.sqlite3", storage) as index:
+        assert index.update() == {"scanned": 3, "updated": 3, "removed": 0}
+        rows = index.messages(agent="tier-detector-bench", role="assistant", since=0)
+        assert [row["id"] for row in rows] == ["msg_2"]
+        assert rows[0]["text"] == "**TIER: 1**"
+        assert index.get(rows[0]["parent_id"])["text"].startswith("TaskID: 7")
+        assert index.messages(role="assistant", since=120)[0]["id"] == "msg_3"
+
+        assert index.update() == {"scanned": 3, "updated": 0, "removed": 0}
+
+        changed = write_message(
+            storage,
+            "ses_1",
+            "msg_3",
+            role="assistant",
+            agent="build",
+            error={"name": "Aborted"},
+            time={"created": 200, "completed": 260},
+        )
+        os.utime(changed, ns=(1, 1))
+        (storage / "message" / "ses_1" / "msg_1.json").unlink()
+        assert index.update() == {"scanned": 2, "updated": 1, "removed": 1}
+        assert index.get("msg_1") is None
+        assert index.messages(agent="build") == []
+        assert index.messages(agent="build", include_errors=True)[0]["error"] == 1
+
+    # A second connection sees the persisted index without reparsing.
+    with StorageIndex(tmp_path / "index.sqlite3", storage) as index:
+        assert index.update()["updated"] == 0
+
+
+def test_index_picks_up_parts_written_after_the_message(tmp_path):
+    storage = tmp_path / "storage"
+    write_message(storage, "ses_1", "msg_1", role="assistant", time={"created": 1})
+
+    with StorageIndex(tmp_path / "index.sqlite3", storage) as index:
+        index.update()
+        assert index.get("msg_1")["text"] == ""
+        write_text_part(storage, "msg_1", "prt_1", "**TIER: 2**")
+        assert index.update()["updated"] == 1
+        assert index.get("msg_1")["text"] == "**TIER: 2**"
@@ -0,0 +1,51 @@
+import importlib.util
+import json
+import sys
+from pathlib import Path
+
+
+SCRIPT = Path(__file__).resolve().parents[1] / "run-tier-detector-benchmark.py"
+
+
+def load_runner():
+    spec = importlib.util.spec_from_file_location("run_tier_detector_benchmark", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_parse_run_output_reads_text_parts_and_timing():
+    runner = load_runner()
+    events = [
+        {"type": "step_start", "timestamp": 1000, "part": {"messageID": "msg_a"}},
+        {
+            "type": "text",
+            "timestamp": 1900,
+            "part": {
+                "type": "text",
+                "messageID": "msg_a",
+                "text": "**TIER: 3**\n- Triggers: schema",
+                "time": {"start": 1200, "end": 1850},
+            },
+        },
+        {"type": "step_finish", "timestamp": 2000, "part": {"messageID": "msg_a"}},
+    ]
+    stdout = "\n".join(json.dumps(e) for e in events) + "\nnot json\n"
+    text, message_ids, duration_ms = runner.parse_run_output(stdout)
+    assert runner.TIER_RE.search(text).group(1) == "3"
+    assert message_ids == ["msg_a"]
+    assert duration_ms == 1000
+
+
+def test_checkpoint_resumes_successes_and_retries_errors(tmp_path):
+    runner = load_runner()
+    checkpoint = tmp_path / "run.checkpoint.jsonl"
+    checkpoint.write_text(
+        json.dumps({"task_id": 1, "tier": 2, "duration_ms": 10, "error": None})
+        + "\n"
+        + json.dumps({"task_id": 2, "tier": None, "error": "timeout after 5s"})
+        + "\n"
+        + '{"task_id": 3, "tier'
+    )
+    assert set(runner.load_checkpoint(checkpoint)) == {1}
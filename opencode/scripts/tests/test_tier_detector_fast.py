@@ -1,10 +1,31 @@
+import importlib.util
 import json
+import os
 import subprocess
 import sys
+import time
 from pathlib import Path
 
+import pytest
+
 
 SCRIPT = Path(__file__).resolve().parents[1] / "tier-detector-fast.py"
+MODULE = SCRIPT.with_name("tier_detector_fast.py")
+
+
+def load_detector():
+    spec = importlib.util.spec_from_file_location("tier_detector_fast", MODULE)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(autouse=True)
+def isolated_home(tmp_path_factory, monkeypatch):
+    # Keep the detector (and every script run from here) away from the real
+    # ~/.cache and from a daemon a developer may have running.
+    monkeypatch.setenv("HOME", str(tmp_path_factory.mktemp("home")))
 
 
 def run_detector(task: str, extra_args=None) -> dict:
@@ -19,6 +40,8 @@ def run_detector(task: str, extra_args=None) -> dict:
         "json",
         *extra_args,
     ]
+    if "--socket" not in extra_args:
+        cmd.append("--no-client")
     completed = subprocess.run(cmd, check=True, capture_output=True, text=True)
     return json.loads(completed.stdout)
 
@@ -68,3 +91,621 @@ def test_quoted_t4_trigger_does_not_escalate():
 def test_backticked_t4_trigger_does_not_escalate():
     payload = run_detector("analyze `truncate table` examples in docs")
     assert payload["tier"] != 4
+
+
+def test_client_falls_back_in_process_without_daemon(tmp_path):
+    payload = run_detector(
+        "git status", ["--client", "--socket", str(tmp_path / "missing.sock")]
+    )
+    assert payload == run_detector("git status")
+
+
+def test_client_round_trips_through_daemon(tmp_path):
+    sock = tmp_path / "detector.sock"
+    daemon = subprocess.Popen(
+        [sys.executable, str(SCRIPT), "--serve", "--rules-only", "--socket", str(sock)]
+    )
+    try:
+        deadline = time.monotonic() + 10
+        while not sock.exists() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert sock.exists()
+
+        task = "review rollback plan for production migration"
+        args = ["--schema-version", "2"]
+        payload = run_detector(task, ["--client", "--socket", str(sock), *args])
+        assert payload == run_detector(task, args)
+        # Plain one-shot calls find the daemon on their own.
+        assert run_detector(task, ["--socket", str(sock), *args]) == payload
+    finally:
+        daemon.terminate()
+        daemon.wait(timeout=10)
+    assert not sock.exists()
+
+
+def test_daemon_refuses_requests_it_would_answer_differently():
+    detector = load_detector()
+    request = {"task": "git status", "model": "other/model", "use_cache": False}
+    with pytest.raises(ValueError):
+        detector._handle_request(json.dumps(request).encode(), "model", True, "torch")
+    request = {"task": "git status", "model": "model", "rules_only": False}
+    request["use_cache"] = False
+    with pytest.raises(ValueError):
+        detector._handle_request(json.dumps(request).encode(), "model", True, "torch")
+    request["rules_only"] = True
+    request["exemplars"] = "other.jsonl"
+    with pytest.raises(ValueError):
+        detector._handle_request(json.dumps(request).encode(), "model", True, "torch")
+    request["exemplars"] = detector.EXEMPLARS_PATH
+    payload = detector._handle_request(
+        json.dumps(request).encode(), "model", True, "torch"
+    )
+    assert payload["source"] == "rules:direct-command"
+
+
+def test_batch_mode_streams_one_line_per_task_in_order():
+    lines = [
+        json.dumps({"id": 1, "task": "git status"}),
+        json.dumps("review rollback plan for production migration"),
+        "not json",
+        json.dumps({"id": "c", "task": "fix drop shadow contrast on button css"}),
+    ]
+    completed = subprocess.run(
+        [sys.executable, str(SCRIPT), "--batch", "--rules-only"],
+        input="\n".join(lines) + "\n",
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    out = [json.loads(line) for line in completed.stdout.splitlines()]
+    assert len(out) == 4
+    assert out[0]["id"] == 1 and out[0]["tier"] == 1
+    assert "id" not in out[1] and out[1]["tier"] == 4
+    assert out[2]["line"] == 3 and "error" in out[2]
+    assert out[3]["id"] == "c" and out[3]["tier"] != 4
+
+
+def test_batch_workers_shard_and_keep_input_order(tmp_path):
+    tasks = ["git status", "deploy to production", "fix typo in readme", "not json"]
+    lines = [
+        json.dumps({"id": i, "task": task}) if task != "not json" else task
+        for i, task in enumerate(tasks * 25)
+    ]
+    corpus = tmp_path / "corpus.jsonl"
+    corpus.write_text("\n".join(lines) + "\n")
+
+    def run(*extra):
+        return subprocess.run(
+            [sys.executable, str(SCRIPT), "--batch", str(corpus), "--rules-only"]
+            + list(extra),
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+
+    serial = run()
+    parallel = run("--workers", "3", "--batch-size", "2")
+    assert parallel == serial
+    out = [json.loads(line) for line in parallel.splitlines()]
+    assert len(out) == 100
+    assert [row.get("id") for row in out[:3]] == [0, 1, 2]
+    assert out[99]["line"] == 100 and "error" in out[99]
+
+
+def test_batch_groups_rule_misses_into_one_embed_pass(monkeypatch):
+    detector = load_detector()
+    calls = []
+
+    def fake_embed(model_name, texts, backend="torch"):
+        calls.append(list(texts))
+        return [
+            detector.Result(tier=2, confidence=0.5, source="embed", use_llm=False)
+            for _ in texts
+        ]
+
+    monkeypatch.setattr(detector, "embed_similarity_many", fake_embed)
+    records = [
+        {"task": "tweak the sidebar colors"},
+        {"task": "git status"},
+        {"task": "improve onboarding flow copy"},
+    ]
+    payloads = list(detector.iter_batch_payloads(records, "model", batch_size=8))
+    assert [p["source"] for p in payloads] == ["embed", "rules:direct-command", "embed"]
+    assert calls == [["tweak the sidebar colors", "improve onboarding flow copy"]]
+
+
+def test_compiled_matcher_keeps_overlapping_and_negated_semantics():
+    detector = load_detector()
+    keywords = {"database", "drop database", "data", "orm", "deploy"}
+    matcher = detector.KeywordMatcher(keywords)
+    assert matcher.scan("drop database then format disks") == {
+        "database",
+        "drop database",
+        "data",
+        "orm",
+    }
+    assert matcher.scan("do not deploy yet, then run the deploy") == {"deploy"}
+    assert matcher.scan("never deploy") == set()
+
+
+def test_result_cache_hits_skip_rules_and_invalidate_on_keyword_change(
+    tmp_path, monkeypatch
+):
+    detector = load_detector()
+    monkeypatch.setattr(detector, "RESULT_CACHE_DIR", tmp_path)
+    first = detector.classify("Deploy   the docs site", "model", rules_only_mode=True)
+    assert first.tier == 4
+    assert len(list(tmp_path.glob("*.json"))) == 1
+
+    def fail(_text):
+        raise AssertionError("rules should not run on a cache hit")
+
+    monkeypatch.setattr(detector, "rules_only", fail)
+    cached = detector.classify("deploy the docs site", "model", rules_only_mode=True)
+    assert cached == first
+
+    monkeypatch.undo()
+    monkeypatch.setattr(detector, "RESULT_CACHE_DIR", tmp_path)
+    monkeypatch.setattr(detector, "T4_KEYWORDS", detector.T4_KEYWORDS - {"deploy"})
+    detector._RULES_FINGERPRINT_SINGLETON.clear()
+    changed = detector.classify("deploy the docs site", "model", rules_only_mode=True)
+    assert changed.tier != 4
+
+
+def test_rules_fingerprint_is_computed_once(monkeypatch):
+    detector = load_detector()
+    first = detector._rules_fingerprint()
+
+    def fail(files):
+        raise AssertionError("fingerprint should be memoized")
+
+    monkeypatch.setattr(detector, "_compute_rules_fingerprint", fail)
+    assert detector._rules_fingerprint() == first
+
+
+def test_rules_fingerprint_follows_exemplar_edits(tmp_path, monkeypatch):
+    detector = load_detector()
+    exemplars = tmp_path / "exemplars.jsonl"
+    exemplars.write_text('{"task": "a", "expected_tier": 1}\n')
+    monkeypatch.setattr(detector, "EXEMPLARS_PATH", str(exemplars))
+    first = detector._rules_fingerprint()
+    assert detector._rules_fingerprint() == first
+
+    # What a long-running daemon sees when the file is relabelled.
+    exemplars.write_text('{"task": "a", "expected_tier": 3}\n')
+    os.utime(exemplars, ns=(0, exemplars.stat().st_mtime_ns + 10**9))
+    assert detector._rules_fingerprint() != first
+
+
+def test_onnx_fallback_results_are_cached_under_torch(tmp_path, monkeypatch):
+    detector = load_detector()
+    monkeypatch.setattr(detector, "RESULT_CACHE_DIR", tmp_path)
+    monkeypatch.setattr(detector, "STAGE_COST_PATH", str(tmp_path / "costs.json"))
+    monkeypatch.setattr(detector, "_onnx_installed", lambda: True)
+    calls = []
+    embed = fake_embedding(detector, calls)
+
+    def falling_back(model_name, text, backend="torch"):
+        detector._ONNX_UNAVAILABLE.add(model_name)
+        return embed(model_name, text, backend)
+
+    monkeypatch.setattr(detector, "embed_similarity", falling_back)
+    task = "improve onboarding flow copy"
+    detector.classify(task, "model", backend="onnx", max_latency_ms=0)
+
+    torch_path, _ = detector._result_cache_entry(task, "model", False, "torch")
+    onnx_path, _ = detector._result_cache_entry(task, "model", False, "onnx")
+    assert os.path.exists(torch_path) and not os.path.exists(onnx_path)
+    # Later runs in this process look the fallback's answer up directly.
+    detector.classify(task, "model", backend="onnx", max_latency_ms=0)
+    assert calls == [task]
+
+
+def test_result_cache_evicts_least_recently_used(tmp_path, monkeypatch):
+    detector = load_detector()
+    monkeypatch.setattr(detector, "RESULT_CACHE_DIR", tmp_path)
+    monkeypatch.setattr(detector, "RESULT_CACHE_MAX_ENTRIES", 10)
+    for i in range(25):
+        detector.classify(f"git status {i}", "model", rules_only_mode=True)
+    assert len(list(tmp_path.glob("*.json"))) <= 10
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def fake_embedding(detector, calls, confidence=0.9):
+    def embed(model_name, text, backend="torch"):
+        calls.append(text)
+        return detector.Result(
+            tier=3, confidence=confidence, source="embed", use_llm=False
+        )
+
+    return embed
+
+
+def test_budget_is_checked_before_the_embedding_stage(tmp_path, monkeypatch):
+    detector = load_detector()
+    results_dir = tmp_path / "results"
+    monkeypatch.setattr(detector, "RESULT_CACHE_DIR", str(results_dir))
+    monkeypatch.setattr(detector, "STAGE_COST_PATH", str(tmp_path / "costs.json"))
+    calls = []
+    monkeypatch.setattr(detector, "embed_similarity", fake_embedding(detector, calls))
+    task = "improve onboarding flow copy"
+
+    skipped = detector.classify(task, "model", max_latency_ms=100)
+    assert skipped.source == "latency-fallback"
+    assert calls == []
+    assert not list(results_dir.glob("*.json"))
+
+    # The first load downloads the model, so its cost is not recorded.
+    ran = detector.classify(task, "model", max_latency_ms=5000)
+    assert ran.source == "embed"
+    assert calls == [task]
+    assert not (tmp_path / "costs.json").exists()
+
+    monkeypatch.setattr(detector, "_first_load", lambda *args: False)
+    detector.classify(task, "model", max_latency_ms=5000, use_cache=False)
+    costs = json.loads((tmp_path / "costs.json").read_text())
+    assert set(costs) == {"embed:torch:cold"}
+
+
+def test_slow_measurements_hold_embedding_back_until_they_age(
+    tmp_path, monkeypatch
+):
+    detector = load_detector()
+    costs_path = tmp_path / "costs.json"
+    monkeypatch.setattr(detector, "STAGE_COST_PATH", str(costs_path))
+    monkeypatch.setattr(detector, "_first_load", lambda *args: False)
+    calls = []
+    monkeypatch.setattr(detector, "embed_similarity", fake_embedding(detector, calls))
+    task = "improve onboarding flow copy"
+    declared = detector.EMBED_COST_MS["torch"]["cold"]
+
+    # Measured costs may exceed the declared one, and a tighter budget uses them.
+    detector._observe_stage_cost("embed:torch:cold", 4000.0, declared)
+    assert detector._stage_cost("embed:torch:cold", declared) > 3000
+    held = detector.classify(task, "model", use_cache=False, max_latency_ms=1500)
+    assert held.source == "latency-fallback" and calls == []
+
+    # One slow cold load long ago no longer keeps embedding from running...
+    now = detector.time.time()
+    half_life = detector.STAGE_COST_HALF_LIFE_S
+    costs_path.write_text(
+        json.dumps({"embed:torch:cold": [60000.0, now - 20 * half_life]})
+    )
+    detector._STAGE_COST_SINGLETON.clear()
+    ran = detector.classify(task, "model", use_cache=False, max_latency_ms=1500)
+    assert ran.source == "embed" and calls == [task]
+    # ...and the run it allowed is measured again.
+    estimate, observed_at = json.loads(costs_path.read_text())["embed:torch:cold"]
+    assert estimate < 1500 and observed_at >= now
+
+
+def test_budget_only_holds_back_short_tasks(tmp_path, monkeypatch):
+    detector = load_detector()
+    monkeypatch.setattr(detector, "STAGE_COST_PATH", str(tmp_path / "costs.json"))
+    calls = []
+    monkeypatch.setattr(detector, "embed_similarity", fake_embedding(detector, calls))
+    short = "improve onboarding flow copy"
+    long = " ".join(["improve the onboarding flow copy for new visitors"] * 2)
+
+    skipped = detector.classify(short, "model", use_cache=False, max_latency_ms=100)
+    assert skipped.source == "latency-fallback"
+    ran = detector.classify(long, "model", use_cache=False, max_latency_ms=100)
+    assert ran.source == "embed"
+    assert calls == [long]
+
+
+def test_low_confidence_answers_escalate_and_remain_the_fallback(
+    tmp_path, monkeypatch
+):
+    detector = load_detector()
+    monkeypatch.setattr(detector, "STAGE_COST_PATH", str(tmp_path / "costs.json"))
+    calls = []
+    monkeypatch.setattr(detector, "embed_similarity", fake_embedding(detector, calls))
+    task = "add caching to the api"
+
+    kept = detector.classify(task, "model", use_cache=False)
+    assert kept.source == "rules:t2-weak-signal" and calls == []
+
+    over_budget = detector.classify(
+        task, "model", use_cache=False, max_latency_ms=100, min_confidence=0.7
+    )
+    assert over_budget.source == "rules:t2-weak-signal" and calls == []
+
+    escalated = detector.classify(
+        task, "model", use_cache=False, max_latency_ms=5000, min_confidence=0.7
+    )
+    assert escalated.source == "embed"
+    assert calls == [task]
+
+    stages = detector.build_pipeline("model", rules_only_mode=True)
+    result, degraded = detector.run_pipeline(task, stages, min_confidence=0.7)
+    assert result.source == "rules-only" and not degraded
+
+
+def test_rules_path_cold_start_stays_under_budget(tmp_path):
+    # Bytecode caching is part of the startup design, so allow it here.
+    env = {k: v for k, v in os.environ.items() if k != "PYTHONDONTWRITEBYTECODE"}
+    env["HOME"] = str(tmp_path)
+    totals = []
+    for i in range(5):
+        completed = subprocess.run(
+            [
+                sys.executable,
+                str(SCRIPT),
+                "--task",
+                f"tweak sidebar spacing {i}",
+                "--rules-only",
+                "--self-profile",
+            ],
+            check=True,
+            capture_output=True,
+            text=True,
+            env=env,
+        )
+        profile = json.loads(completed.stderr)["profile"]
+        assert {"import_ms", "args_ms", "rules_ms", "total_ms"} <= set(profile)
+        totals.append(profile["total_ms"])
+    assert min(totals) < 30
+
+
+def test_rules_path_does_not_import_heavy_modules():
+    code = (
+        "import sys; sys.argv = ['x', '--task', 'git status', '--rules-only',"
+        " '--no-cache']; import tier_detector_fast as d; d.main();"
+        " print(sorted(m for m in ('dataclasses', 'hashlib', 'pathlib', 'typing',"
+        " 'torch', 'numpy') if m in sys.modules))"
+    )
+    completed = subprocess.run(
+        [sys.executable, "-c", code],
+        check=True,
+        capture_output=True,
+        text=True,
+        cwd=MODULE.parent,
+    )
+    assert completed.stdout.splitlines()[-1] == "[]"
+
+
+def test_vector_bank_round_trips_as_memory_map(tmp_path, monkeypatch):
+    np = pytest.importorskip("numpy")
+    detector = load_detector()
+    monkeypatch.setattr(detector, "CACHE_DIR", str(tmp_path))
+    entries = [(1, "fix typo"), (1, "edit readme"), (4, "deploy to production")]
+    calls = []
+
+    def fake_embed(texts):
+        calls.append(list(texts))
+        return np.eye(len(texts), 3, dtype=np.float32)
+
+    vectors, tiers = detector._vector_bank("m", "exemplars", entries, fake_embed, "torch")
+    assert tiers.tolist() == [1, 1, 4]
+
+    detector._BANK_SINGLETON.clear()
+    vectors, tiers = detector._vector_bank("m", "exemplars", entries, fake_embed, "torch")
+    assert len(calls) == 1
+    assert isinstance(vectors, np.memmap)
+    assert vectors.shape == (3, 3) and vectors.dtype == np.float32
+
+
+def test_publish_dir_swaps_whole_directories(tmp_path):
+    detector = load_detector()
+    target = tmp_path / "bank"
+    # A plain directory, as written before publishing went through a link.
+    target.mkdir()
+    (target / "meta.json").write_text("old")
+
+    for content in ("first", "second"):
+        staging = tmp_path / f"staging-{content}"
+        staging.mkdir()
+        (staging / "meta.json").write_text(content)
+        detector._publish_dir(staging, target)
+        assert (target / "meta.json").read_text() == content
+        assert target.is_symlink() and not staging.exists()
+
+    # Only the live version is left; nothing points at a deleted directory.
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(
+        [".bank.lock", os.readlink(target), "bank"]
+    )
+
+
+def test_publish_dir_removes_versions_left_by_other_publishers(tmp_path):
+    detector = load_detector()
+    target = tmp_path / "bank"
+    # What a publisher that lost a race, or crashed, leaves behind.
+    (tmp_path / ".bank.0123456789ab").mkdir()
+    (tmp_path / ".bank.4242.old").mkdir()
+    (tmp_path / ".other.0123456789ab").mkdir()
+
+    staging = tmp_path / "staging"
+    staging.mkdir()
+    (staging / "meta.json").write_text("new")
+    detector._publish_dir(staging, target)
+
+    assert (target / "meta.json").read_text() == "new"
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(
+        [".bank.lock", os.readlink(target), ".other.0123456789ab", "bank"]
+    )
+
+
+def test_knn_exemplars_vote_on_the_same_forward_pass(tmp_path, monkeypatch):
+    np = pytest.importorskip("numpy")
+    detector = load_detector()
+    vocab = ["sidebar", "color", "invoice", "export", "onboarding", "copy", "label"]
+
+    def fake_embedder(model_name, backend):
+        def embed(texts):
+            rows = np.array(
+                [[t.split().count(w) for w in vocab] + [0.1] for t in texts],
+                dtype=np.float32,
+            )
+            return rows / np.linalg.norm(rows, axis=1, keepdims=True)
+
+        return embed
+
+    exemplars = tmp_path / "prompts.jsonl"
+    lines = [
+        {"id": i, "task": "tweak sidebar color", "expected_tier": 1} for i in range(5)
+    ]
+    lines += [
+        {"id": 10 + i, "task": "invoice export rewrite", "expected_tier": 3}
+        for i in range(5)
+    ]
+    exemplars.write_text("\n".join(json.dumps(line) for line in lines))
+    monkeypatch.setattr(detector, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(detector, "EXEMPLARS_PATH", str(exemplars))
+    monkeypatch.setattr(detector, "_get_embedder", fake_embedder)
+
+    results = detector.embed_similarity_many(
+        "model", ["sidebar color label", "invoice export"]
+    )
+    assert [(r.source, r.tier) for r in results] == [
+        ("embed:knn", 1),
+        ("embed:knn", 3),
+    ]
+
+    monkeypatch.setattr(detector, "EXEMPLARS_PATH", "")
+    results = detector.embed_similarity_many("model", ["sidebar color label"])
+    assert results[0].source == "embed"
+
+
+def test_split_or_distant_neighbours_leave_the_label_answer(tmp_path, monkeypatch):
+    np = pytest.importorskip("numpy")
+    detector = load_detector()
+    vocab = ["sidebar", "invoice", "deploy"]
+
+    def fake_embedder(model_name, backend):
+        def embed(texts):
+            rows = np.array(
+                [[t.lower().count(w) for w in vocab] + [0.1] for t in texts],
+                dtype=np.float32,
+            )
+            return rows / np.linalg.norm(rows, axis=1, keepdims=True)
+
+        return embed
+
+    # The same task labelled both ways: the vote can only be close.
+    exemplars = tmp_path / "prompts.jsonl"
+    lines = [
+        {"id": i, "task": "sidebar invoice", "expected_tier": 1 if i % 2 else 3}
+        for i in range(8)
+    ]
+    exemplars.write_text("\n".join(json.dumps(line) for line in lines))
+    monkeypatch.setattr(detector, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(detector, "EXEMPLARS_PATH", str(exemplars))
+    monkeypatch.setattr(detector, "_get_embedder", fake_embedder)
+
+    # Only the tier-4 label prompt mentions deploying.
+    split, distant = detector.embed_similarity_many(
+        "model", ["sidebar invoice deploy", "deploy"]
+    )
+    assert (split.source, split.tier) == ("embed", 4)
+    assert (distant.source, distant.tier) == ("embed", 4)
+
+
+def test_prewarm_loads_once_and_records_the_warm_cost(tmp_path, monkeypatch):
+    detector = load_detector()
+    monkeypatch.setattr(detector, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(detector, "PREWARM_LOCK_PATH", str(tmp_path / "prewarm.lock"))
+    monkeypatch.setattr(detector, "STAGE_COST_PATH", str(tmp_path / "costs.json"))
+    calls = []
+    monkeypatch.setattr(detector, "embed_similarity", fake_embedding(detector, calls))
+
+    assert detector.prewarm("model", "onnx", foreground=True) == 0
+    assert len(calls) == 2
+    costs = json.loads((tmp_path / "costs.json").read_text())
+    assert set(costs) == {"embed:onnx:warm"}
+
+    # A second shell finding the lock held leaves the running warm-up alone.
+    import fcntl
+
+    with open(tmp_path / "prewarm.lock", "w") as held:
+        fcntl.flock(held, fcntl.LOCK_EX)
+        assert detector.prewarm("model", "onnx", foreground=True) == 0
+    assert len(calls) == 2
+
+
+def test_prewarm_detaches_and_returns_immediately(tmp_path):
+    # Offline with an unknown model, so the worker fails fast even where the
+    # embedding dependencies are installed.
+    env = dict(os.environ, HOME=str(tmp_path), HF_HUB_OFFLINE="1")
+    started = time.monotonic()
+    subprocess.run(
+        [sys.executable, str(SCRIPT), "--prewarm", "--model", "missing/model"],
+        check=True,
+        env=env,
+        timeout=10,
+    )
+    assert time.monotonic() - started < 5
+    log = tmp_path / ".cache" / "opencode" / "tier-detector-fast" / "prewarm.log"
+    deadline = time.monotonic() + 10
+    while not (log.exists() and log.read_text()) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert '"prewarm"' in log.read_text()
+
+
+def test_onnx_backend_mean_pools_over_the_attention_mask(monkeypatch):
+    np = pytest.importorskip("numpy")
+    import types
+
+    detector = load_detector()
+    for name in ("onnxruntime", "tokenizers"):
+        if name not in sys.modules:
+            monkeypatch.setitem(sys.modules, name, types.ModuleType(name))
+
+    class Encoding:
+        def __init__(self, ids, mask):
+            self.ids, self.attention_mask, self.type_ids = ids, mask, [0] * len(ids)
+
+    class Tokenizer:
+        def encode_batch(self, texts):
+            # Padded batch: the first text is one token shorter.
+            return [Encoding([5, 6, 0], [1, 1, 0]), Encoding([7, 8, 9], [1, 1, 1])]
+
+    class Session:
+        def run(self, outputs, feeds):
+            assert feeds["attention_mask"].tolist() == [[1, 1, 0], [1, 1, 1]]
+            assert "token_type_ids" not in feeds
+            hidden = [
+                [[1.0, 0.0], [3.0, 0.0], [100.0, 100.0]],  # padding must not count
+                [[3.0, 0.0], [0.0, 4.0], [0.0, 2.0]],
+            ]
+            return [np.array(hidden, dtype=np.float32)]
+
+    detector._ONNX_SINGLETON["model"] = (
+        Session(),
+        Tokenizer(),
+        {"input_ids", "attention_mask"},
+    )
+    assert detector._effective_backend("model", "onnx") == "onnx"
+    vectors = detector._get_embedder("model", "onnx")(["a b", "c d e"])
+    # Means are (2, 0) and (1, 2); L2-normalized that is (1, 0) and (1, 2)/sqrt(5).
+    expected = [[1.0, 0.0], [1 / 5**0.5, 2 / 5**0.5]]
+    assert vectors.dtype == np.float32
+    assert np.allclose(vectors, expected, atol=1e-6)
+
+
+def test_onnx_backend_falls_back_to_torch(monkeypatch):
+    detector = load_detector()
+    monkeypatch.setattr(detector, "_onnx_embedder", lambda model_name: None)
+    assert detector._effective_backend("model", "onnx") == "torch"
+
+    exports = []
+
+    def failing_export(model_name):
+        exports.append(model_name)
+        raise RuntimeError("exported model missing and torch.onnx unavailable")
+
+    monkeypatch.setattr(detector, "_onnx_embedder", failing_export)
+    assert detector._effective_backend("other", "onnx") == "torch"
+    assert detector._effective_backend("other", "onnx") == "torch"
+    assert exports == ["other"]  # A failed export is not retried.
+    assert detector._effective_backend("model", "torch") == "torch"
+
+    backends = []
+
+    def fake_embedder(model_name, backend):
+        backends.append(backend)
+        return None
+
+    monkeypatch.setattr(detector, "_get_embedder", fake_embedder)
+    assert detector.embed_similarity_many("model", ["task"], "onnx") == [None]
+    assert backends == ["torch"]
@@ -0,0 +1,2098 @@
+"""Local fast-path tier classification with small HF model fallback.
+
+Imported by the ``tier-detector-fast.py`` entry point so the bytecode is
+cached; only what the rules tier needs is imported at module load, everything
+else (argparse, pathlib, torch, ...) is imported where it is used.
+
+Usage:
+  pkgx python /home/dxta/.dotfiles/opencode/scripts/tier-detector-fast.py --task "..."
+  echo "..." | pkgx python /home/dxta/.dotfiles/opencode/scripts/tier-detector-fast.py --stdin
+
+Warm daemon (model stays loaded behind a Unix socket):
+  pkgx python /home/dxta/.dotfiles/opencode/scripts/tier-detector-fast.py --serve &
+  pkgx python /home/dxta/.dotfiles/opencode/scripts/tier-detector-fast.py --client --task "..."
+
+Background warm-up (returns at once; see zshrc/functions.sh):
+  pkgx python /home/dxta/.dotfiles/opencode/scripts/tier-detector-fast.py --prewarm --serve
+
+Batch (JSONL in, JSONL out; one result line per input line):
+  pkgx python /home/dxta/.dotfiles/opencode/scripts/tier-detector-fast.py --batch prompts.jsonl
+  pkgx python /home/dxta/.dotfiles/opencode/scripts/tier-detector-fast.py --batch history.jsonl --workers 8
+"""
+
+from __future__ import annotations
+
+import contextlib
+import io
+import json
+import os
+import re
+import sys
+import time
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    import argparse
+    from pathlib import Path
+    from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+
+T4_KEYWORDS = {
+    "deploy",
+    "production",
+    "rollback",
+    "destroy",
+    "drop table",
+    "delete data",
+    "drop database",
+    "truncate table",
+    "force push",
+    "irreversible",
+    "customer data",
+    "pii",
+    "secrets rotation",
+    "rotate production secrets",
+}
+
+T4_FALSE_POSITIVES = {
+    "drop shadow",
+    "drop-down",
+    "dropdown",
+}
+
+T3_CRITICAL_KEYWORDS = {
+    "architecture",
+    "refactor",
+    "new module",
+    "new service",
+    "schema",
+    "migration",
+    "database",
+    "orm",
+    "webhook",
+    "external service",
+    "security",
+    "encryption",
+    "permissions",
+    "input validation",
+    "breaking change",
+    "public interface",
+    "backward compatibility",
+}
+
+T3_WEAK_KEYWORDS = {
+    "api",
+    "auth",
+    "logging",
+    "caching",
+    "shared utility",
+    "sdk",
+    "unclear scope",
+    "unfamiliar",
+    "might affect",
+}
+
+WEAK_T3_COMBO_THRESHOLD = 3
+
+T1_MARKERS = (
+    "typo",
+    "readme",
+    "docs",
+    "documentation",
+    "comment",
+    "spacing",
+    "formatting",
+    "lint warning",
+    "rename variable",
+)
+
+T2_MARKERS = (
+    "2-5 files",
+    "two files",
+    "three files",
+    "helper functions",
+    "pagination",
+    "feature flag",
+    "endpoint test",
+    "error messages",
+)
+
+DEEP_CUES = {
+    "architecture",
+    "refactor",
+    "migration",
+    "security",
+    "external service",
+}
+
+
+LABEL_PROMPTS: Dict[int, str] = {
+    1: "Tiny change in one file (<30 lines); typo/comment/formatting.",
+    2: "Small change across 2-5 files (30-100 lines) within existing patterns.",
+    3: "Architecture or cross-cutting change; auth/integration/schema/security/uncertainty.",
+    4: "Production deploy, irreversible change, data deletion, secrets rotation, PII.",
+}
+
+
+class Result:
+    # Plain class rather than a dataclass: importing dataclasses pulls in
+    # inspect, which alone costs more than the whole rules tier.
+    def __init__(
+        self,
+        tier: int,
+        confidence: float,
+        source: str,
+        use_llm: bool,
+        triggers: Optional[List[str]] = None,
+        mandatory_controls: Optional[List[str]] = None,
+        depth: str = "standard",
+    ):
+        self.tier = tier
+        self.confidence = confidence
+        self.source = source
+        self.use_llm = use_llm
+        self.triggers = triggers if triggers is not None else []
+        self.mandatory_controls = (
+            mandatory_controls if mandatory_controls is not None else []
+        )
+        self.depth = depth
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Result):
+            return NotImplemented
+        return self.__dict__ == other.__dict__
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{k}={v!r}" for k, v in self.__dict__.items())
+        return f"Result({fields})"
+
+
+_MODEL_SINGLETON = {}
+_TOKENIZER_SINGLETON = {}
+_ONNX_SINGLETON = {}
+_ONNX_UNAVAILABLE = set()  # Models whose ONNX export failed in this process
+_BANK_SINGLETON = {}
+_EXEMPLAR_SINGLETON = {}
+# Intra-op threads per model in a --workers pool (None = library default)
+_INTRA_OP_THREADS: Optional[int] = None
+
+# Plain os.path strings: pathlib (and the urllib.parse it drags in) is only
+# imported by the model/daemon code paths.
+CACHE_DIR = os.path.join(
+    os.path.expanduser("~"), ".cache", "opencode", "tier-detector-fast"
+)
+HF_CACHE_DIR = os.path.join(CACHE_DIR, "hf")
+ONNX_CACHE_DIR = os.path.join(HF_CACHE_DIR, "onnx")
+ONNX_MODEL_FILE = "model.int8.onnx"
+BACKENDS = ("torch", "onnx")
+RESULT_CACHE_DIR = os.path.join(CACHE_DIR, "results")
+RESULT_CACHE_MAX_ENTRIES = 4096
+RESULT_CACHE_VERSION = 1
+
+# Labelled prompts (the benchmark set) used as a kNN exemplar index by the
+# embedding stage; the stage is skipped when the file is absent or too small.
+EXEMPLARS_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "benchmarks",
+    "tier-detector-prompts.jsonl",
+)
+KNN_K = 7
+KNN_MIN_EXEMPLARS = 8
+# The kNN vote only replaces the label-prompt answer when the winning tier
+# leads the runner-up by this share of the vote and its nearest exemplar is at
+# least this similar; vote shares and label similarities are not comparable.
+KNN_MIN_VOTE_MARGIN = 0.3
+KNN_MIN_SIMILARITY = 0.6
+
+# Keep local classification output quiet/fast in command workflows.
+os.environ.setdefault("HF_HUB_DISABLE_PROGRESS_BARS", "1")
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+os.environ.setdefault("TRANSFORMERS_VERBOSITY", "error")
+
+
+DIRECT_COMMAND_PREFIXES = (
+    "git ",
+    "npm ",
+    "pnpm ",
+    "yarn ",
+    "docker ",
+    "pytest",
+    "python ",
+    "node ",
+    "go ",
+    "cargo ",
+    "make ",
+)
+
+DIRECT_COMMAND_PATTERNS = (
+    r"^(git\s+)?(pull|fetch|status|rebase|merge)\b",
+    r"^(pull|fetch)\b.*\b(main|master|origin/main|origin/master)\b",
+    r"^(check|show|list)\b",
+)
+
+READ_ONLY_PATTERNS = (
+    r"^(review|summari[sz]e|explain|compare|analy[sz]e|inspect|check)\b",
+    r"\b(review|summari[sz]e|explain|compare|analy[sz]e|inspect)\b",
+    r"\b(read-only|read only)\b",
+)
+
+
+# Near-field negation such as "do not deploy" or "avoid drop table".
+NEGATION_PATTERN = (
+    r"\b(do\s+not|don't|dont|not|avoid|without|never)(?:\W+\w+){0,3}\W+$"
+)
+
+# Ignore examples/snippets in quotes when matching risk triggers.
+QUOTED_SEGMENT_PATTERNS = (
+    r'"[^"\\]*(?:\\.[^"\\]*)*"',
+    r"'[^'\\]*(?:\\.[^'\\]*)*'",
+    r"`[^`\\]*(?:\\.[^`\\]*)*`",
+)
+
+_PATTERN_SINGLETON: Dict[tuple, "re.Pattern"] = {}
+
+
+def _compiled(*patterns: str) -> "re.Pattern":
+    """Compile once per process; several patterns become one alternation."""
+    compiled = _PATTERN_SINGLETON.get(patterns)
+    if compiled is None:
+        if len(patterns) == 1:
+            compiled = re.compile(patterns[0])
+        else:
+            compiled = re.compile("|".join(f"(?:{p})" for p in patterns))
+        _PATTERN_SINGLETON[patterns] = compiled
+    return compiled
+
+
+def normalize(text: str) -> str:
+    # str.split() collapses the same whitespace as r"\s+" without touching re.
+    return " ".join(text.lower().split())
+
+
+def strip_quoted_segments(text: str) -> str:
+    for pattern in QUOTED_SEGMENT_PATTERNS:
+        text = _compiled(pattern).sub(" ", text)
+    return normalize(text)
+
+
+def is_negated_occurrence(text: str, keyword: str, start: int) -> bool:
+    prefix = text[max(0, start - 48) : start]
+    return bool(_compiled(NEGATION_PATTERN).search(prefix))
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    # Alternation factored by shared prefixes: at every position the regex
+    # engine follows one branch per character instead of trying each keyword.
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [
+            re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch
+        ]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # Greedy optional tail so the longest keyword at a position wins.
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """Find every non-negated keyword of a fixed set in one pass over the text.
+
+    Matches are substring matches (no word boundaries), same as scanning each
+    keyword with ``re.finditer``. A zero-width lookahead reports the longest
+    keyword starting at each position; shorter keywords that are prefixes of
+    it are added from a precomputed table, so overlapping keywords are never
+    lost. Negation depends only on the match position and is checked once per
+    position.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords = frozenset(kw for kw in keywords if kw)
+        self._pattern = re.compile(f"(?=({_trie_pattern(self.keywords)}))")
+        self._prefixes = {
+            kw: [other for other in self.keywords if kw.startswith(other)]
+            for kw in self.keywords
+        }
+
+    def scan(self, text: str) -> set:
+        found: set = set()
+        if not self.keywords:
+            return found
+        for match in self._pattern.finditer(text):
+            if not is_negated_occurrence(text, match.group(1), match.start()):
+                found.update(self._prefixes[match.group(1)])
+        return found
+
+
+_MATCHER_SINGLETON: Dict[frozenset, KeywordMatcher] = {}
+
+
+def _matcher_for(*keyword_sets: Iterable[str]) -> KeywordMatcher:
+    # Compiled lazily and keyed by content, so edited keyword sets recompile.
+    key = frozenset().union(*keyword_sets)
+    matcher = _MATCHER_SINGLETON.get(key)
+    if matcher is None:
+        matcher = KeywordMatcher(key)
+        _MATCHER_SINGLETON[key] = matcher
+    return matcher
+
+
+def _rules_matcher() -> KeywordMatcher:
+    return _matcher_for(
+        T4_KEYWORDS, T4_FALSE_POSITIVES, T3_CRITICAL_KEYWORDS, T3_WEAK_KEYWORDS
+    )
+
+
+def keyword_match(text: str, keywords: set) -> bool:
+    return bool(_matcher_for(keywords).scan(text))
+
+
+def keyword_matches(text: str, keywords: set) -> List[str]:
+    return sorted(_matcher_for(keywords).scan(text))
+
+
+def direct_command_intent(text: str) -> bool:
+    words = text.split()
+    if not words or len(words) > 14:
+        return False
+
+    if any(text.startswith(prefix) for prefix in DIRECT_COMMAND_PREFIXES):
+        return True
+
+    return bool(_compiled(*DIRECT_COMMAND_PATTERNS).match(text))
+
+
+def read_only_intent(text: str) -> bool:
+    return bool(_compiled(*READ_ONLY_PATTERNS).search(text))
+
+
+def _controls_for_tier(tier: int) -> List[str]:
+    controls = ["verification_evidence", "anti_loop"]
+    if tier >= 3:
+        controls.append("decision_gate_if_ambiguous")
+    if tier == 4:
+        controls.append("destructive_confirmation")
+    return controls
+
+
+def _depth_for_result(result: Result, text: str) -> str:
+    if result.tier == 4:
+        return "deep"
+    if result.tier == 3:
+        if result.confidence < 0.7 or any(cue in text for cue in DEEP_CUES):
+            return "deep"
+        return "standard"
+    if result.tier == 2:
+        if direct_command_intent(text) or read_only_intent(text):
+            return "light"
+        return "standard"
+    return "light"
+
+
+def _t4_matches(text: str, found: Optional[set] = None) -> List[str]:
+    if found is None:
+        found = _rules_matcher().scan(text)
+    matches = sorted(found & T4_KEYWORDS)
+    false_positives = found & T4_FALSE_POSITIVES
+    if not false_positives:
+        return matches
+
+    filtered = []
+    for match in matches:
+        if match == "drop table" and (
+            "drop shadow" in false_positives
+            or "drop-down" in false_positives
+            or "dropdown" in false_positives
+        ):
+            continue
+        filtered.append(match)
+    return filtered
+
+
+def rules_only(text: str) -> Optional[Result]:
+    scan_text = strip_quoted_segments(text)
+    # One pass over the text finds every tier's keywords at once.
+    found = _rules_matcher().scan(scan_text)
+
+    t4_matches = _t4_matches(scan_text, found)
+    if t4_matches:
+        return Result(
+            tier=4,
+            confidence=0.95,
+            source="rules:t4",
+            use_llm=False,
+            triggers=t4_matches,
+            mandatory_controls=_controls_for_tier(4),
+        )
+
+    t3_critical = sorted(found & T3_CRITICAL_KEYWORDS)
+    if t3_critical:
+        return Result(
+            tier=3,
+            confidence=0.85,
+            source="rules:t3-critical",
+            use_llm=False,
+            triggers=t3_critical,
+            mandatory_controls=_controls_for_tier(3),
+        )
+
+    t3_weak = sorted(found & T3_WEAK_KEYWORDS)
+    if len(t3_weak) >= WEAK_T3_COMBO_THRESHOLD:
+        return Result(
+            tier=3,
+            confidence=0.78,
+            source="rules:t3-weak-combo",
+            use_llm=False,
+            triggers=t3_weak,
+            mandatory_controls=_controls_for_tier(3),
+        )
+
+    if direct_command_intent(text):
+        return Result(
+            tier=1,
+            confidence=0.99,
+            source="rules:direct-command",
+            use_llm=False,
+            mandatory_controls=_controls_for_tier(1),
+        )
+
+    if read_only_intent(text) and not t3_weak:
+        return Result(
+            tier=1,
+            confidence=0.92,
+            source="rules:read-only",
+            use_llm=False,
+            mandatory_controls=_controls_for_tier(1),
+        )
+
+    if t3_weak:
+        return Result(
+            tier=2,
+            confidence=0.66,
+            source="rules:t2-weak-signal",
+            use_llm=False,
+            triggers=t3_weak,
+            mandatory_controls=_controls_for_tier(2),
+        )
+
+    return None
+
+
+def common_heuristics(text: str) -> Optional[Result]:
+    words = text.split()
+
+    if len(words) <= 8 and direct_command_intent(text):
+        return Result(
+            tier=1,
+            confidence=0.95,
+            source="heuristic:short-command",
+            use_llm=False,
+        )
+
+    if any(m in text for m in T1_MARKERS):
+        return Result(tier=1, confidence=0.85, source="heuristic:t1", use_llm=False)
+
+    if any(m in text for m in T2_MARKERS):
+        return Result(tier=2, confidence=0.75, source="heuristic:t2", use_llm=False)
+
+    return None
+
+
+def _safe_model_name(model_name: str) -> str:
+    return _compiled(r"[^a-zA-Z0-9_.-]+").sub("_", model_name)
+
+
+# A vector bank is a directory holding a float32 (rows, dim) ``vectors.npy``,
+# a parallel int8 ``tiers.npy`` and a ``meta.json`` header. Both arrays are
+# memory-mapped on load, so thousands of reference vectors cost no parsing.
+VECTOR_BANK_VERSION = 2
+VECTOR_BANK_EMBED_CHUNK = 64
+
+
+def _bank_path(
+    model_name: str, kind: str, entries: List[Tuple[int, str]], backend: str
+) -> Path:
+    import hashlib
+    from pathlib import Path
+
+    joined = "\n".join(f"{tier}\t{text}" for tier, text in entries)
+    digest = hashlib.sha256(joined.encode("utf-8")).hexdigest()[:16]
+    # int8 ONNX vectors differ slightly from fp32 ones; keep them apart.
+    suffix = "" if backend == "torch" else f"-{backend}"
+    name = f"{_safe_model_name(model_name)}-{kind}-{digest}{suffix}"
+    return Path(CACHE_DIR) / "banks" / f"{name}.v{VECTOR_BANK_VERSION}"
+
+
+def _publish_dir(staging: Path, target: Path) -> None:
+    """Point ``target`` at the fully written ``staging`` directory atomically.
+
+    ``target`` is a symlink to a hidden, uniquely named sibling directory.
+    Replacing the link is a single rename, so readers (and a crash at any
+    point) see either the complete old directory or the complete new one.
+    Publishers take turns on a lock file, and each one then deletes every
+    version the link no longer points at, including ones left by a publisher
+    that crashed.
+    """
+    import fcntl
+    import shutil
+    import uuid
+
+    with open(target.with_name(f".{target.name}.lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        version = target.with_name(f".{target.name}.{uuid.uuid4().hex[:12]}")
+        os.replace(staging, version)
+        link = target.with_name(f".{target.name}.{os.getpid()}.link")
+        with contextlib.suppress(FileNotFoundError):
+            link.unlink()
+        os.symlink(version.name, link)
+        if target.exists() and not target.is_symlink():
+            # A real directory left by the earlier layout; a rename cannot
+            # replace it, so move it aside first (the only non-atomic step,
+            # done once).
+            os.replace(target, target.with_name(f".{target.name}.{os.getpid()}.old"))
+        os.replace(link, target)
+
+        stale = re.compile(rf"\.{re.escape(target.name)}\.([0-9a-f]{{12}}|\d+\.old)")
+        for sibling in target.parent.iterdir():
+            if sibling.name != version.name and stale.fullmatch(sibling.name):
+                shutil.rmtree(sibling, ignore_errors=True)
+
+
+def _save_vector_bank(path: Path, vectors, tiers: List[int]) -> None:
+    import shutil
+    import tempfile
+    from pathlib import Path
+
+    import numpy as np
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(dir=path.parent, prefix=".bank-"))
+    try:
+        matrix = np.ascontiguousarray(vectors, dtype=np.float32)
+        np.save(staging / "vectors.npy", matrix)
+        np.save(staging / "tiers.npy", np.asarray(tiers, dtype=np.int8))
+        meta = {
+            "version": VECTOR_BANK_VERSION,
+            "count": int(matrix.shape[0]),
+            "dim": int(matrix.shape[1]),
+        }
+        (staging / "meta.json").write_text(json.dumps(meta))
+        _publish_dir(staging, path)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def _load_vector_bank(path: Path):
+    """Return memory-mapped ``(vectors, tiers)`` or None if missing/stale."""
+    import numpy as np
+
+    try:
+        meta = json.loads((path / "meta.json").read_text())
+        if meta.get("version") != VECTOR_BANK_VERSION:
+            return None
+        vectors = np.load(path / "vectors.npy", mmap_mode="r")
+        tiers = np.load(path / "tiers.npy", mmap_mode="r")
+    except Exception:
+        return None
+    if (
+        vectors.ndim != 2
+        or vectors.dtype != np.float32
+        or vectors.shape != (meta.get("count"), meta.get("dim"))
+        or len(tiers) != len(vectors)
+        or not len(vectors)
+    ):
+        return None
+    return vectors, tiers
+
+
+def _vector_bank(
+    model_name: str,
+    kind: str,
+    entries: List[Tuple[int, str]],
+    embed,
+    backend: str,
+):
+    """Load (or embed once and persist) the bank for ``(tier, text)`` entries."""
+    path = _bank_path(model_name, kind, entries, backend)
+    bank = _BANK_SINGLETON.get(path)
+    if bank is None:
+        bank = _load_vector_bank(path)
+    if bank is None:
+        import numpy as np
+
+        texts = [text for _, text in entries]
+        vectors = np.concatenate(
+            [
+                embed(texts[i : i + VECTOR_BANK_EMBED_CHUNK])
+                for i in range(0, len(texts), VECTOR_BANK_EMBED_CHUNK)
+            ]
+        )
+        tiers = [tier for tier, _ in entries]
+        try:
+            _save_vector_bank(path, vectors, tiers)
+        except OSError:
+            pass
+        bank = _load_vector_bank(path) or (vectors, np.asarray(tiers, dtype=np.int8))
+    _BANK_SINGLETON[path] = bank
+    return bank
+
+
+def _get_tokenizer(model_name: str):
+    tok = _TOKENIZER_SINGLETON.get(model_name)
+    if tok is None:
+        os.environ.setdefault("HF_HOME", str(HF_CACHE_DIR))
+        os.environ.setdefault("TRANSFORMERS_CACHE", str(HF_CACHE_DIR))
+        from transformers import AutoTokenizer
+
+        tok = AutoTokenizer.from_pretrained(model_name)
+        _TOKENIZER_SINGLETON[model_name] = tok
+    return tok
+
+
+def _get_model(model_name: str):
+    model = _MODEL_SINGLETON.get(model_name)
+    if model is None:
+        os.environ.setdefault("HF_HOME", str(HF_CACHE_DIR))
+        os.environ.setdefault("TRANSFORMERS_CACHE", str(HF_CACHE_DIR))
+        from transformers import AutoModel
+
+        model = AutoModel.from_pretrained(model_name)
+        model.eval()
+        _MODEL_SINGLETON[model_name] = model
+    return model
+
+
+def _torch_embedder(model_name: str):
+    try:
+        import torch
+    except Exception:
+        return None
+
+    if _INTRA_OP_THREADS is not None:
+        torch.set_num_threads(_INTRA_OP_THREADS)
+    tokenizer = _get_tokenizer(model_name)
+    model = _get_model(model_name)
+
+    def embed(texts: List[str]):
+        inputs = tokenizer(texts, padding=True, truncation=True, return_tensors="pt")
+        with torch.no_grad():
+            output = model(**inputs)
+            last_hidden = output.last_hidden_state
+            mask = inputs["attention_mask"].unsqueeze(-1)
+            pooled = (last_hidden * mask).sum(dim=1) / mask.sum(dim=1)
+            pooled = torch.nn.functional.normalize(pooled, p=2, dim=1)
+        return pooled.numpy()
+
+    return embed
+
+
+def _onnx_model_dir(model_name: str) -> Path:
+    from pathlib import Path
+
+    return Path(ONNX_CACHE_DIR) / _safe_model_name(model_name)
+
+
+def _export_onnx(model_name: str, model_dir: Path) -> None:
+    """Export the HF model once as an int8-quantized ONNX graph + tokenizer.json.
+
+    This is the only step of the ONNX backend that needs torch.
+    """
+    import shutil
+    import tempfile
+    from pathlib import Path
+
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    tokenizer = _get_tokenizer(model_name)
+    model = _get_model(model_name)
+    sample = dict(tokenizer(["warm up"], return_tensors="pt"))
+    input_names = list(sample.keys())
+    axes = {0: "batch", 1: "sequence"}
+
+    model_dir.parent.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(dir=model_dir.parent, prefix=".export-"))
+    try:
+        fp32_path = staging / "model.fp32.onnx"
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                (sample,),
+                str(fp32_path),
+                input_names=input_names,
+                output_names=["last_hidden_state"],
+                dynamic_axes={
+                    **{name: axes for name in input_names},
+                    "last_hidden_state": axes,
+                },
+                opset_version=17,
+            )
+        quantize_dynamic(
+            str(fp32_path), str(staging / ONNX_MODEL_FILE), weight_type=QuantType.QInt8
+        )
+        fp32_path.unlink()
+        tokenizer.save_pretrained(str(staging))
+        _publish_dir(staging, model_dir)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def _get_onnx_session(model_name: str):
+    state = _ONNX_SINGLETON.get(model_name)
+    if state is None:
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        model_dir = _onnx_model_dir(model_name)
+        if not (model_dir / ONNX_MODEL_FILE).exists():
+            _export_onnx(model_name, model_dir)
+        options = onnxruntime.SessionOptions()
+        if _INTRA_OP_THREADS is not None:
+            options.intra_op_num_threads = _INTRA_OP_THREADS
+        session = onnxruntime.InferenceSession(
+            str(model_dir / ONNX_MODEL_FILE),
+            sess_options=options,
+            providers=["CPUExecutionProvider"],
+        )
+        tokenizer = Tokenizer.from_file(str(model_dir / "tokenizer.json"))
+        if tokenizer.padding is None:
+            tokenizer.enable_padding()
+        if tokenizer.truncation is None:
+            tokenizer.enable_truncation(max_length=512)
+        input_names = {item.name for item in session.get_inputs()}
+        state = (session, tokenizer, input_names)
+        _ONNX_SINGLETON[model_name] = state
+    return state
+
+
+_ONNX_MODULES = ("onnxruntime", "tokenizers")
+
+
+def _onnx_embedder(model_name: str):
+    try:
+        import numpy as np
+        import onnxruntime  # noqa: F401
+        import tokenizers  # noqa: F401
+    except Exception:
+        return None
+
+    session, tokenizer, input_names = _get_onnx_session(model_name)
+
+    def embed(texts: List[str]):
+        encodings = tokenizer.encode_batch(texts)
+        mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": mask,
+        }
+        if "token_type_ids" in input_names:
+            feeds["token_type_ids"] = np.array(
+                [e.type_ids for e in encodings], dtype=np.int64
+            )
+        (last_hidden,) = session.run(["last_hidden_state"], feeds)
+        weights = mask[..., None].astype(np.float32)
+        pooled = (last_hidden * weights).sum(axis=1) / weights.sum(axis=1)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return (pooled / np.maximum(norms, 1e-12)).astype(np.float32)
+
+    return embed
+
+
+def _effective_backend(model_name: str, backend: str) -> str:
+    """The backend embeddings will really use for ``model_name``.
+
+    ``onnx`` falls back to ``torch`` when onnxruntime/tokenizers are missing
+    or the model has not been exported and exporting it fails; a failed
+    export is not retried in the same process.
+    """
+    if backend != "onnx":
+        return backend
+    if model_name not in _ONNX_UNAVAILABLE:
+        try:
+            if _onnx_embedder(model_name) is not None:
+                return "onnx"
+        except Exception:
+            pass
+        _ONNX_UNAVAILABLE.add(model_name)
+    return "torch"
+
+
+def _cache_backend(model_name: str, backend: str) -> str:
+    """Best guess at ``_effective_backend`` that loads nothing, for cache keys.
+
+    Missing onnxruntime/tokenizers and fallbacks already seen in this process
+    map ``onnx`` to ``torch``; a first failing export is only known after the
+    run, so ``classify`` asks again before storing its result.
+    """
+    if backend != "onnx":
+        return backend
+    if model_name in _ONNX_UNAVAILABLE or not _onnx_installed():
+        return "torch"
+    return "onnx"
+
+
+def _onnx_installed() -> bool:
+    import importlib.util
+
+    return all(importlib.util.find_spec(name) is not None for name in _ONNX_MODULES)
+
+
+def _get_embedder(model_name: str, backend: str):
+    """Return ``embed(texts) -> float32 ndarray`` (L2-normalized rows), or None."""
+    if backend == "onnx":
+        return _onnx_embedder(model_name)
+    return _torch_embedder(model_name)
+
+
+def _load_exemplars(path: str) -> List[Tuple[int, str]]:
+    """Read labelled ``{"task", "expected_tier"}`` lines from the benchmark JSONL."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return []
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    exemplars = _EXEMPLAR_SINGLETON.get(key)
+    if exemplars is None:
+        exemplars = []
+        with open(path, encoding="utf-8") as fh:
+            for line in fh:
+                if not line.strip():
+                    continue
+                try:
+                    item = json.loads(line)
+                    tier = int(item["expected_tier"])
+                    task = normalize(str(item["task"]))
+                except (ValueError, KeyError, TypeError):
+                    continue
+                if tier in LABEL_PROMPTS and task:
+                    exemplars.append((tier, task))
+        _EXEMPLAR_SINGLETON[key] = exemplars
+    return exemplars
+
+
+def _knn_results(task_vecs, bank_vecs, bank_tiers, k: int) -> List[Optional[Result]]:
+    """Similarity-weighted top-k vote against the exemplar bank, all rows at once.
+
+    A row is None when the vote is too close or the neighbours too far away
+    (see ``KNN_MIN_VOTE_MARGIN`` and ``KNN_MIN_SIMILARITY``).
+    """
+    import numpy as np
+
+    k = min(k, len(bank_tiers))
+    sims = task_vecs @ bank_vecs.T
+    top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+    top_sims = np.take_along_axis(sims, top, axis=1)
+    top_tiers = np.asarray(bank_tiers)[top]
+    weights = np.clip(top_sims, 0.0, None)
+
+    results = []
+    for row_tiers, row_sims, row_weights in zip(top_tiers, top_sims, weights):
+        votes: Dict[int, float] = {}
+        for tier, weight in zip(row_tiers.tolist(), row_weights.tolist()):
+            votes[tier] = votes.get(tier, 0.0) + weight
+        ranked = sorted(votes.values(), reverse=True) + [0.0]
+        tier = max(votes, key=votes.get)
+        total = sum(votes.values())
+        share = votes[tier] / total if total > 0 else 0.0
+        margin = (ranked[0] - ranked[1]) / total if total > 0 else 0.0
+        if (
+            margin < KNN_MIN_VOTE_MARGIN
+            or float(row_sims[row_tiers == tier].max()) < KNN_MIN_SIMILARITY
+        ):
+            results.append(None)
+            continue
+        mean_sim = float(row_sims[row_tiers == tier].mean())
+        # Agreement among neighbours, discounted when they are far away.
+        confidence = max(0.0, min(0.99, (share + mean_sim) / 2.0))
+        results.append(
+            Result(tier=tier, confidence=confidence, source="embed:knn", use_llm=False)
+        )
+    return results
+
+
+def embed_similarity_many(
+    model_name: str, texts: List[str], backend: str = "torch"
+) -> List[Optional[Result]]:
+    # Vector banks are keyed by the backend that really produced them.
+    backend = _effective_backend(model_name, backend)
+    embed = _get_embedder(model_name, backend)
+    if embed is None:
+        return [None] * len(texts)
+
+    labels = [(tier, LABEL_PROMPTS[tier]) for tier in sorted(LABEL_PROMPTS.keys())]
+    label_vecs, label_tiers = _vector_bank(model_name, "labels", labels, embed, backend)
+    tiers = label_tiers.tolist()
+
+    # One padded forward pass for the whole batch; rows score independently.
+    task_vecs = embed(texts)
+    all_scores = (task_vecs @ label_vecs.T).tolist()
+    results = [_score_labels(scores, tiers) for scores in all_scores]
+
+    exemplars = _load_exemplars(EXEMPLARS_PATH) if EXEMPLARS_PATH else []
+    if len(exemplars) >= KNN_MIN_EXEMPLARS:
+        bank_vecs, bank_tiers = _vector_bank(
+            model_name, "exemplars", exemplars, embed, backend
+        )
+        knn = _knn_results(task_vecs, bank_vecs, bank_tiers, KNN_K)
+        # Same forward pass, two readings: a clear vote among close neighbours
+        # beats the label prompts, anything else leaves their answer.
+        results = [vote or label for vote, label in zip(knn, results)]
+    return results
+
+
+def _score_labels(scores: List[float], tiers: List[int]) -> Result:
+    # Several prompts may describe one tier; each tier keeps its best match.
+    best: Dict[int, float] = {}
+    for tier, score in zip(tiers, scores):
+        if tier not in best or score > best[tier]:
+            best[tier] = score
+    scored = sorted(best.items(), key=lambda x: x[1], reverse=True)
+    top_tier, top_score = scored[0]
+    second_score = scored[1][1]
+    margin = top_score - second_score
+
+    # Heuristic confidence: stronger when both score and margin are high.
+    confidence = max(0.0, min(0.99, (top_score + margin) / 2.0))
+
+    return Result(tier=top_tier, confidence=confidence, source="embed", use_llm=False)
+
+
+def embed_similarity(
+    model_name: str, text: str, backend: str = "torch"
+) -> Optional[Result]:
+    return embed_similarity_many(model_name, [text], backend)[0]
+
+
+def _error_result() -> Result:
+    # Never block command execution on detector failure.
+    return Result(tier=2, confidence=0.05, source="error-fallback", use_llm=False)
+
+
+def _missing_deps_result() -> Result:
+    return Result(tier=3, confidence=0.1, source="missing-deps", use_llm=False)
+
+
+# Declared stage costs (ms). Embedding is priced by whether this process has
+# already loaded the model; observed costs replace these once measured. A
+# saved estimate decays back toward the declared cost as it ages, so a stage
+# held back by one pathological measurement is tried (and re-measured) again.
+RULES_COST_MS = 1.0
+EMBED_COST_MS = {
+    "torch": {"cold": 1200.0, "warm": 25.0},
+    "onnx": {"cold": 300.0, "warm": 10.0},
+}
+STAGE_COST_PATH = os.path.join(CACHE_DIR, "stage-costs.json")
+STAGE_COST_HALF_LIFE_S = 1800.0
+# Only tasks up to this many words are held to the latency budget before
+# embedding; longer ones are worth the wait.
+LATENCY_FALLBACK_MAX_WORDS = 12
+_STAGE_COST_SINGLETON: Dict[str, Dict[str, Tuple[float, float]]] = {}
+
+
+class Stage:
+    """One detector stage: ``run(task)`` returns a Result, or None to abstain.
+
+    ``cost_ms`` is the expected cost, checked against the latency budget
+    before the stage starts (only for tasks of at most ``budget_max_words``
+    words, if set); ``phase`` names its ``--self-profile`` bucket. Measured
+    costs are recorded under ``cost_key``.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        run,
+        cost_ms: float,
+        phase: str = "rules",
+        cost_key: Optional[str] = None,
+        budget_max_words: Optional[int] = None,
+    ):
+        self.name = name
+        self.run = run
+        self.cost_ms = cost_ms
+        self.phase = phase
+        self.cost_key = cost_key
+        self.budget_max_words = budget_max_words
+
+    def budgeted(self, task: str) -> bool:
+        """Whether the latency budget may keep this stage from running."""
+        return self.budget_max_words is None or (
+            len(task.split()) <= self.budget_max_words
+        )
+
+
+def _stage_costs() -> Dict[str, Tuple[float, float]]:
+    """Saved ``key -> (estimate ms, unix time of the last measurement)``."""
+    costs = _STAGE_COST_SINGLETON.get(STAGE_COST_PATH)
+    if costs is None:
+        costs = {}
+        try:
+            with open(STAGE_COST_PATH, encoding="utf-8") as fh:
+                for key, value in json.load(fh).items():
+                    # Bare numbers from older versions carry no age; skip them.
+                    with contextlib.suppress(ValueError, TypeError):
+                        estimate, observed_at = value
+                        costs[key] = (float(estimate), float(observed_at))
+        except (OSError, ValueError, AttributeError, TypeError):
+            costs = {}
+        _STAGE_COST_SINGLETON[STAGE_COST_PATH] = costs
+    return costs
+
+
+def _stage_cost(key: str, declared_ms: float) -> float:
+    """Expected cost of a stage: its saved estimate, decayed toward the declared
+    cost by one half every ``STAGE_COST_HALF_LIFE_S`` since it was measured."""
+    saved = _stage_costs().get(key)
+    if saved is None:
+        return declared_ms
+    estimate, observed_at = saved
+    age = max(time.time() - observed_at, 0.0)
+    return declared_ms + (estimate - declared_ms) * 0.5 ** (
+        age / STAGE_COST_HALF_LIFE_S
+    )
+
+
+def _observe_stage_cost(key: str, elapsed_ms: float, expected_ms: float) -> None:
+    """Fold a measured cost into the persisted estimate (EWMA).
+
+    ``expected_ms`` is the stage's current expected cost (see _stage_cost);
+    the first measurement of a key replaces it outright.
+    """
+    costs = _stage_costs()
+    previous = expected_ms if key in costs else elapsed_ms
+    costs[key] = (0.7 * previous + 0.3 * elapsed_ms, time.time())
+    tmp = f"{STAGE_COST_PATH}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(STAGE_COST_PATH), exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(costs, fh)
+        os.replace(tmp, STAGE_COST_PATH)
+    except OSError:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp)
+
+
+def _first_load(model_name: str, backend: str) -> bool:
+    """Whether loading the model would first download (or export) it."""
+    if os.path.isdir(model_name):
+        return False
+    if backend == "onnx":
+        return not (_onnx_model_dir(model_name) / ONNX_MODEL_FILE).exists()
+    folder = "models--" + model_name.replace("/", "--")
+    roots = {
+        HF_CACHE_DIR,
+        os.environ.get("HF_HOME", HF_CACHE_DIR),
+        os.environ.get("TRANSFORMERS_CACHE", HF_CACHE_DIR),
+    }
+    return not any(
+        os.path.isdir(os.path.join(root, sub, folder))
+        for root in roots
+        for sub in ("", "hub")
+    )
+
+
+def _embed_stage(model_name: str, backend: str) -> Stage:
+    loaded = _ONNX_SINGLETON if backend == "onnx" else _MODEL_SINGLETON
+    state = "warm" if model_name in loaded else "cold"
+    key = f"embed:{backend}:{state}"
+    declared = EMBED_COST_MS.get(backend, EMBED_COST_MS["torch"])[state]
+    # A load that downloads or exports the model says nothing about the next
+    # one, so it is not recorded.
+    if state == "cold" and _first_load(model_name, backend):
+        key = None
+
+    def run(task: str) -> Result:
+        with (
+            contextlib.redirect_stdout(io.StringIO()),
+            contextlib.redirect_stderr(io.StringIO()),
+        ):
+            result = embed_similarity(model_name, task, backend)
+        return result if result is not None else _missing_deps_result()
+
+    return Stage(
+        "embed_similarity",
+        run,
+        _stage_cost(f"embed:{backend}:{state}", declared),
+        phase="embed",
+        cost_key=key,
+        budget_max_words=LATENCY_FALLBACK_MAX_WORDS,
+    )
+
+
+def _rules_only_default(task: str) -> Result:
+    return Result(tier=3, confidence=0.1, source="rules-only", use_llm=False)
+
+
+def build_pipeline(
+    model_name: str, rules_only_mode: bool = False, backend: str = "torch"
+) -> List[Stage]:
+    """Stages in escalation order, cheapest first."""
+    stages = [
+        Stage("rules_only", rules_only, RULES_COST_MS),
+        Stage("common_heuristics", common_heuristics, RULES_COST_MS),
+    ]
+    if rules_only_mode:
+        stages.append(Stage("rules_only_default", _rules_only_default, 0.0))
+    else:
+        stages.append(_embed_stage(model_name, backend))
+    return stages
+
+
+def run_pipeline(
+    task: str,
+    stages: List[Stage],
+    min_confidence: float = 0.0,
+    budget_ms: Optional[float] = None,
+    profile: Optional[Dict[str, float]] = None,
+    trace: Optional[List[Tuple[str, float, Optional[Result]]]] = None,
+) -> Tuple[Optional[Result], bool]:
+    """Run ``stages`` until one answers with at least ``min_confidence``.
+
+    A less confident answer escalates to the next stage but is kept as the
+    fallback. A budgeted stage (see ``Stage.budgeted``) whose expected cost
+    would overrun ``budget_ms`` is not started; the pipeline then returns its
+    best answer so far (or a latency-fallback result) and ``True`` to mark the
+    outcome as degraded. ``trace`` collects ``(stage name, ms, result)`` for
+    every stage that ran, so callers can tell which one produced the answer.
+    """
+    started = time.perf_counter()
+    best: Optional[Result] = None
+    for stage in stages:
+        stage_started = time.perf_counter()
+        elapsed_ms = (stage_started - started) * 1000
+        if (
+            budget_ms is not None
+            and elapsed_ms + stage.cost_ms > budget_ms
+            and stage.budgeted(task)
+        ):
+            if best is None:
+                best = Result(
+                    tier=2, confidence=0.4, source="latency-fallback", use_llm=False
+                )
+            return best, True
+        result = stage.run(task)
+        stage_ms = (time.perf_counter() - stage_started) * 1000
+        if profile is not None:
+            phase = f"{stage.phase}_ms"
+            profile[phase] = profile.get(phase, 0.0) + stage_ms
+        if trace is not None:
+            trace.append((stage.name, stage_ms, result))
+        if result is None:
+            continue
+        if stage.cost_key is not None and result.source != "missing-deps":
+            _observe_stage_cost(stage.cost_key, stage_ms, stage.cost_ms)
+        # Later stages replace an escalated answer unless they only report
+        # that they could not run.
+        if best is None or result.source != "missing-deps":
+            best = result
+        if best.confidence >= min_confidence:
+            break
+    return best, False
+
+
+def _rules_stage(
+    task: str, rules_only_mode: bool, min_confidence: float = 0.0
+) -> Optional[Result]:
+    """Everything short of the embedding pass; None means "needs embed"."""
+    if not task:
+        return Result(tier=3, confidence=0.0, source="empty", use_llm=False)
+    stages = build_pipeline("", rules_only_mode)
+    if not rules_only_mode:
+        stages = stages[:-1]
+    result, _ = run_pipeline(task, stages, min_confidence)
+    if result is not None and result.confidence < min_confidence:
+        return result if rules_only_mode else None
+    return result
+
+
+def _finalize(result: Result, task: str) -> Result:
+    if not result.mandatory_controls:
+        result.mandatory_controls = _controls_for_tier(result.tier)
+    result.depth = _depth_for_result(result, task)
+    return result
+
+
+# Results that depend on the environment rather than the task never persist.
+_UNCACHEABLE_SOURCES = {"error-fallback", "latency-fallback", "missing-deps"}
+# Keyed by the files behind the rules (see _rule_files_state), so the tables
+# are only re-hashed when one of them changes; clear it after changing the
+# rule tables at runtime.
+_RULES_FINGERPRINT_SINGLETON: Dict[tuple, str] = {}
+
+
+def _rule_files_state() -> tuple:
+    """Path, mtime and size of this script and of the exemplar file."""
+    state = [EXEMPLARS_PATH]
+    for path in (__file__, EXEMPLARS_PATH):
+        try:
+            stat = os.stat(path)
+        except (OSError, TypeError, ValueError):
+            state.append(None)
+        else:
+            state.append((stat.st_mtime_ns, stat.st_size))
+    return tuple(state)
+
+
+def _rules_fingerprint() -> str:
+    files = _rule_files_state()
+    fingerprint = _RULES_FINGERPRINT_SINGLETON.get(files)
+    if fingerprint is None:
+        fingerprint = _compute_rules_fingerprint(files)
+        _RULES_FINGERPRINT_SINGLETON.clear()
+        _RULES_FINGERPRINT_SINGLETON[files] = fingerprint
+    return fingerprint
+
+
+def _compute_rules_fingerprint(files: tuple) -> str:
+    tables = {
+        "version": RESULT_CACHE_VERSION,
+        "t4": sorted(T4_KEYWORDS),
+        "t4_false_positives": sorted(T4_FALSE_POSITIVES),
+        "t3_critical": sorted(T3_CRITICAL_KEYWORDS),
+        "t3_weak": sorted(T3_WEAK_KEYWORDS),
+        "t3_combo": WEAK_T3_COMBO_THRESHOLD,
+        "t1_markers": list(T1_MARKERS),
+        "t2_markers": list(T2_MARKERS),
+        "deep_cues": sorted(DEEP_CUES),
+        "labels": {str(k): v for k, v in LABEL_PROMPTS.items()},
+        "direct_prefixes": list(DIRECT_COMMAND_PREFIXES),
+        "direct_patterns": list(DIRECT_COMMAND_PATTERNS),
+        "read_only_patterns": list(READ_ONLY_PATTERNS),
+    }
+    # Rule logic lives in this file too; its mtime/size catch code edits,
+    # and the exemplar file's catch relabelled kNN examples.
+    tables["files"] = files
+    tables["knn"] = [KNN_K, KNN_MIN_EXEMPLARS, KNN_MIN_VOTE_MARGIN, KNN_MIN_SIMILARITY]
+    return _checksum(json.dumps(tables, sort_keys=True))
+
+
+def _checksum(text: str) -> str:
+    # 64-bit zlib checksum instead of hashlib: loading OpenSSL alone costs
+    # about a tenth of the cold-start budget. Entries store their full key
+    # and are verified on read, so a collision can only cause a miss.
+    import zlib
+
+    data = text.encode("utf-8")
+    return f"{zlib.crc32(data):08x}{zlib.adler32(data):08x}"
+
+
+def _result_cache_entry(
+    task: str,
+    model_name: str,
+    rules_only_mode: bool,
+    backend: str = "torch",
+    min_confidence: float = 0.0,
+) -> Tuple[str, str]:
+    """Return ``(path, key)`` for a normalized task's cache entry."""
+    mode = "rules" if rules_only_mode else f"embed:{backend}"
+    if min_confidence:
+        mode += f":min{min_confidence:g}"
+    key = "\0".join([_rules_fingerprint(), model_name, mode, task])
+    return os.path.join(RESULT_CACHE_DIR, f"{_checksum(key)}.json"), key
+
+
+def _load_cached_result(path: str, key: str) -> Optional[Result]:
+    try:
+        with open(path, encoding="utf-8") as fh:
+            entry = json.load(fh)
+        if entry.get("key") != key:
+            return None
+        result = Result(**entry["result"])
+    except Exception:
+        return None
+    # Bump mtime so eviction drops least recently *used* entries first.
+    with contextlib.suppress(OSError):
+        os.utime(path)
+    return result
+
+
+def _store_cached_result(path: str, key: str, result: Result) -> None:
+    if result.source in _UNCACHEABLE_SOURCES:
+        return
+    cache_dir = os.path.dirname(path)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump({"key": key, "result": result.__dict__}, fh)
+        # Readers see either the old entry or the complete new one.
+        os.replace(tmp, path)
+        _evict_result_cache(cache_dir)
+    except OSError:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp)
+
+
+def _evict_result_cache(cache_dir: str) -> None:
+    with os.scandir(cache_dir) as it:
+        entries = [e for e in it if e.name.endswith(".json")]
+    excess = len(entries) - RESULT_CACHE_MAX_ENTRIES
+    if excess <= 0:
+        return
+    # Trim to 90% so eviction (a full stat pass) runs rarely, not per write.
+    excess += RESULT_CACHE_MAX_ENTRIES // 10
+    entries.sort(key=lambda e: e.stat().st_mtime_ns)
+    for entry in entries[:excess]:
+        with contextlib.suppress(OSError):
+            os.unlink(entry.path)
+
+
+def classify(
+    task: str,
+    model_name: str,
+    rules_only_mode: bool = False,
+    max_latency_ms: int = 1500,
+    use_cache: bool = True,
+    backend: str = "torch",
+    profile: Optional[Dict[str, float]] = None,
+    min_confidence: float = 0.0,
+) -> Result:
+    """Classify one task; ``profile`` (if given) receives per-phase timings.
+
+    Stages escalate while their answer is below ``min_confidence``; a stage
+    is only started if its expected cost fits what is left of
+    ``max_latency_ms`` (0 disables the budget).
+    """
+    if profile is None:
+        profile = {}
+    started = phase_started = time.perf_counter()
+
+    def lap(phase: str) -> None:
+        nonlocal phase_started
+        now = time.perf_counter()
+        profile[phase] = profile.get(phase, 0.0) + (now - phase_started) * 1000
+        phase_started = now
+
+    task = normalize(task)
+    cache_entry = None
+    if use_cache and task:
+        try:
+            cache_entry = _result_cache_entry(
+                task,
+                model_name,
+                rules_only_mode,
+                _cache_backend(model_name, backend),
+                min_confidence,
+            )
+        except OSError:
+            cache_entry = None
+        cached = _load_cached_result(*cache_entry) if cache_entry else None
+        lap("cache_ms")
+        if cached is not None:
+            return cached
+
+    degraded = False
+    try:
+        if not task:
+            result = _rules_stage(task, rules_only_mode)
+        else:
+            budget = max_latency_ms - (time.perf_counter() - started) * 1000
+            result, degraded = run_pipeline(
+                task,
+                build_pipeline(model_name, rules_only_mode, backend),
+                min_confidence,
+                budget if max_latency_ms > 0 else None,
+                profile,
+            )
+        phase_started = time.perf_counter()
+    except Exception:
+        result = _error_result()
+
+    result = _finalize(result, task)
+    lap("rules_ms")
+    # A budget-degraded answer says nothing about the task; never persist it.
+    if cache_entry is not None and not degraded:
+        if not rules_only_mode and _cache_backend(model_name, backend) != backend:
+            # Stored under the backend that actually answered.
+            cache_entry = _result_cache_entry(
+                task, model_name, rules_only_mode, "torch", min_confidence
+            )
+        _store_cached_result(*cache_entry, result)
+        lap("cache_ms")
+    return result
+
+
+def _safe_rules_stage(
+    task: str, rules_only_mode: bool, min_confidence: float = 0.0
+) -> Optional[Result]:
+    try:
+        return _rules_stage(task, rules_only_mode, min_confidence)
+    except Exception:
+        return _error_result()
+
+
+def _embed_pending(
+    tasks: List[str],
+    results: List[Optional[Result]],
+    model_name: str,
+    batch_size: int,
+    backend: str = "torch",
+) -> None:
+    """Fill the ``None`` slots of ``results`` using padded embedding batches."""
+    pending = [index for index, result in enumerate(results) if result is None]
+    for offset in range(0, len(pending), batch_size):
+        chunk = pending[offset : offset + batch_size]
+        try:
+            with (
+                contextlib.redirect_stdout(io.StringIO()),
+                contextlib.redirect_stderr(io.StringIO()),
+            ):
+                embedded = embed_similarity_many(
+                    model_name, [tasks[i] for i in chunk], backend
+                )
+        except Exception:
+            embedded = [_error_result() for _ in chunk]
+        for index, result in zip(chunk, embedded):
+            results[index] = result if result is not None else _missing_deps_result()
+
+
+def _read_batch_records(stream: Iterable[str]) -> Iterator[Dict[str, object]]:
+    # Accept {"task": ..., "id": ...} objects or bare JSON strings per line.
+    for line_no, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError as exc:
+            yield {"line": line_no, "error": f"invalid JSON: {exc}"}
+            continue
+        if isinstance(item, str):
+            item = {"task": item}
+        if not isinstance(item, dict) or not isinstance(item.get("task"), str):
+            yield {"line": line_no, "error": "expected a string or {'task': ...}"}
+            continue
+        yield item
+
+
+def iter_batch_payloads(
+    records: Iterable[Dict[str, object]],
+    model_name: str,
+    rules_only_mode: bool = False,
+    schema_version: int = 1,
+    batch_size: int = 32,
+    backend: str = "torch",
+    min_confidence: float = 0.0,
+) -> Iterator[Dict[str, object]]:
+    """Stream one payload per record, in input order.
+
+    Records are buffered only until ``batch_size`` of them need the
+    embedding pass, so output keeps flowing for rule-heavy inputs.
+    """
+    records_window: List[Dict[str, object]] = []
+    tasks: List[str] = []
+    results: List[Optional[Result]] = []
+    needs_embed = 0
+
+    def flush() -> Iterator[Dict[str, object]]:
+        _embed_pending(tasks, results, model_name, batch_size, backend)
+        outcomes = iter(zip(results, tasks))
+        for record in records_window:
+            if "error" in record:
+                yield record
+                continue
+            result, task = next(outcomes)
+            payload = build_payload(_finalize(result, task), schema_version)
+            if "id" in record:
+                payload = {"id": record["id"], **payload}
+            yield payload
+
+    for record in records:
+        records_window.append(record)
+        if "error" not in record:
+            task = normalize(str(record["task"]))
+            tasks.append(task)
+            result = _safe_rules_stage(task, rules_only_mode, min_confidence)
+            results.append(result)
+            needs_embed += result is None
+        # Emit as soon as nothing is waiting on the model; otherwise hold the
+        # window until a full batch is ready (bounded so memory stays flat).
+        if (
+            needs_embed == 0
+            or needs_embed >= batch_size
+            or len(records_window) >= batch_size * 16
+        ):
+            yield from flush()
+            records_window, tasks, results, needs_embed = [], [], [], 0
+    if records_window:
+        yield from flush()
+
+
+def _init_batch_worker(
+    exemplars_path: str,
+    model_name: str,
+    rules_only_mode: bool,
+    backend: str,
+    threads: int,
+) -> None:
+    global EXEMPLARS_PATH, _INTRA_OP_THREADS
+    EXEMPLARS_PATH = exemplars_path
+    # N workers each spinning up one intra-op thread per core would
+    # oversubscribe the box; split the cores between them instead. The
+    # parent already set OMP_NUM_THREADS for us; the runtimes' own pools are
+    # sized when the model is loaded (see _torch_embedder/_get_onnx_session).
+    _INTRA_OP_THREADS = threads
+    if not rules_only_mode:
+        _warm_up(model_name, backend)
+
+
+def _score_shard(
+    records: List[Dict[str, object]],
+    model_name: str,
+    rules_only_mode: bool,
+    schema_version: int,
+    batch_size: int,
+    backend: str,
+    min_confidence: float,
+) -> List[Dict[str, object]]:
+    return list(
+        iter_batch_payloads(
+            records,
+            model_name,
+            rules_only_mode,
+            schema_version,
+            batch_size,
+            backend,
+            min_confidence,
+        )
+    )
+
+
+def iter_parallel_payloads(
+    records: Iterable[Dict[str, object]],
+    model_name: str,
+    workers: int,
+    rules_only_mode: bool = False,
+    schema_version: int = 1,
+    batch_size: int = 32,
+    backend: str = "torch",
+    min_confidence: float = 0.0,
+    shard_size: Optional[int] = None,
+) -> Iterator[Dict[str, object]]:
+    """Like ``iter_batch_payloads`` but scores contiguous shards in a process pool.
+
+    Each worker loads the model once; shards are yielded in submission order,
+    so output order matches input order. Only ``workers * 2`` shards are in
+    flight at a time to keep memory flat on large corpora.
+    """
+    import collections
+    from concurrent.futures import ProcessPoolExecutor
+
+    shard_size = shard_size or batch_size * 8
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    in_flight: collections.deque = collections.deque()
+    # OpenMP reads this once at start-up, so it has to be in the environment
+    # the workers are started with (they start on the first submit).
+    omp_threads = os.environ.get("OMP_NUM_THREADS")
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_batch_worker,
+            initargs=(EXEMPLARS_PATH, model_name, rules_only_mode, backend, threads),
+        ) as pool:
+
+            def submit(shard: List[Dict[str, object]]) -> None:
+                in_flight.append(
+                    pool.submit(
+                        _score_shard,
+                        shard,
+                        model_name,
+                        rules_only_mode,
+                        schema_version,
+                        batch_size,
+                        backend,
+                        min_confidence,
+                    )
+                )
+
+            shard: List[Dict[str, object]] = []
+            for record in records:
+                shard.append(record)
+                if len(shard) >= shard_size:
+                    submit(shard)
+                    shard = []
+                    while len(in_flight) >= workers * 2:
+                        yield from in_flight.popleft().result()
+            if shard:
+                submit(shard)
+            while in_flight:
+                yield from in_flight.popleft().result()
+    finally:
+        if omp_threads is None:
+            os.environ.pop("OMP_NUM_THREADS", None)
+        else:
+            os.environ["OMP_NUM_THREADS"] = omp_threads
+
+
+def build_payload(result: Result, schema_version: int = 1) -> Dict[str, object]:
+    payload: Dict[str, object] = {
+        "tier": result.tier,
+        "confidence": round(result.confidence, 3),
+        "source": result.source,
+        "use_llm": result.use_llm,
+    }
+    if schema_version == 2:
+        payload.update(
+            {
+                "depth": result.depth,
+                "triggers": result.triggers,
+                "mandatory_controls": result.mandatory_controls,
+            }
+        )
+    return payload
+
+
+def render_payload(payload: Dict[str, object], fmt: str) -> str:
+    if fmt == "json":
+        return json.dumps(payload)
+    return f"TIER={payload['tier']} CONFIDENCE={payload['confidence']} SOURCE={payload['source']} USE_LLM={payload['use_llm']}"
+
+
+# Daemon protocol: the client writes one JSON object terminated by a newline
+# ({"task", "schema_version", "rules_only", "max_latency_ms", "min_confidence",
+# "model", "backend", "exemplars", "use_cache"}) and the server answers with one
+# newline-terminated JSON payload, then closes the connection. One-shot calls
+# use the daemon automatically whenever its socket exists.
+SOCKET_PATH = os.path.join(CACHE_DIR, "detector.sock")
+MAX_REQUEST_BYTES = 1 << 20
+
+
+def _warm_up(model_name: str, backend: str = "torch") -> None:
+    # Load tokenizer/model and label vectors before accepting connections so
+    # the first client request does not pay the cold start.
+    try:
+        with (
+            contextlib.redirect_stdout(io.StringIO()),
+            contextlib.redirect_stderr(io.StringIO()),
+        ):
+            embed_similarity(model_name, "warm up", backend)
+    except Exception:
+        pass
+
+
+def _handle_request(
+    raw: bytes, model_name: str, rules_only_mode: bool, backend: str
+) -> Dict[str, object]:
+    request = json.loads(raw.decode("utf-8"))
+    if not isinstance(request, dict):
+        raise ValueError("request must be a JSON object")
+    # Refuse what this daemon would answer differently from an in-process
+    # run; the client then classifies the task itself.
+    if request.get("model", model_name) != model_name:
+        raise ValueError(f"daemon serves model {model_name}")
+    if request.get("backend", backend) != backend:
+        raise ValueError(f"daemon serves backend {backend}")
+    if rules_only_mode and not request.get("rules_only", True):
+        raise ValueError("daemon only serves --rules-only requests")
+    exemplars = _exemplars_key(EXEMPLARS_PATH)
+    if _exemplars_key(str(request.get("exemplars", EXEMPLARS_PATH))) != exemplars:
+        raise ValueError(f"daemon serves exemplars {exemplars or '(none)'}")
+    schema_version = int(request.get("schema_version", 1))
+    result = classify(
+        str(request.get("task") or ""),
+        model_name,
+        rules_only_mode=rules_only_mode or bool(request.get("rules_only", False)),
+        max_latency_ms=int(request.get("max_latency_ms", 1500)),
+        use_cache=bool(request.get("use_cache", True)),
+        backend=backend,
+        min_confidence=float(request.get("min_confidence", 0.0)),
+    )
+    return build_payload(result, schema_version)
+
+
+def _exemplars_key(path: str) -> str:
+    # Client and daemon may run from different directories.
+    return os.path.abspath(path) if path else ""
+
+
+def _daemon_listening(socket_path: Union[str, Path]) -> bool:
+    import socket
+
+    if not os.path.exists(socket_path):
+        return False
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(str(socket_path))
+        except OSError:
+            return False
+    return True
+
+
+def serve(
+    socket_path: Union[str, Path],
+    model_name: str,
+    rules_only_mode: bool = False,
+    idle_timeout: float = 0,
+    backend: str = "torch",
+) -> int:
+    import signal
+    import socketserver
+    from pathlib import Path
+
+    socket_path = Path(socket_path)
+    socket_path.parent.mkdir(parents=True, exist_ok=True)
+    if _daemon_listening(socket_path):
+        print(
+            f"tier detector daemon already listening on {socket_path}",
+            file=sys.stderr,
+        )
+        return 1
+    if socket_path.exists():
+        # Stale socket left behind by a crashed daemon.
+        socket_path.unlink()
+
+    if not rules_only_mode:
+        _warm_up(model_name, backend)
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self) -> None:
+            raw = self.rfile.readline(MAX_REQUEST_BYTES)
+            try:
+                response = _handle_request(
+                    raw, model_name, rules_only_mode, backend
+                )
+            except Exception as exc:
+                response = {"error": f"{type(exc).__name__}: {exc}"}
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+    class Server(socketserver.UnixStreamServer):
+        idle = False
+
+        def handle_timeout(self) -> None:
+            self.idle = True
+
+    def _terminate(signum, frame):
+        raise SystemExit(0)
+
+    signal.signal(signal.SIGTERM, _terminate)
+
+    server = Server(str(socket_path), Handler)
+    os.chmod(socket_path, 0o600)
+    server.timeout = idle_timeout or None
+    try:
+        while not server.idle:
+            server.handle_request()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        with contextlib.suppress(FileNotFoundError):
+            socket_path.unlink()
+    return 0
+
+
+def request_daemon(
+    socket_path: Union[str, Path], request: Dict[str, object], timeout: float
+) -> Optional[Dict[str, object]]:
+    import socket
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(str(socket_path))
+            sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+            chunks = []
+            while True:
+                data = sock.recv(65536)
+                if not data:
+                    break
+                chunks.append(data)
+                if data.endswith(b"\n"):
+                    break
+    except OSError:
+        return None
+
+    try:
+        payload = json.loads(b"".join(chunks).decode("utf-8"))
+    except ValueError:
+        return None
+    if not isinstance(payload, dict) or "error" in payload:
+        return None
+    return payload
+
+
+PREWARM_LOCK_PATH = os.path.join(CACHE_DIR, "prewarm.lock")
+PREWARM_LOG_PATH = os.path.join(CACHE_DIR, "prewarm.log")
+_ENTRY_POINT = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "tier-detector-fast.py"
+)
+
+
+def prewarm(
+    model_name: str,
+    backend: str = "torch",
+    foreground: bool = False,
+    serve_socket: Optional[str] = None,
+    idle_timeout: float = 0,
+) -> int:
+    """Fetch and load the model, build the vector banks, then optionally serve.
+
+    With ``backend="onnx"`` this also writes the exported int8 graph under
+    ONNX_CACHE_DIR, so later one-shot calls skip torch entirely. Unless
+    ``foreground`` is set the work happens in a detached process and this
+    returns at once, which keeps it cheap enough for shell startup.
+    """
+    if not foreground:
+        import subprocess
+
+        argv = [sys.executable, _ENTRY_POINT, "--prewarm", "--foreground"]
+        argv += ["--model", model_name, "--backend", backend]
+        argv += ["--exemplars", EXEMPLARS_PATH]
+        if serve_socket is not None:
+            argv += ["--serve", "--socket", serve_socket]
+            argv += ["--idle-timeout", str(idle_timeout)]
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(PREWARM_LOG_PATH, "ab") as log:
+            subprocess.Popen(
+                argv,
+                stdin=subprocess.DEVNULL,
+                stdout=log,
+                stderr=log,
+                start_new_session=True,
+            )
+        return 0
+
+    import fcntl
+
+    if serve_socket is not None and _daemon_listening(serve_socket):
+        return 0
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(PREWARM_LOCK_PATH, "w") as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            # Another shell already started a prewarm; one is enough.
+            return 0
+        timings = {}
+        try:
+            with (
+                contextlib.redirect_stdout(io.StringIO()),
+                contextlib.redirect_stderr(io.StringIO()),
+            ):
+                started = time.perf_counter()
+                loaded = embed_similarity(model_name, "warm up", backend)
+                timings["load_ms"] = (time.perf_counter() - started) * 1000
+                started = time.perf_counter()
+                embed_similarity(model_name, "warm up again", backend)
+                timings["embed_ms"] = (time.perf_counter() - started) * 1000
+        except Exception as exc:
+            loaded = None
+            timings = {"error": f"{type(exc).__name__}: {exc}"}
+        status = {"model": model_name, "backend": backend}
+        if loaded is None:
+            status["error"] = timings.get("error", "embedding dependencies missing")
+            print(json.dumps({"prewarm": status}), file=sys.stderr)
+            return 1
+        status.update({phase: round(ms, 1) for phase, ms in timings.items()})
+        # The in-process cost is what a warm daemon will pay per call.
+        key = f"embed:{backend}:warm"
+        declared = EMBED_COST_MS.get(backend, EMBED_COST_MS["torch"])["warm"]
+        _observe_stage_cost(key, timings["embed_ms"], _stage_cost(key, declared))
+        print(json.dumps({"prewarm": status}), file=sys.stderr)
+
+    if serve_socket is not None:
+        return serve(serve_socket, model_name, False, idle_timeout, backend)
+    return 0
+
+
+def run_batch(args: argparse.Namespace) -> int:
+    with contextlib.ExitStack() as stack:
+        if args.batch == "-":
+            stream = sys.stdin
+        else:
+            stream = stack.enter_context(open(args.batch, encoding="utf-8"))
+        options = {
+            "rules_only_mode": args.rules_only,
+            "schema_version": args.schema_version,
+            "batch_size": max(1, args.batch_size),
+            "backend": args.backend,
+            "min_confidence": args.min_confidence,
+        }
+        records = _read_batch_records(stream)
+        if args.workers > 1:
+            payloads = iter_parallel_payloads(
+                records, args.model, args.workers, **options
+            )
+        else:
+            payloads = iter_batch_payloads(records, args.model, **options)
+        for payload in payloads:
+            sys.stdout.write(json.dumps(payload) + "\n")
+            sys.stdout.flush()
+    return 0
+
+
+def main(started: Optional[float] = None) -> int:
+    """CLI entry point; ``started`` is the perf_counter() taken before import."""
+    global EXEMPLARS_PATH
+    main_started = time.perf_counter()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Fast tier detection")
+    parser.add_argument("--task", help="Task description")
+    parser.add_argument("--stdin", action="store_true", help="Read task from stdin")
+    parser.add_argument("--model", default="BAAI/bge-small-en-v1.5")
+    parser.add_argument(
+        "--backend",
+        default="torch",
+        choices=BACKENDS,
+        help="Embedding runtime; onnx exports an int8 graph once, then skips torch",
+    )
+    parser.add_argument("--rules-only", action="store_true")
+    parser.add_argument(
+        "--max-latency-ms",
+        type=int,
+        default=1500,
+        help="Latency budget: a stage whose expected cost would overrun it is "
+        "skipped in favour of the best answer so far (0 = no budget)",
+    )
+    parser.add_argument(
+        "--min-confidence",
+        type=float,
+        default=0.0,
+        help="Escalate to the next stage while the answer is less confident",
+    )
+    parser.add_argument("--format", default="json", choices=["json", "text"])
+    parser.add_argument("--schema-version", type=int, default=1, choices=[1, 2])
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Keep the model warm and answer requests on a Unix socket",
+    )
+    parser.add_argument(
+        "--client",
+        action="store_true",
+        help="Send the task to a running --serve daemon (the default whenever "
+        "its socket exists; falls back to in-process)",
+    )
+    parser.add_argument(
+        "--no-client",
+        action="store_true",
+        help="Always classify in-process, even if a daemon is running",
+    )
+    parser.add_argument(
+        "--batch",
+        nargs="?",
+        const="-",
+        metavar="PATH",
+        help="Classify JSONL tasks from PATH (or stdin) and stream JSONL results",
+    )
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Shard --batch input across this many processes (one model each)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Skip the on-disk result cache keyed by normalized task",
+    )
+    parser.add_argument(
+        "--exemplars",
+        default=EXEMPLARS_PATH,
+        help="Labelled JSONL for the kNN embedding stage ('' disables it)",
+    )
+    parser.add_argument("--socket", default=SOCKET_PATH)
+    parser.add_argument(
+        "--idle-timeout",
+        type=float,
+        default=0,
+        help="Stop the daemon after this many idle seconds (0 = never)",
+    )
+    parser.add_argument(
+        "--prewarm",
+        action="store_true",
+        help="Load the model (and, for onnx, export it) in a detached background "
+        "process; with --serve that process then keeps serving warm",
+    )
+    parser.add_argument(
+        "--foreground",
+        action="store_true",
+        help="With --prewarm, do the work in this process instead of detaching",
+    )
+    parser.add_argument(
+        "--self-profile",
+        action="store_true",
+        help="Report per-phase timings (import/args/cache/rules/embed) on stderr",
+    )
+    args = parser.parse_args()
+    EXEMPLARS_PATH = args.exemplars
+    profile: Dict[str, float] = {}
+    if started is not None:
+        profile["import_ms"] = (main_started - started) * 1000
+    profile["args_ms"] = (time.perf_counter() - main_started) * 1000
+
+    if args.prewarm:
+        return prewarm(
+            args.model,
+            args.backend,
+            foreground=args.foreground,
+            serve_socket=args.socket if args.serve else None,
+            idle_timeout=args.idle_timeout,
+        )
+
+    if args.serve:
+        return serve(
+            args.socket, args.model, args.rules_only, args.idle_timeout, args.backend
+        )
+
+    if args.batch is not None:
+        return run_batch(args)
+
+    if args.stdin:
+        task = sys.stdin.read()
+    else:
+        task = args.task or ""
+
+    payload = None
+    # A daemon started by --prewarm --serve answers one-shot calls warm; a
+    # missing or stale socket costs one stat or a refused connect.
+    if args.client or (not args.no_client and os.path.exists(args.socket)):
+        payload = request_daemon(
+            args.socket,
+            {
+                "task": task,
+                "schema_version": args.schema_version,
+                "rules_only": args.rules_only,
+                "max_latency_ms": args.max_latency_ms,
+                "min_confidence": args.min_confidence,
+                "model": args.model,
+                "backend": args.backend,
+                "exemplars": _exemplars_key(args.exemplars),
+                "use_cache": not args.no_cache,
+            },
+            timeout=(args.max_latency_ms + 1000) / 1000,
+        )
+    if payload is None:
+        result = classify(
+            task,
+            args.model,
+            args.rules_only,
+            args.max_latency_ms,
+            use_cache=not args.no_cache,
+            backend=args.backend,
+            profile=profile,
+            min_confidence=args.min_confidence,
+        )
+        payload = build_payload(result, args.schema_version)
+
+    print(render_payload(payload, args.format))
+    if args.self_profile:
+        origin = started if started is not None else main_started
+        profile["total_ms"] = (time.perf_counter() - origin) * 1000
+        timings = {phase: round(ms, 3) for phase, ms in profile.items()}
+        print(json.dumps({"profile": timings}), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(time.perf_counter()))
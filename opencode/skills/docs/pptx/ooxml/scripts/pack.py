@@ -15,6 +15,9 @@ import defusedxml.minidom
 import zipfile
 from pathlib import Path
 
+# Sidecar written by validate.py --incremental; never part of the package
+VALIDATION_CACHE_NAME = ".validation-cache.json"
+
 
 def main():
     parser = argparse.ArgumentParser(description="Pack a directory into an Office file")
@@ -75,7 +78,7 @@ def pack_document(input_dir, output_file, validate=False):
         output_file.parent.mkdir(parents=True, exist_ok=True)
         with zipfile.ZipFile(output_file, "w", zipfile.ZIP_DEFLATED) as zf:
             for f in temp_content_dir.rglob("*"):
-                if f.is_file():
+                if f.is_file() and f.name != VALIDATION_CACHE_NAME:
                     zf.write(f, f.relative_to(temp_content_dir))
 
         # Validate if requested
@@ -0,0 +1,372 @@
+import base64
+import io
+import json
+import os
+import re
+import subprocess
+import sys
+import zipfile
+from pathlib import Path
+
+import pytest
+
+SCRIPTS = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(SCRIPTS))
+
+from validation import DOCXSchemaValidator  # noqa: E402
+
+VALIDATE = SCRIPTS / "validate.py"
+UNPACK = SCRIPTS / "unpack.py"
+
+# 1x1 transparent PNG
+PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6"
+    "kgAAAABJRU5ErkJggg=="
+)
+SLIDE_LAYOUT = (
+    "http://schemas.openxmlformats.org/officeDocument/2006/relationships/slideLayout"
+)
+
+# Checks whose CHECK_INPUTS limit them to part of the package; every other
+# check depends on the whole package
+PPTX_SCOPED = {
+    "validate_slide_layout_ids",
+    "validate_notes_slide_references",
+    "validate_no_duplicate_slide_layouts",
+}
+# PPTXSchemaValidator.CHECKS, in reporting order
+PPTX_ORDER = [
+    "validate_namespaces",
+    "validate_unique_ids",
+    "validate_uuid_ids",
+    "validate_file_references",
+    "validate_slide_layout_ids",
+    "validate_content_types",
+    "validate_against_xsd",
+    "validate_notes_slide_references",
+    "validate_all_relationship_ids",
+    "validate_no_duplicate_slide_layouts",
+]
+PPTX_CHECKS = {"validate_xml", *PPTX_ORDER}
+DOCX_DOCUMENT_ONLY = {
+    "DOCXSchemaValidator.validate_whitespace_preservation",
+    "DOCXSchemaValidator.validate_deletions",
+    "DOCXSchemaValidator.validate_insertions",
+    "DOCXSchemaValidator.compare_paragraph_counts",
+    "RedliningValidator.validate",
+}
+
+
+def unpack(original, target):
+    subprocess.run(
+        [sys.executable, str(UNPACK), str(original), str(target)],
+        check=True,
+        capture_output=True,
+    )
+    return target
+
+
+def make_deck(tmp_path):
+    pptx = pytest.importorskip("pptx")
+    presentation = pptx.Presentation()
+    for i in range(2):
+        slide = presentation.slides.add_slide(presentation.slide_layouts[5])
+        slide.shapes.title.text = f"Slide {i}"
+        slide.shapes.add_picture(io.BytesIO(PNG), 0, 0)
+    original = tmp_path / "deck.pptx"
+    presentation.save(original)
+    return unpack(original, tmp_path / "deck"), original
+
+
+def make_document(tmp_path):
+    docx = pytest.importorskip("docx")
+    document = docx.Document()
+    for i in range(3):
+        document.add_paragraph(f"Paragraph {i}")
+    document.add_picture(io.BytesIO(PNG))
+    original = tmp_path / "doc.docx"
+    document.save(original)
+    return unpack(original, tmp_path / "doc"), original
+
+
+def break_deck(unpacked):
+    """Introduce one error for each of several different checks."""
+    # Neither referenced nor declared in [Content_Types].xml
+    (unpacked / "ppt/media/orphan.wmf").write_bytes(b"\0")
+    presentation = unpacked / "ppt/presentation.xml"
+    presentation.write_text(
+        presentation.read_text().replace(
+            "<p:sldMasterIdLst>", "<p:bogus/><p:sldMasterIdLst>"
+        )
+    )
+    master = unpacked / "ppt/slideMasters/slideMaster1.xml"
+    master.write_text(
+        re.sub(r'r:id="rId\d+"', 'r:id="rId999"', master.read_text(), count=1)
+    )
+    rels = unpacked / "ppt/slides/_rels/slide2.xml.rels"
+    rels.write_text(
+        rels.read_text().replace(
+            "</Relationships>",
+            f'<Relationship Id="rId99" Type="{SLIDE_LAYOUT}" '
+            'Target="../slideLayouts/slideLayout2.xml"/></Relationships>',
+        )
+    )
+
+
+def break_document(unpacked):
+    (unpacked / "word/media/orphan.png").write_bytes(PNG)
+    document = unpacked / "word/document.xml"
+    document.write_text(
+        document.read_text().replace("<w:body>", "<w:body><w:bogus/>", 1)
+    )
+
+
+def validate(unpacked, original, *args):
+    completed = subprocess.run(
+        [sys.executable, str(VALIDATE), str(unpacked), "--original", str(original)]
+        + list(args),
+        capture_output=True,
+        text=True,
+    )
+    return completed.returncode, completed.stdout
+
+
+def report(unpacked, original, *args):
+    _, stdout = validate(unpacked, original, "--json", "--incremental", *args)
+    return {
+        f"{result['validator']}.{result['check']}": result
+        for result in json.loads(stdout)["results"]
+    }
+
+
+def rerun(results):
+    return {name for name, result in results.items() if not result["cached"]}
+
+
+def test_fixture_deck_passes(tmp_path):
+    unpacked, original = make_deck(tmp_path)
+    code, stdout = validate(unpacked, original)
+    assert code == 0, stdout
+    assert stdout.endswith("All validations PASSED!\n")
+
+
+@pytest.mark.parametrize(
+    "make, break_package",
+    [(make_deck, break_deck), (make_document, break_document)],
+)
+def test_parallel_stream_and_incremental_runs_report_the_same_errors(
+    tmp_path, make, break_package
+):
+    unpacked, original = make(tmp_path)
+    break_package(unpacked)
+
+    serial = validate(unpacked, original, "-v")
+    assert serial[0] == 1
+    assert "FAILED" in serial[1]
+    for args in (
+        ("-j", "2"),
+        ("--stream",),
+        ("--stream", "-j", "2"),
+        ("--incremental",),  # Cold cache
+        ("--incremental",),  # Every check replayed
+        ("--incremental", "--stream", "-j", "2"),
+    ):
+        assert validate(unpacked, original, "-v", *args) == serial, args
+
+
+def test_stream_handles_comments_before_the_root(tmp_path):
+    unpacked, original = make_deck(tmp_path)
+    slide = unpacked / "ppt/slides/slide1.xml"
+    declaration, rest = slide.read_text().split("\n", 1)
+    slide.write_text(f"{declaration}\n<!-- x --><?pi data?>\n{rest}")
+
+    serial = validate(unpacked, original, "-v")
+    assert serial[0] == 0, serial[1]
+    assert validate(unpacked, original, "-v", "--stream") == serial
+
+
+def test_broken_deck_reports_each_error(tmp_path):
+    unpacked, original = make_deck(tmp_path)
+    break_deck(unpacked)
+    results = report(unpacked, original)
+    failed = {name for name, result in results.items() if not result["passed"]}
+    assert failed == {
+        "PPTXSchemaValidator.validate_file_references",
+        "PPTXSchemaValidator.validate_slide_layout_ids",
+        "PPTXSchemaValidator.validate_content_types",
+        "PPTXSchemaValidator.validate_against_xsd",
+        "PPTXSchemaValidator.validate_all_relationship_ids",
+        "PPTXSchemaValidator.validate_no_duplicate_slide_layouts",
+    }
+    errors = results["PPTXSchemaValidator.validate_content_types"]["errors"]
+    assert errors == [
+        "ppt/media/orphan.wmf: File with extension 'wmf' not declared in "
+        '[Content_Types].xml - should add: <Default Extension="wmf" '
+        'ContentType="image/x-wmf"/>'
+    ]
+
+
+def test_json_report_lists_every_check_with_status_and_errors(tmp_path):
+    unpacked, original = make_deck(tmp_path)
+    code, stdout = validate(unpacked, original, "--json")
+    assert code == 0
+    passing = json.loads(stdout)
+    assert set(passing) == {
+        "unpacked_dir",
+        "original",
+        "passed",
+        "duration_ms",
+        "results",
+    }
+    assert passing["passed"] is True
+    assert passing["original"] == str(original)
+    assert [r["check"] for r in passing["results"]] == [
+        "validate_xml",
+        *PPTX_ORDER,
+    ]
+    for result in passing["results"]:
+        assert set(result) == {
+            "validator",
+            "check",
+            "passed",
+            "output",
+            "duration_ms",
+            "cached",
+            "errors",
+            "parts_examined",
+            "parses",
+        }
+        assert result["passed"] and result["errors"] == []
+        assert result["validator"] == "PPTXSchemaValidator"
+        assert not result["cached"]
+
+    break_deck(unpacked)
+    code, stdout = validate(unpacked, original, "--json")
+    assert code == 1
+    failing = json.loads(stdout)
+    assert failing["passed"] is False
+    results = {r["check"]: r for r in failing["results"]}
+    duplicates = results["validate_no_duplicate_slide_layouts"]
+    assert not duplicates["passed"]
+    assert duplicates["errors"] == [
+        "ppt/slides/_rels/slide2.xml.rels: has 2 slideLayout references"
+    ]
+    assert duplicates["output"].startswith(
+        "FAILED - Found slides with duplicate slideLayout references:"
+    )
+    assert results["validate_unique_ids"]["passed"]
+    assert results["validate_unique_ids"]["output"] == ""
+
+
+def unique_ids(tmp_path, body, stream):
+    """Run validate_unique_ids on a document.xml with the given body."""
+    document = tmp_path / "doc" / "word" / "document.xml"
+    document.parent.mkdir(parents=True)
+    document.write_text(
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/'
+        '2006/main" xmlns:mc="http://schemas.openxmlformats.org/markup-'
+        f'compatibility/2006"><w:body>{body}</w:body></w:document>'
+    )
+    validator = DOCXSchemaValidator(tmp_path / "doc", tmp_path / "doc.docx")
+    validator.stream = stream
+    return validator.validate_unique_ids(), validator.check_errors
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_unique_ids_ignore_alternate_content_and_non_elements(tmp_path, stream):
+    body = (
+        '<w:bookmarkStart w:id="1"/><!-- comment --><?pi data?>'
+        "<mc:AlternateContent>"
+        '<mc:Choice><w:bookmarkStart w:id="1"/></mc:Choice>'
+        '<mc:Fallback><w:bookmarkStart w:id="1"/></mc:Fallback>'
+        "</mc:AlternateContent>"
+    )
+    assert unique_ids(tmp_path, body, stream) == (True, [])
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_unique_ids_report_duplicates_in_the_same_scope(tmp_path, stream):
+    body = '<w:bookmarkStart w:id="5"/><w:p/>\n<w:bookmarkStart w:id="5"/>'
+    passed, errors = unique_ids(tmp_path, body, stream)
+    assert not passed
+    assert errors == [
+        "word/document.xml: Line 3: Duplicate id='5' in <bookmarkstart> "
+        "(first occurrence at line 2)"
+    ]
+
+
+def edit_rels(unpacked, original):
+    rels = unpacked / "ppt/slides/_rels/slide1.xml.rels"
+    rels.write_text(rels.read_text() + "\n")
+    return {"ppt/slides/_rels/slide1.xml.rels"}
+
+
+def edit_media(unpacked, original):
+    media = unpacked / "ppt/media/image1.png"
+    media.write_bytes(media.read_bytes() + b"\0")
+    return set()  # No schema, so no per-part XSD result to redo
+
+
+def edit_content_types(unpacked, original):
+    content_types = unpacked / "[Content_Types].xml"
+    content_types.write_text(content_types.read_text() + "\n")
+    return {"[Content_Types].xml"}
+
+
+def edit_original(unpacked, original):
+    with zipfile.ZipFile(original, "a") as package:
+        package.comment = b"edited"
+    return None  # Every part is compared with the original part again
+
+
+@pytest.mark.parametrize(
+    "edit, cached",
+    [
+        (edit_rels, {"validate_slide_layout_ids"}),
+        (edit_media, PPTX_SCOPED),
+        (edit_content_types, PPTX_SCOPED),
+        (edit_original, set()),
+    ],
+)
+def test_edit_invalidates_exactly_the_checks_that_read_it(tmp_path, edit, cached):
+    unpacked, original = make_deck(tmp_path)
+    first = report(unpacked, original)
+    assert rerun(first) == set(first)
+
+    xsd_parts = edit(unpacked, original)
+    results = report(unpacked, original)
+    assert rerun(results) == {
+        f"PPTXSchemaValidator.{check}" for check in PPTX_CHECKS - cached
+    }
+    # Per-part XSD results are only redone for the edited parts
+    xsd = "PPTXSchemaValidator.validate_against_xsd"
+    redone = first[xsd]["parts_examined"] if xsd_parts is None else len(xsd_parts)
+    assert results[xsd]["parts_examined"] == redone
+    assert {name: result["passed"] for name, result in results.items()} == {
+        name: result["passed"] for name, result in first.items()
+    }
+
+
+def test_unchanged_package_replays_every_check(tmp_path):
+    unpacked, original = make_deck(tmp_path)
+    report(unpacked, original)
+    # A new mtime alone is not an edit
+    slide = unpacked / "ppt/slides/slide1.xml"
+    os.utime(slide, ns=(slide.stat().st_atime_ns, slide.stat().st_mtime_ns + 10**9))
+    assert rerun(report(unpacked, original)) == set()
+
+
+def test_document_checks_only_rerun_when_the_document_changes(tmp_path):
+    unpacked, original = make_document(tmp_path)
+    report(unpacked, original)
+
+    media = next((unpacked / "word/media").iterdir())
+    media.write_bytes(media.read_bytes() + b"\0")
+    results = report(unpacked, original)
+    assert rerun(results) == set(results) - DOCX_DOCUMENT_ONLY
+
+    document = unpacked / "word/document.xml"
+    document.write_text(document.read_text() + "\n")
+    results = report(unpacked, original)
+    assert rerun(results) == set(results)
@@ -4,13 +4,24 @@ Command line tool to validate Office document XML files against XSD schemas and
 
 Usage:
     python validate.py <dir> --original <original_file>
+        [--jobs N] [--incremental] [--stream] [--json]
 """
 
 import argparse
+import contextlib
+import dataclasses
+import json
 import sys
+import time
 from pathlib import Path
 
-from validation import DOCXSchemaValidator, PPTXSchemaValidator, RedliningValidator
+from validation import (
+    DOCXSchemaValidator,
+    PPTXSchemaValidator,
+    RedliningValidator,
+    ValidationCache,
+    run_validators,
+)
 
 
 def main():
@@ -30,6 +41,32 @@ def main():
         action="store_true",
         help="Enable verbose output",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Run independent checks in N worker processes (0 = one per CPU)",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only re-check parts changed since the last --incremental run "
+        "(results are cached in the unpacked directory)",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Read parts with iterparse in the checks that only need elements "
+        "and attributes, and keep no parsed trees between checks; XSD and "
+        "redlining validation still load one whole part at a time",
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Print a JSON report with every check's result, errors, duration, "
+        "parts examined and parse count instead of the text output",
+    )
     args = parser.parse_args()
 
     # Validate paths
@@ -52,14 +89,37 @@ def main():
             print(f"Error: Validation not supported for file type {file_extension}")
             sys.exit(1)
 
-    # Run validators
-    success = True
-    for V in validators:
-        validator = V(unpacked_dir, original_file, verbose=args.verbose)
-        if not validator.validate():
-            success = False
+    # Run validators, printing each check's output in a fixed order
+    started = time.perf_counter()
+    # Keep stray warnings out of the JSON report on stdout
+    with contextlib.redirect_stdout(sys.stderr if args.json else sys.stdout):
+        cache = (
+            ValidationCache(unpacked_dir, original_file) if args.incremental else None
+        )
+        results = run_validators(
+            validators,
+            unpacked_dir,
+            original_file,
+            verbose=args.verbose,
+            jobs=args.jobs,
+            on_result=None
+            if args.json
+            else lambda result: print(result.output, end="", flush=True),
+            cache=cache,
+            stream=args.stream,
+        )
+    success = all(result.passed for result in results)
 
-    if success:
+    if args.json:
+        report = {
+            "unpacked_dir": str(unpacked_dir),
+            "original": str(original_file),
+            "passed": success,
+            "duration_ms": (time.perf_counter() - started) * 1000,
+            "results": [dataclasses.asdict(result) for result in results],
+        }
+        print(json.dumps(report, indent=2))
+    elif success:
         print("All validations PASSED!")
 
     sys.exit(0 if success else 1)
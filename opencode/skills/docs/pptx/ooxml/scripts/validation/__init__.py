@@ -4,12 +4,17 @@ Validation modules for Word document processing.
 
 from .base import BaseSchemaValidator
 from .docx import DOCXSchemaValidator
+from .incremental import ValidationCache
 from .pptx import PPTXSchemaValidator
 from .redlining import RedliningValidator
+from .runner import CheckResult, run_validators
 
 __all__ = [
     "BaseSchemaValidator",
+    "CheckResult",
     "DOCXSchemaValidator",
     "PPTXSchemaValidator",
     "RedliningValidator",
+    "ValidationCache",
+    "run_validators",
 ]
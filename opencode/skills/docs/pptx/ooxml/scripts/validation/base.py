@@ -2,11 +2,20 @@
 Base validator with common validation logic for document files.
 """
 
+import copy
+import io
 import re
 from pathlib import Path
 
 import lxml.etree
 
+from .incremental import CACHE_FILE_NAME
+from .package import RelationshipGraph, read_original_part
+from .runner import run_parts_in_worker
+
+# Compiled XSD schemas keyed by schema path, shared by all validators in a process
+_SCHEMA_SINGLETON = {}
+
 
 class BaseSchemaValidator:
     """Base validator with common validation logic for document files."""
@@ -37,10 +46,46 @@ class BaseSchemaValidator:
         "grpsp": ("id", "file"),  # Group shape IDs
     }
 
+    # OOXML spelling of the element names above; lxml matches these (and the
+    # lower-case names) in C instead of every tag being lower-cased in Python
+    UNIQUE_ID_ELEMENT_NAMES = (
+        "comment",
+        "commentRangeStart",
+        "commentRangeEnd",
+        "bookmarkStart",
+        "bookmarkEnd",
+        "sldId",
+        "sldMasterId",
+        "sldLayoutId",
+        "cm",
+        "sheet",
+        "definedName",
+        "cxnSp",
+        "sp",
+        "pic",
+        "grpSp",
+    )
+
     # Mapping of element names to expected relationship types
     # Subclasses should override this with format-specific mappings
     ELEMENT_RELATIONSHIP_TYPES = {}
 
+    # Checks that must pass before any other check is worth running
+    PREREQUISITE_CHECKS = ("validate_xml",)
+
+    # Independent checks run after the prerequisites, in reporting order
+    # Subclasses should override this with their format-specific checks
+    CHECKS = ()
+
+    # Parts each check reads, as glob patterns relative to the unpacked
+    # directory; --incremental reuses a check's result while they are
+    # unchanged. Checks not listed here depend on the whole package.
+    CHECK_INPUTS = {}
+
+    # Checks that work part by part: they cache their results per part and,
+    # given an executor, spread their parts over its worker processes
+    PER_PART_CHECKS = ("validate_against_xsd",)
+
     # Unified schema mappings for all Office document types
     SCHEMA_MAPPINGS = {
         # Document type specific schemas
@@ -120,9 +165,156 @@ class BaseSchemaValidator:
         if not self.xml_files:
             print(f"Warning: No XML files found in {self.unpacked_dir}")
 
+        # Parsed parts shared by every check, see _parse
+        self._documents = {}
+        self.parse_count = 0
+
+        # What the current check looked at and found; run_check resets these
+        # before each check and reports them in its CheckResult
+        self.parts_examined = set()
+        self.check_errors = []
+
+        # Relationships of every .rels part, see _relationship_graph
+        self._graph = None
+
+        # XSD errors of the original parts, see _get_original_file_errors
+        self._original_errors = {}
+
+        # Optional ValidationCache for incremental runs, set by run_validators
+        self.cache = None
+
+        # Stream large parts through iterparse instead of keeping whole trees,
+        # set by run_validators; see _iter_elements
+        self.stream = False
+
+        # Process pool for PER_PART_CHECKS and its size, set by run_validators
+        self.executor = None
+        self.jobs = 1
+
     def validate(self):
         """Run all validation checks and return True if all pass."""
-        raise NotImplementedError("Subclasses must implement the validate method")
+        for check in self.PREREQUISITE_CHECKS:
+            if not getattr(self, check)():
+                return False
+
+        all_valid = True
+        for check in self.CHECKS:
+            # Informational checks (e.g. paragraph counts) return None
+            if getattr(self, check)() is False:
+                all_valid = False
+
+        return all_valid
+
+    def _parse(self, xml_file):
+        """Parse a part once and return the same tree to every later caller.
+
+        The tree is shared between checks and must be treated as read-only;
+        use _parse_copy to get a tree that can be modified. Parse errors are
+        remembered as well and raised again on every call. In stream mode
+        nothing is kept: every call parses the part again and the tree is
+        dropped once the caller is done. Only XSD validation and the small
+        .rels parts behind the relationship graph need that; other checks
+        should use _iter_elements.
+        """
+        xml_file = Path(xml_file)
+        self.parts_examined.add(xml_file)
+        if self.stream:
+            self.parse_count += 1
+            return lxml.etree.parse(str(xml_file))
+
+        document = self._documents.get(xml_file)
+        if document is None:
+            self.parse_count += 1
+            try:
+                document = lxml.etree.parse(str(xml_file))
+            except Exception as e:
+                document = e
+            self._documents[xml_file] = document
+
+        if isinstance(document, Exception):
+            raise document
+        return document
+
+    def _parse_copy(self, xml_file):
+        """Return a private tree of a part that checks may modify."""
+        if self.stream:
+            return self._parse(xml_file)  # Already a fresh tree
+        return copy.deepcopy(self._parse(xml_file))
+
+    def _relationship_graph(self):
+        """Return the package's RelationshipGraph, building it on first use."""
+        if self._graph is None:
+            # Whichever check builds the graph first should not be reported as
+            # examining every .rels part; checks record the ones they look up
+            parts_examined = set(self.parts_examined)
+            self._graph = RelationshipGraph(
+                self.unpacked_dir, self._parse, self.PACKAGE_RELATIONSHIPS_NAMESPACE
+            )
+            self.parts_examined = parts_examined
+        return self._graph
+
+    def _relationships(self, rels_file):
+        """Relationships of a .rels part, looked up in the relationship graph."""
+        self.parts_examined.add(Path(rels_file))
+        return self._relationship_graph().relationships(rels_file)
+
+    def _record_errors(self, errors):
+        """Add a failing check's errors to the structured results of the check."""
+        self.check_errors.extend(error.strip() for error in errors)
+
+    def _stream(self, xml_file):
+        """Yield iterparse (event, element) pairs for a part with bounded memory.
+
+        Each element is cleared after its end event has been handled and its
+        earlier siblings are dropped, so only the current element and its
+        ancestors stay in memory however large the part is.
+        """
+        self.parts_examined.add(Path(xml_file))
+        self.parse_count += 1
+        for event, elem in lxml.etree.iterparse(
+            str(xml_file), events=("start", "end")
+        ):
+            yield event, elem
+            if event == "end":
+                elem.clear(keep_tail=True)
+                # The root's earlier siblings are comments or PIs outside any
+                # parent, so there is nothing to drop
+                parent = elem.getparent()
+                while parent is not None and elem.getprevious() is not None:
+                    del parent[0]
+
+    def _iter_elements(self, xml_file, *tags, text=False):
+        """Yield a part's elements in document order, like root.iter(*tags).
+
+        Tags may use lxml's {*} namespace wildcard. Normally this walks the
+        shared tree. In stream mode the part is read with _stream instead and
+        elements are yielded as their start tag is read, which is enough for
+        attributes and ancestors; pass text=True to receive them after their
+        end tag, once their text has been read.
+        """
+        if not self.stream:
+            yield from self._parse(xml_file).getroot().iter(*tags)
+            return
+
+        exact = {tag for tag in tags if not tag.startswith("{*}")}
+        local = {tag[3:] for tag in tags if tag.startswith("{*}")}
+        wanted = "end" if text else "start"
+        for event, elem in self._stream(xml_file):
+            if event != wanted:
+                continue
+            if (
+                not tags
+                or elem.tag in exact
+                or elem.tag.split("}")[-1] in local
+            ):
+                yield elem
+
+    def _root_element(self, xml_file):
+        """Return a part's root element; in stream mode only its start tag is read."""
+        if not self.stream:
+            return self._parse(xml_file).getroot()
+        for _, elem in self._stream(xml_file):
+            return elem
 
     def validate_xml(self):
         """Validate that all XML files are well-formed."""
@@ -131,7 +323,11 @@ class BaseSchemaValidator:
         for xml_file in self.xml_files:
             try:
                 # Try to parse the XML file
-                lxml.etree.parse(str(xml_file))
+                if self.stream:
+                    for _ in self._stream(xml_file):
+                        pass
+                else:
+                    self._parse(xml_file)
             except lxml.etree.XMLSyntaxError as e:
                 errors.append(
                     f"  {xml_file.relative_to(self.unpacked_dir)}: "
@@ -144,6 +340,7 @@ class BaseSchemaValidator:
                 )
 
         if errors:
+            self._record_errors(errors)
             print(f"FAILED - Found {len(errors)} XML violations:")
             for error in errors:
                 print(error)
@@ -159,7 +356,7 @@ class BaseSchemaValidator:
 
         for xml_file in self.xml_files:
             try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
+                root = self._root_element(xml_file)
                 declared = set(root.nsmap.keys()) - {None}  # Exclude default namespace
 
                 for attr_val in [
@@ -175,6 +372,7 @@ class BaseSchemaValidator:
                 continue
 
         if errors:
+            self._record_errors(errors)
             print(f"FAILED - {len(errors)} namespace issues:")
             for error in errors:
                 print(error)
@@ -183,6 +381,26 @@ class BaseSchemaValidator:
             print("PASSED - All namespace prefixes properly declared")
         return True
 
+    def _unique_id_elements(self, xml_file):
+        """Yield, in document order, the elements with ID uniqueness requirements.
+
+        Elements inside mc:AlternateContent (other than the root itself) are
+        skipped, matching a tree with those blocks stripped out, so the shared
+        tree never needs to be copied.
+        """
+        names = set(self.UNIQUE_ID_ELEMENT_NAMES) | set(self.UNIQUE_ID_REQUIREMENTS)
+        tags = [f"{{*}}{name}" for name in sorted(names)]
+        alternate_content = f"{{{self.MC_NAMESPACE}}}AlternateContent"
+        for elem in self._iter_elements(xml_file, *tags):
+            if elem.tag.split("}")[-1].lower() not in self.UNIQUE_ID_REQUIREMENTS:
+                continue
+            if any(
+                ancestor.getparent() is not None
+                for ancestor in elem.iterancestors(alternate_content)
+            ):
+                continue
+            yield elem
+
     def validate_unique_ids(self):
         """Validate that specific IDs are unique according to OOXML requirements."""
         errors = []
@@ -190,74 +408,50 @@ class BaseSchemaValidator:
 
         for xml_file in self.xml_files:
             try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
                 file_ids = {}  # Track IDs that must be unique within this file
 
-                # Remove all mc:AlternateContent elements from the tree
-                mc_elements = root.xpath(
-                    ".//mc:AlternateContent", namespaces={"mc": self.MC_NAMESPACE}
-                )
-                for elem in mc_elements:
-                    elem.getparent().remove(elem)
-
-                # Now check IDs in the cleaned tree
-                for elem in root.iter():
+                # Only elements with ID uniqueness requirements are visited
+                for elem in self._unique_id_elements(xml_file):
                     # Get the element name without namespace
-                    tag = (
-                        elem.tag.split("}")[-1].lower()
-                        if "}" in elem.tag
-                        else elem.tag.lower()
-                    )
-
-                    # Check if this element type has ID uniqueness requirements
-                    if tag in self.UNIQUE_ID_REQUIREMENTS:
-                        attr_name, scope = self.UNIQUE_ID_REQUIREMENTS[tag]
-
-                        # Look for the specified attribute
-                        id_value = None
-                        for attr, value in elem.attrib.items():
-                            attr_local = (
-                                attr.split("}")[-1].lower()
-                                if "}" in attr
-                                else attr.lower()
+                    tag = elem.tag.split("}")[-1].lower()
+                    attr_name, scope = self.UNIQUE_ID_REQUIREMENTS[tag]
+
+                    # Look for the specified attribute
+                    id_value = None
+                    for attr, value in elem.attrib.items():
+                        if attr.split("}")[-1].lower() == attr_name:
+                            id_value = value
+                            break
+
+                    if id_value is None:
+                        continue
+
+                    if scope == "global":
+                        # Check global uniqueness
+                        if id_value in global_ids:
+                            prev_file, prev_line, prev_tag = global_ids[id_value]
+                            errors.append(
+                                f"  {xml_file.relative_to(self.unpacked_dir)}: "
+                                f"Line {elem.sourceline}: Global ID '{id_value}' in <{tag}> "
+                                f"already used in {prev_file} at line {prev_line} in <{prev_tag}>"
                             )
-                            if attr_local == attr_name:
-                                id_value = value
-                                break
-
-                        if id_value is not None:
-                            if scope == "global":
-                                # Check global uniqueness
-                                if id_value in global_ids:
-                                    prev_file, prev_line, prev_tag = global_ids[
-                                        id_value
-                                    ]
-                                    errors.append(
-                                        f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                                        f"Line {elem.sourceline}: Global ID '{id_value}' in <{tag}> "
-                                        f"already used in {prev_file} at line {prev_line} in <{prev_tag}>"
-                                    )
-                                else:
-                                    global_ids[id_value] = (
-                                        xml_file.relative_to(self.unpacked_dir),
-                                        elem.sourceline,
-                                        tag,
-                                    )
-                            elif scope == "file":
-                                # Check file-level uniqueness
-                                key = (tag, attr_name)
-                                if key not in file_ids:
-                                    file_ids[key] = {}
-
-                                if id_value in file_ids[key]:
-                                    prev_line = file_ids[key][id_value]
-                                    errors.append(
-                                        f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                                        f"Line {elem.sourceline}: Duplicate {attr_name}='{id_value}' in <{tag}> "
-                                        f"(first occurrence at line {prev_line})"
-                                    )
-                                else:
-                                    file_ids[key][id_value] = elem.sourceline
+                        else:
+                            global_ids[id_value] = (
+                                xml_file.relative_to(self.unpacked_dir),
+                                elem.sourceline,
+                                tag,
+                            )
+                    elif scope == "file":
+                        # Check file-level uniqueness
+                        seen = file_ids.setdefault((tag, attr_name), {})
+                        if id_value in seen:
+                            errors.append(
+                                f"  {xml_file.relative_to(self.unpacked_dir)}: "
+                                f"Line {elem.sourceline}: Duplicate {attr_name}='{id_value}' in <{tag}> "
+                                f"(first occurrence at line {seen[id_value]})"
+                            )
+                        else:
+                            seen[id_value] = elem.sourceline
 
             except (lxml.etree.XMLSyntaxError, Exception) as e:
                 errors.append(
@@ -265,6 +459,7 @@ class BaseSchemaValidator:
                 )
 
         if errors:
+            self._record_errors(errors)
             print(f"FAILED - Found {len(errors)} ID uniqueness violations:")
             for error in errors:
                 print(error)
@@ -280,8 +475,9 @@ class BaseSchemaValidator:
         """
         errors = []
 
-        # Find all .rels files
-        rels_files = list(self.unpacked_dir.rglob("*.rels"))
+        # Every .rels part is read once into the relationship graph
+        graph = self._relationship_graph()
+        rels_files = graph.rels_files
 
         if not rels_files:
             if self.verbose:
@@ -289,14 +485,13 @@ class BaseSchemaValidator:
             return True
 
         # Get all files in the unpacked directory (excluding reference files)
-        all_files = []
-        for file_path in self.unpacked_dir.rglob("*"):
-            if (
-                file_path.is_file()
-                and file_path.name != "[Content_Types].xml"
-                and not file_path.name.endswith(".rels")
-            ):  # This file is not referenced by .rels
-                all_files.append(file_path.resolve())
+        all_files = [
+            file_path
+            for file_path in graph.files
+            if file_path.name != "[Content_Types].xml"
+            and file_path.name != CACHE_FILE_NAME
+            and not file_path.name.endswith(".rels")
+        ]  # These files are not referenced by .rels
 
         # Track all files that are referenced by any .rels file
         all_referenced_files = set()
@@ -309,44 +504,16 @@ class BaseSchemaValidator:
         # Check each .rels file
         for rels_file in rels_files:
             try:
-                # Parse relationships file
-                rels_root = lxml.etree.parse(str(rels_file)).getroot()
-
-                # Get the directory where this .rels file is located
-                rels_dir = rels_file.parent
-
-                # Find all relationships and their targets
-                referenced_files = set()
                 broken_refs = []
 
-                for rel in rels_root.findall(
-                    ".//ns:Relationship",
-                    namespaces={"ns": self.PACKAGE_RELATIONSHIPS_NAMESPACE},
-                ):
-                    target = rel.get("Target")
-                    if target and not target.startswith(
+                for rel in self._relationships(rels_file):
+                    if rel.target and not rel.target.startswith(
                         ("http", "mailto:")
                     ):  # Skip external URLs
-                        # Resolve the target path relative to the .rels file location
-                        if rels_file.name == ".rels":
-                            # Root .rels file - targets are relative to unpacked_dir
-                            target_path = self.unpacked_dir / target
+                        if rel.path is not None:
+                            all_referenced_files.add(rel.path)
                         else:
-                            # Other .rels files - targets are relative to their parent's parent
-                            # e.g., word/_rels/document.xml.rels -> targets relative to word/
-                            base_dir = rels_dir.parent
-                            target_path = base_dir / target
-
-                        # Normalize the path and check if it exists
-                        try:
-                            target_path = target_path.resolve()
-                            if target_path.exists() and target_path.is_file():
-                                referenced_files.add(target_path)
-                                all_referenced_files.add(target_path)
-                            else:
-                                broken_refs.append((target, rel.sourceline))
-                        except (OSError, ValueError):
-                            broken_refs.append((target, rel.sourceline))
+                            broken_refs.append((rel.target, rel.sourceline))
 
                 # Report broken references
                 if broken_refs:
@@ -369,6 +536,7 @@ class BaseSchemaValidator:
                 errors.append(f"  Unreferenced file: {unref_rel_path}")
 
         if errors:
+            self._record_errors(errors)
             print(f"FAILED - Found {len(errors)} relationship validation errors:")
             for error in errors:
                 print(error)
@@ -390,8 +558,6 @@ class BaseSchemaValidator:
         Validate that all r:id attributes in XML files reference existing IDs
         in their corresponding .rels files, and optionally validate relationship types.
         """
-        import lxml.etree
-
         errors = []
 
         # Process each XML file that might contain r:id references
@@ -402,23 +568,20 @@ class BaseSchemaValidator:
 
             # Determine the corresponding .rels file
             # For dir/file.xml, it's dir/_rels/file.xml.rels
-            rels_dir = xml_file.parent / "_rels"
-            rels_file = rels_dir / f"{xml_file.name}.rels"
+            graph = self._relationship_graph()
+            rels_file = graph.rels_file_for(xml_file)
 
             # Skip if there's no corresponding .rels file (that's okay)
-            if not rels_file.exists():
+            if not graph.has_rels(rels_file):
                 continue
 
             try:
-                # Parse the .rels file to get valid relationship IDs and their types
-                rels_root = lxml.etree.parse(str(rels_file)).getroot()
+                # Get valid relationship IDs and their types from the graph
                 rid_to_type = {}
 
-                for rel in rels_root.findall(
-                    f".//{{{self.PACKAGE_RELATIONSHIPS_NAMESPACE}}}Relationship"
-                ):
-                    rid = rel.get("Id")
-                    rel_type = rel.get("Type", "")
+                for rel in self._relationships(rels_file):
+                    rid = rel.id
+                    rel_type = rel.type
                     if rid:
                         # Check for duplicate rIds
                         if rid in rid_to_type:
@@ -433,11 +596,8 @@ class BaseSchemaValidator:
                         )
                         rid_to_type[rid] = type_name
 
-                # Parse the XML file to find all r:id references
-                xml_root = lxml.etree.parse(str(xml_file)).getroot()
-
                 # Find all elements with r:id attributes
-                for elem in xml_root.iter():
+                for elem in self._iter_elements(xml_file):
                     # Check for r:id attribute (relationship ID)
                     rid_attr = elem.get(f"{{{self.OFFICE_RELATIONSHIPS_NAMESPACE}}}id")
                     if rid_attr:
@@ -473,6 +633,7 @@ class BaseSchemaValidator:
                 errors.append(f"  Error processing {xml_rel_path}: {e}")
 
         if errors:
+            self._record_errors(errors)
             print(f"FAILED - Found {len(errors)} relationship ID reference errors:")
             for error in errors:
                 print(error)
@@ -530,26 +691,20 @@ class BaseSchemaValidator:
             return False
 
         try:
-            # Parse and get all declared parts and extensions
-            root = lxml.etree.parse(str(content_types_file)).getroot()
+            # Get all declared parts (Override) and extensions (Default)
             declared_parts = set()
             declared_extensions = set()
-
-            # Get Override declarations (specific files)
-            for override in root.findall(
-                f".//{{{self.CONTENT_TYPES_NAMESPACE}}}Override"
-            ):
-                part_name = override.get("PartName")
-                if part_name is not None:
-                    declared_parts.add(part_name.lstrip("/"))
-
-            # Get Default declarations (by extension)
-            for default in root.findall(
-                f".//{{{self.CONTENT_TYPES_NAMESPACE}}}Default"
-            ):
-                extension = default.get("Extension")
-                if extension is not None:
-                    declared_extensions.add(extension.lower())
+            override = f"{{{self.CONTENT_TYPES_NAMESPACE}}}Override"
+            default = f"{{{self.CONTENT_TYPES_NAMESPACE}}}Default"
+            for elem in self._iter_elements(content_types_file, override, default):
+                if elem.tag == override:
+                    part_name = elem.get("PartName")
+                    if part_name is not None:
+                        declared_parts.add(part_name.lstrip("/"))
+                else:
+                    extension = elem.get("Extension")
+                    if extension is not None:
+                        declared_extensions.add(extension.lower())
 
             # Root elements that require content type declaration
             declarable_roots = {
@@ -593,7 +748,7 @@ class BaseSchemaValidator:
                     continue
 
                 try:
-                    root_tag = lxml.etree.parse(str(xml_file)).getroot().tag
+                    root_tag = self._root_element(xml_file).tag
                     root_name = root_tag.split("}")[-1] if "}" in root_tag else root_tag
 
                     if root_name in declarable_roots and path_str not in declared_parts:
@@ -609,7 +764,7 @@ class BaseSchemaValidator:
                 # Skip XML files and metadata files (already checked above)
                 if file_path.suffix.lower() in {".xml", ".rels"}:
                     continue
-                if file_path.name == "[Content_Types].xml":
+                if file_path.name in ("[Content_Types].xml", CACHE_FILE_NAME):
                     continue
                 if "_rels" in file_path.parts or "docProps" in file_path.parts:
                     continue
@@ -627,6 +782,7 @@ class BaseSchemaValidator:
             errors.append(f"  Error parsing [Content_Types].xml: {e}")
 
         if errors:
+            self._record_errors(errors)
             print(f"FAILED - Found {len(errors)} content type declaration errors:")
             for error in errors:
                 print(error)
@@ -692,11 +848,10 @@ class BaseSchemaValidator:
         valid_count = 0
         skipped_count = 0
 
+        results = self._xsd_results()
         for xml_file in self.xml_files:
             relative_path = str(xml_file.relative_to(self.unpacked_dir))
-            is_valid, new_file_errors = self.validate_file_against_xsd(
-                xml_file, verbose=False
-            )
+            is_valid, new_file_errors = results[xml_file]
 
             if is_valid is None:
                 skipped_count += 1
@@ -711,8 +866,11 @@ class BaseSchemaValidator:
                 continue
 
             # Has new errors
+            self._record_errors(
+                f"{relative_path}: {error}" for error in sorted(new_file_errors)
+            )
             new_errors.append(f"  {relative_path}: {len(new_file_errors)} new error(s)")
-            for error in list(new_file_errors)[:3]:  # Show first 3 errors
+            for error in sorted(new_file_errors)[:3]:  # Show first 3 errors
                 new_errors.append(
                     f"    - {error[:250]}..." if len(error) > 250 else f"    - {error}"
                 )
@@ -738,6 +896,73 @@ class BaseSchemaValidator:
                 print("\nPASSED - No new XSD validation errors introduced")
             return True
 
+    def _xsd_results(self):
+        """Map every part to validate_file_against_xsd's result for it.
+
+        Results stored in the cache are reused. The remaining parts are
+        validated here, or with an executor, in chunks spread over its worker
+        processes, each of which compiles and keeps its own schemas. Parts
+        are grouped by schema so a worker compiles as few as possible.
+        Results are gathered per part, so they do not depend on which worker
+        finished first.
+        """
+        results = {}
+        pending = []
+        for xml_file in self.xml_files:
+            relative_path = xml_file.relative_to(self.unpacked_dir)
+            stored = None
+            if self.cache is not None:
+                stored = self.cache.get_part("xsd", relative_path)
+            if stored is not None:
+                is_valid, new_file_errors = stored
+                results[xml_file] = is_valid, set(new_file_errors)
+            elif self._get_schema_path(xml_file) is None:
+                results[xml_file] = None, set()  # Nothing to validate against
+            else:
+                pending.append(xml_file)
+
+        self.parts_examined.update(pending)
+        if self.executor is None or self.jobs < 2 or len(pending) < 2:
+            for xml_file in pending:
+                results[xml_file] = self.validate_file_against_xsd(xml_file)
+        else:
+            pending.sort(key=lambda f: str(self._get_schema_path(f)))
+            size = -(-len(pending) // self.jobs)  # Ceiling division
+            chunks = [pending[i : i + size] for i in range(0, len(pending), size)]
+            futures = [
+                self.executor.submit(
+                    run_parts_in_worker,
+                    type(self),
+                    self.unpacked_dir,
+                    self.original_file,
+                    self.verbose,
+                    self.stream,
+                    "_validate_part_xsd",
+                    chunk,
+                )
+                for chunk in chunks
+            ]
+            for chunk, future in zip(chunks, futures):
+                chunk_results, parse_count = future.result()
+                self.parse_count += parse_count
+                for xml_file, (is_valid, errors) in zip(chunk, chunk_results):
+                    results[xml_file] = is_valid, set(errors)
+
+        if self.cache is not None:
+            for xml_file in pending:
+                is_valid, new_file_errors = results[xml_file]
+                self.cache.put_part(
+                    "xsd",
+                    xml_file.relative_to(self.unpacked_dir),
+                    [is_valid, sorted(new_file_errors)],
+                )
+        return results
+
+    def _validate_part_xsd(self, xml_file):
+        """validate_file_against_xsd with the errors as a sorted, picklable list."""
+        is_valid, new_file_errors = self.validate_file_against_xsd(xml_file)
+        return is_valid, sorted(new_file_errors)
+
     def _get_schema_path(self, xml_file):
         """Determine the appropriate schema path for an XML file."""
         # Check exact filename match
@@ -762,55 +987,49 @@ class BaseSchemaValidator:
 
         return None
 
-    def _clean_ignorable_namespaces(self, xml_doc):
-        """Remove attributes and elements not in allowed namespaces."""
-        # Create a clean copy
-        xml_string = lxml.etree.tostring(xml_doc, encoding="unicode")
-        xml_copy = lxml.etree.fromstring(xml_string)
-
-        # Remove attributes not in allowed namespaces
-        for elem in xml_copy.iter():
-            attrs_to_remove = []
-
-            for attr in elem.attrib:
-                # Check if attribute is from a namespace other than allowed ones
-                if "{" in attr:
-                    ns = attr.split("}")[0][1:]
-                    if ns not in self.OOXML_NAMESPACES:
-                        attrs_to_remove.append(attr)
-
-            # Remove collected attributes
-            for attr in attrs_to_remove:
-                del elem.attrib[attr]
-
-        # Remove elements not in allowed namespaces
-        self._remove_ignorable_elements(xml_copy)
+    def _clean_for_xsd(self, xml_doc, clean_namespaces):
+        """Prepare a private tree for XSD validation in a single in-place pass.
 
-        return lxml.etree.ElementTree(xml_copy)
-
-    def _remove_ignorable_elements(self, root):
-        """Recursively remove all elements not in allowed namespaces."""
+        Template tags ({{ ... }} placeholders) are stripped from text and tail
+        content outside text runs, and with clean_namespaces, attributes and
+        elements outside the allowed namespaces are removed as well. The tree
+        is modified in place, so it must not be a shared tree from _parse.
+        """
+        template_pattern = re.compile(r"\{\{[^}]*\}\}")
+        root = xml_doc.getroot()
         elements_to_remove = []
 
-        # Find elements to remove
-        for elem in list(root):
+        for elem in root.iter():
             # Skip non-element nodes (comments, processing instructions, etc.)
-            if not hasattr(elem, "tag") or callable(elem.tag):
+            if callable(elem.tag):
                 continue
 
+            # Leave w:t/a:t text alone, template tags there are real content
             tag_str = str(elem.tag)
-            if tag_str.startswith("{"):
-                ns = tag_str.split("}")[0][1:]
-                if ns not in self.OOXML_NAMESPACES:
-                    elements_to_remove.append(elem)
-                    continue
+            if not (tag_str.endswith("}t") or tag_str == "t"):
+                if elem.text and "{{" in elem.text:
+                    elem.text = template_pattern.sub("", elem.text)
+                if elem.tail and "{{" in elem.tail:
+                    elem.tail = template_pattern.sub("", elem.tail)
+
+            if not clean_namespaces:
+                continue
 
-            # Recursively clean child elements
-            self._remove_ignorable_elements(elem)
+            # Remove attributes not in allowed namespaces
+            for attr in [a for a in elem.attrib if a.startswith("{")]:
+                if attr.split("}")[0][1:] not in self.OOXML_NAMESPACES:
+                    del elem.attrib[attr]
+
+            # Collect elements not in allowed namespaces; removing them here
+            # would cut the iteration short
+            if elem is not root and tag_str.startswith("{"):
+                if tag_str.split("}")[0][1:] not in self.OOXML_NAMESPACES:
+                    elements_to_remove.append(elem)
 
-        # Remove collected elements
         for elem in elements_to_remove:
-            root.remove(elem)
+            elem.getparent().remove(elem)
+
+        return xml_doc
 
     def _preprocess_for_mc_ignorable(self, xml_doc):
         """Preprocess XML to handle mc:Ignorable attribute properly."""
@@ -823,35 +1042,35 @@ class BaseSchemaValidator:
 
         return xml_doc
 
-    def _validate_single_file_xsd(self, xml_file, base_path):
-        """Validate a single XML file against XSD schema. Returns (is_valid, errors_set)."""
+    def _validate_single_file_xsd(self, xml_file, base_path, content=None):
+        """Validate a single XML file against XSD schema. Returns (is_valid, errors_set).
+
+        When content is given it is validated in place of xml_file's current
+        contents, which is how original parts are checked straight from the
+        archive.
+        """
         schema_path = self._get_schema_path(xml_file)
         if not schema_path:
             return None, None  # Skip file
 
         try:
-            # Load schema
-            with open(schema_path, "rb") as xsd_file:
-                parser = lxml.etree.XMLParser()
-                xsd_doc = lxml.etree.parse(
-                    xsd_file, parser=parser, base_url=str(schema_path)
-                )
-                schema = lxml.etree.XMLSchema(xsd_doc)
-
-            # Load and preprocess XML
-            with open(xml_file, "r") as f:
-                xml_doc = lxml.etree.parse(f)
+            schema = self._load_schema(schema_path)
 
-            xml_doc, _ = self._remove_template_tags_from_text_nodes(xml_doc)
-            xml_doc = self._preprocess_for_mc_ignorable(xml_doc)
+            # Load a private tree and preprocess it in place; unpacked parts
+            # are copied from the shared tree instead of being parsed again
+            if content is not None:
+                self.parse_count += 1
+                xml_doc = lxml.etree.parse(io.BytesIO(content))
+            else:
+                xml_doc = self._parse_copy(xml_file)
 
-            # Clean ignorable namespaces if needed
             relative_path = xml_file.relative_to(base_path)
-            if (
+            clean_namespaces = bool(
                 relative_path.parts
                 and relative_path.parts[0] in self.MAIN_CONTENT_FOLDERS
-            ):
-                xml_doc = self._clean_ignorable_namespaces(xml_doc)
+            )
+            xml_doc = self._clean_for_xsd(xml_doc, clean_namespaces)
+            xml_doc = self._preprocess_for_mc_ignorable(xml_doc)
 
             # Validate
             if schema.validate(xml_doc):
@@ -866,85 +1085,55 @@ class BaseSchemaValidator:
         except Exception as e:
             return False, {str(e)}
 
+    def _load_schema(self, schema_path):
+        """Compile an XSD schema once per process and reuse it afterwards.
+
+        Compiling the WordprocessingML/PresentationML schemas and everything
+        they import is the most expensive step of validation, and every part
+        mapped to the same schema can share the compiled result.
+        """
+        schema_path = Path(schema_path).resolve()
+        schema = _SCHEMA_SINGLETON.get(schema_path)
+        if schema is None:
+            with open(schema_path, "rb") as xsd_file:
+                parser = lxml.etree.XMLParser()
+                xsd_doc = lxml.etree.parse(
+                    xsd_file, parser=parser, base_url=str(schema_path)
+                )
+                schema = lxml.etree.XMLSchema(xsd_doc)
+            _SCHEMA_SINGLETON[schema_path] = schema
+        return schema
+
     def _get_original_file_errors(self, xml_file):
         """Get XSD validation errors from a single file in the original document.
 
+        The part is read straight from the original archive and the result is
+        memoized per part for the lifetime of the validator.
+
         Args:
             xml_file: Path to the XML file in unpacked_dir to check
 
         Returns:
             set: Set of error messages from the original file
         """
-        import tempfile
-        import zipfile
-
         # Resolve both paths to handle symlinks (e.g., /var vs /private/var on macOS)
         xml_file = Path(xml_file).resolve()
         unpacked_dir = self.unpacked_dir.resolve()
         relative_path = xml_file.relative_to(unpacked_dir)
 
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_path = Path(temp_dir)
-
-            # Extract original file
-            with zipfile.ZipFile(self.original_file, "r") as zip_ref:
-                zip_ref.extractall(temp_path)
-
-            # Find corresponding file in original
-            original_xml_file = temp_path / relative_path
-
-            if not original_xml_file.exists():
+        if relative_path not in self._original_errors:
+            content = read_original_part(self.original_file, relative_path)
+            if content is None:
                 # File didn't exist in original, so no original errors
-                return set()
-
-            # Validate the specific file in original
-            is_valid, errors = self._validate_single_file_xsd(
-                original_xml_file, temp_path
-            )
-            return errors if errors else set()
-
-    def _remove_template_tags_from_text_nodes(self, xml_doc):
-        """Remove template tags from XML text nodes and collect warnings.
-
-        Template tags follow the pattern {{ ... }} and are used as placeholders
-        for content replacement. They should be removed from text content before
-        XSD validation while preserving XML structure.
-
-        Returns:
-            tuple: (cleaned_xml_doc, warnings_list)
-        """
-        warnings = []
-        template_pattern = re.compile(r"\{\{[^}]*\}\}")
-
-        # Create a copy of the document to avoid modifying the original
-        xml_string = lxml.etree.tostring(xml_doc, encoding="unicode")
-        xml_copy = lxml.etree.fromstring(xml_string)
-
-        def process_text_content(text, content_type):
-            if not text:
-                return text
-            matches = list(template_pattern.finditer(text))
-            if matches:
-                for match in matches:
-                    warnings.append(
-                        f"Found template tag in {content_type}: {match.group()}"
-                    )
-                return template_pattern.sub("", text)
-            return text
-
-        # Process all text nodes in the document
-        for elem in xml_copy.iter():
-            # Skip processing if this is a w:t element
-            if not hasattr(elem, "tag") or callable(elem.tag):
-                continue
-            tag_str = str(elem.tag)
-            if tag_str.endswith("}t") or tag_str == "t":
-                continue
-
-            elem.text = process_text_content(elem.text, "text content")
-            elem.tail = process_text_content(elem.tail, "tail content")
+                errors = set()
+            else:
+                # Validate the specific file in original
+                is_valid, errors = self._validate_single_file_xsd(
+                    xml_file, unpacked_dir, content=content
+                )
+            self._original_errors[relative_path] = errors if errors else set()
 
-        return lxml.etree.ElementTree(xml_copy), warnings
+        return self._original_errors[relative_path]
 
 
 if __name__ == "__main__":
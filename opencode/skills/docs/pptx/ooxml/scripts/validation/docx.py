@@ -3,12 +3,11 @@ Validator for Word document XML files against XSD schemas.
 """
 
 import re
-import tempfile
-import zipfile
 
 import lxml.etree
 
 from .base import BaseSchemaValidator
+from .package import read_original_part
 
 
 class DOCXSchemaValidator(BaseSchemaValidator):
@@ -21,53 +20,30 @@ class DOCXSchemaValidator(BaseSchemaValidator):
     # Start with empty mapping - add specific cases as we discover them
     ELEMENT_RELATIONSHIP_TYPES = {}
 
-    def validate(self):
-        """Run all validation checks and return True if all pass."""
-        # Test 0: XML well-formedness
-        if not self.validate_xml():
-            return False
-
-        # Test 1: Namespace declarations
-        all_valid = True
-        if not self.validate_namespaces():
-            all_valid = False
-
-        # Test 2: Unique IDs
-        if not self.validate_unique_ids():
-            all_valid = False
-
-        # Test 3: Relationship and file reference validation
-        if not self.validate_file_references():
-            all_valid = False
-
-        # Test 4: Content type declarations
-        if not self.validate_content_types():
-            all_valid = False
-
-        # Test 5: XSD schema validation
-        if not self.validate_against_xsd():
-            all_valid = False
-
-        # Test 6: Whitespace preservation
-        if not self.validate_whitespace_preservation():
-            all_valid = False
-
-        # Test 7: Deletion validation
-        if not self.validate_deletions():
-            all_valid = False
-
-        # Test 8: Insertion validation
-        if not self.validate_insertions():
-            all_valid = False
-
-        # Test 9: Relationship ID reference validation
-        if not self.validate_all_relationship_ids():
-            all_valid = False
-
-        # Count and compare paragraphs
-        self.compare_paragraph_counts()
-
-        return all_valid
+    # Checks that only look at document.xml
+    CHECK_INPUTS = {
+        check: ("document.xml", "*/document.xml")
+        for check in (
+            "validate_whitespace_preservation",
+            "validate_deletions",
+            "validate_insertions",
+            "compare_paragraph_counts",
+        )
+    }
+
+    # Test 0 (XML well-formedness) runs first as a prerequisite, see base class
+    CHECKS = (
+        "validate_namespaces",  # Test 1: Namespace declarations
+        "validate_unique_ids",  # Test 2: Unique IDs
+        "validate_file_references",  # Test 3: Relationship and file references
+        "validate_content_types",  # Test 4: Content type declarations
+        "validate_against_xsd",  # Test 5: XSD schema validation
+        "validate_whitespace_preservation",  # Test 6: Whitespace preservation
+        "validate_deletions",  # Test 7: Deletion validation
+        "validate_insertions",  # Test 8: Insertion validation
+        "validate_all_relationship_ids",  # Test 9: Relationship ID references
+        "compare_paragraph_counts",  # Count and compare paragraphs
+    )
 
     def validate_whitespace_preservation(self):
         """
@@ -81,10 +57,9 @@ class DOCXSchemaValidator(BaseSchemaValidator):
                 continue
 
             try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
-
                 # Find all w:t elements
-                for elem in root.iter(f"{{{self.WORD_2006_NAMESPACE}}}t"):
+                w_t = f"{{{self.WORD_2006_NAMESPACE}}}t"
+                for elem in self._iter_elements(xml_file, w_t, text=True):
                     if elem.text:
                         text = elem.text
                         # Check if text starts or ends with whitespace
@@ -112,6 +87,7 @@ class DOCXSchemaValidator(BaseSchemaValidator):
                 )
 
         if errors:
+            self._record_errors(errors)
             print(f"FAILED - Found {len(errors)} whitespace preservation violations:")
             for error in errors:
                 print(error)
@@ -134,14 +110,22 @@ class DOCXSchemaValidator(BaseSchemaValidator):
                 continue
 
             try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
-
                 # Find all w:t elements that are descendants of w:del elements
-                namespaces = {"w": self.WORD_2006_NAMESPACE}
-                xpath_expression = ".//w:del//w:t"
-                problematic_t_elements = root.xpath(
-                    xpath_expression, namespaces=namespaces
-                )
+                if self.stream:
+                    w_del = f"{{{self.WORD_2006_NAMESPACE}}}del"
+                    w_t = f"{{{self.WORD_2006_NAMESPACE}}}t"
+                    problematic_t_elements = (
+                        t_elem
+                        for t_elem in self._iter_elements(xml_file, w_t, text=True)
+                        if any(True for _ in t_elem.iterancestors(w_del))
+                    )
+                else:
+                    root = self._parse(xml_file).getroot()
+                    namespaces = {"w": self.WORD_2006_NAMESPACE}
+                    xpath_expression = ".//w:del//w:t"
+                    problematic_t_elements = root.xpath(
+                        xpath_expression, namespaces=namespaces
+                    )
                 for t_elem in problematic_t_elements:
                     if t_elem.text:
                         # Show a preview of the text
@@ -161,6 +145,7 @@ class DOCXSchemaValidator(BaseSchemaValidator):
                 )
 
         if errors:
+            self._record_errors(errors)
             print(f"FAILED - Found {len(errors)} deletion validation violations:")
             for error in errors:
                 print(error)
@@ -180,10 +165,9 @@ class DOCXSchemaValidator(BaseSchemaValidator):
                 continue
 
             try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
                 # Count all w:p elements
-                paragraphs = root.findall(f".//{{{self.WORD_2006_NAMESPACE}}}p")
-                count = len(paragraphs)
+                w_p = f"{{{self.WORD_2006_NAMESPACE}}}p"
+                count = sum(1 for _ in self._iter_elements(xml_file, w_p))
             except Exception as e:
                 print(f"Error counting paragraphs in unpacked document: {e}")
 
@@ -194,19 +178,15 @@ class DOCXSchemaValidator(BaseSchemaValidator):
         count = 0
 
         try:
-            # Create temporary directory to unpack original
-            with tempfile.TemporaryDirectory() as temp_dir:
-                # Unpack original docx
-                with zipfile.ZipFile(self.original_file, "r") as zip_ref:
-                    zip_ref.extractall(temp_dir)
-
-                # Parse document.xml
-                doc_xml_path = temp_dir + "/word/document.xml"
-                root = lxml.etree.parse(doc_xml_path).getroot()
+            # Read document.xml straight from the original docx
+            content = read_original_part(self.original_file, "word/document.xml")
+            if content is None:
+                raise FileNotFoundError("word/document.xml not found")
+            root = lxml.etree.fromstring(content)
 
-                # Count all w:p elements
-                paragraphs = root.findall(f".//{{{self.WORD_2006_NAMESPACE}}}p")
-                count = len(paragraphs)
+            # Count all w:p elements
+            paragraphs = root.findall(f".//{{{self.WORD_2006_NAMESPACE}}}p")
+            count = len(paragraphs)
 
         except Exception as e:
             print(f"Error counting paragraphs in original document: {e}")
@@ -225,14 +205,26 @@ class DOCXSchemaValidator(BaseSchemaValidator):
                 continue
 
             try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
-                namespaces = {"w": self.WORD_2006_NAMESPACE}
-
                 # Find w:delText in w:ins that are NOT within w:del
-                invalid_elements = root.xpath(
-                    ".//w:ins//w:delText[not(ancestor::w:del)]",
-                    namespaces=namespaces
-                )
+                if self.stream:
+                    w_ins = f"{{{self.WORD_2006_NAMESPACE}}}ins"
+                    w_del = f"{{{self.WORD_2006_NAMESPACE}}}del"
+                    w_del_text = f"{{{self.WORD_2006_NAMESPACE}}}delText"
+                    invalid_elements = (
+                        elem
+                        for elem in self._iter_elements(
+                            xml_file, w_del_text, text=True
+                        )
+                        if any(True for _ in elem.iterancestors(w_ins))
+                        and not any(True for _ in elem.iterancestors(w_del))
+                    )
+                else:
+                    root = self._parse(xml_file).getroot()
+                    namespaces = {"w": self.WORD_2006_NAMESPACE}
+                    invalid_elements = root.xpath(
+                        ".//w:ins//w:delText[not(ancestor::w:del)]",
+                        namespaces=namespaces
+                    )
 
                 for elem in invalid_elements:
                     text_preview = (
@@ -251,6 +243,7 @@ class DOCXSchemaValidator(BaseSchemaValidator):
                 )
 
         if errors:
+            self._record_errors(errors)
             print(f"FAILED - Found {len(errors)} insertion validation violations:")
             for error in errors:
                 print(error)
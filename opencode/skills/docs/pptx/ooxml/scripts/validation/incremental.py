@@ -0,0 +1,153 @@
+"""
+Content-hash cache that lets repeated validation runs skip unchanged work.
+"""
+
+import fnmatch
+import hashlib
+import json
+import os
+from pathlib import Path
+
+# Sidecar kept inside the unpacked directory; pack.py leaves it out of the package
+CACHE_FILE_NAME = ".validation-cache.json"
+CACHE_VERSION = 2
+
+
+def _sha1_file(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ValidationCache:
+    """Per-part content hashes and the validation results derived from them.
+
+    Whole-check results are keyed by the hashes of the parts the check reads
+    (see CHECK_INPUTS on the validators), the original file and the validator
+    code, so a stored result is only reused when none of its inputs changed.
+    Per-part results such as XSD errors are keyed by that part alone, so an
+    edit to one slide re-validates just that slide.
+
+    File hashes are recomputed only for files whose size or mtime changed.
+    """
+
+    def __init__(self, unpacked_dir, original_file):
+        self.unpacked_dir = Path(unpacked_dir).resolve()
+        self.path = self.unpacked_dir / CACHE_FILE_NAME
+
+        data = self._load()
+        self._stats = data.get("stats", {})
+        self._checks = data.get("checks", {})
+        self._parts = data.get("parts", {})
+
+        # Relative part path -> content hash for every file in the package
+        self.files = {}
+        for file_path in sorted(self.unpacked_dir.rglob("*")):
+            if file_path.is_file() and file_path != self.path:
+                relative_path = file_path.relative_to(self.unpacked_dir).as_posix()
+                self.files[relative_path] = self._hash(file_path, relative_path)
+
+        original_file = Path(original_file).resolve()
+        self._original_key = f":original:{original_file}"
+        self.original_hash = self._hash(original_file, self._original_key)
+        code_dir = Path(__file__).parent
+        self.code_hash = hashlib.sha1(
+            b"".join(f.read_bytes() for f in sorted(code_dir.glob("*.py")))
+        ).hexdigest()
+
+    def _load(self):
+        try:
+            data = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict) or data.get("version") != CACHE_VERSION:
+            return {}
+        return data
+
+    def _hash(self, file_path, stat_key):
+        stat = file_path.stat()
+        cached = self._stats.get(stat_key)
+        if cached and cached[:2] == [stat.st_size, stat.st_mtime_ns]:
+            return cached[2]
+        digest = _sha1_file(file_path)
+        self._stats[stat_key] = [stat.st_size, stat.st_mtime_ns, digest]
+        return digest
+
+    def _key(self, *parts):
+        payload = json.dumps(
+            [CACHE_VERSION, self.code_hash, self.original_hash, *parts]
+        )
+        return hashlib.sha1(payload.encode()).hexdigest()
+
+    def check_key(self, validator, check):
+        """Hash of everything a check's result depends on."""
+        patterns = getattr(validator, "CHECK_INPUTS", {}).get(check)
+        inputs = [
+            (name, digest)
+            for name, digest in self.files.items()
+            if patterns is None
+            or any(fnmatch.fnmatchcase(name, pattern) for pattern in patterns)
+        ]
+        return self._key(type(validator).__name__, check, validator.verbose, inputs)
+
+    def get_check(self, validator, check, key):
+        """Stored (passed, output, errors) of a check, or None if its inputs changed."""
+        entry = self._checks.get(f"{type(validator).__name__}.{check}")
+        if entry and entry["key"] == key:
+            return entry["passed"], entry["output"], entry["errors"]
+        return None
+
+    def put_check(self, validator, check, key, passed, output, errors):
+        self._checks[f"{type(validator).__name__}.{check}"] = {
+            "key": key,
+            "passed": passed,
+            "output": output,
+            "errors": errors,
+        }
+
+    def get_part(self, kind, relative_path):
+        """Stored per-part value, or None if the part changed since it was stored."""
+        name = Path(relative_path).as_posix()
+        entry = self._parts.get(f"{kind}:{name}")
+        if entry and entry["key"] == self._key(kind, name, self.files.get(name)):
+            return entry["value"]
+        return None
+
+    def put_part(self, kind, relative_path, value):
+        name = Path(relative_path).as_posix()
+        self._parts[f"{kind}:{name}"] = {
+            "key": self._key(kind, name, self.files.get(name)),
+            "value": value,
+        }
+
+    def save(self):
+        """Write the cache next to the parts, dropping entries for removed files."""
+        stats = {
+            name: stat
+            for name, stat in self._stats.items()
+            if name in self.files or name == self._original_key
+        }
+        parts = {
+            name: entry
+            for name, entry in self._parts.items()
+            if name.split(":", 1)[1] in self.files
+        }
+        data = {
+            "version": CACHE_VERSION,
+            "stats": stats,
+            "checks": self._checks,
+            "parts": parts,
+        }
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        try:
+            tmp_path.write_text(json.dumps(data))
+            os.replace(tmp_path, self.path)
+        except OSError:
+            # A read-only directory just means the next run starts cold
+            tmp_path.unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    raise RuntimeError("This module should not be run directly.")
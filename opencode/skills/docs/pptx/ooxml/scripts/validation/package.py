@@ -0,0 +1,139 @@
+"""
+Shared read access to the parts of an Office package.
+"""
+
+import os
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+
+# Open original archives keyed by (path, pid); forked workers must not share
+# a file offset with their parent, so each process opens its own handle
+_ORIGINAL_SINGLETON = {}
+
+
+def read_original_part(original_file, part_name):
+    """Read one part of an Office file without extracting the archive.
+
+    The archive is opened once per process and its directory reused for
+    every later read, so looking up many parts costs one open instead of
+    one extraction per part.
+
+    Args:
+        original_file: Path to the .docx/.pptx/.xlsx file
+        part_name: Part path inside the package, e.g. "word/document.xml"
+
+    Returns:
+        bytes: The part's contents, or None if the package has no such part
+    """
+    key = (Path(original_file).resolve(), os.getpid())
+    archive = _ORIGINAL_SINGLETON.get(key)
+    if archive is None:
+        archive = _ORIGINAL_SINGLETON[key] = zipfile.ZipFile(key[0], "r")
+
+    try:
+        return archive.read(Path(part_name).as_posix())
+    except KeyError:
+        return None
+
+
+@dataclass
+class Relationship:
+    """One <Relationship> entry of a .rels part."""
+
+    id: str
+    type: str
+    target: str
+    sourceline: int
+    # Resolved path of an internal target that exists as a file, else None
+    path: Path = None
+
+
+class RelationshipGraph:
+    """Every relationship in an unpacked package, read in a single pass.
+
+    Each .rels part is parsed once and its targets are resolved against a
+    file set listed up front, so checks that follow relationships look them
+    up here instead of parsing the .rels parts and touching the filesystem
+    again.
+
+    Attributes:
+        files: Resolved paths of every file in the package
+        rels_files: The .rels parts, in the order rglob lists them
+    """
+
+    def __init__(self, unpacked_dir, parse, namespace):
+        """
+        Args:
+            unpacked_dir: Resolved path of the unpacked package
+            parse: Callable returning the parsed tree of a part
+            namespace: Package relationships namespace URI
+        """
+        self.unpacked_dir = unpacked_dir
+        self.files = {
+            path.resolve() for path in unpacked_dir.rglob("*") if path.is_file()
+        }
+        self.rels_files = list(unpacked_dir.rglob("*.rels"))
+        self._relationships = {}
+
+        for rels_file in self.rels_files:
+            # Targets of the root .rels are relative to the package root, other
+            # .rels targets to their part's folder (word/_rels -> word/)
+            if rels_file.name == ".rels":
+                base_dir = unpacked_dir
+            else:
+                base_dir = rels_file.parent.parent
+
+            try:
+                rels_root = parse(rels_file).getroot()
+            except Exception as e:
+                self._relationships[rels_file] = e
+                continue
+
+            self._relationships[rels_file] = [
+                Relationship(
+                    id=rel.get("Id"),
+                    type=rel.get("Type", ""),
+                    target=rel.get("Target"),
+                    sourceline=rel.sourceline,
+                    path=self._resolve(base_dir, rel.get("Target")),
+                )
+                for rel in rels_root.iter(f"{{{namespace}}}Relationship")
+            ]
+
+    def _resolve(self, base_dir, target):
+        if not target or target.startswith(("http", "mailto:")):
+            return None
+        # Most targets are plain relative paths to files that were listed up
+        # front; only the rest (symlinks, paths leaving the package) need the
+        # filesystem
+        normalized = Path(os.path.normpath(base_dir / target))
+        if normalized in self.files:
+            return normalized
+        try:
+            resolved = (base_dir / target).resolve()
+            if resolved.exists() and resolved.is_file():
+                return resolved
+        except (OSError, ValueError):
+            pass
+        return None
+
+    def has_rels(self, rels_file):
+        return Path(rels_file) in self._relationships
+
+    def relationships(self, rels_file):
+        """Relationships of a .rels part, raising its parse error if it had one."""
+        relationships = self._relationships[Path(rels_file)]
+        if isinstance(relationships, Exception):
+            raise relationships
+        return relationships
+
+    @staticmethod
+    def rels_file_for(part):
+        """The .rels part holding a part's relationships, dir/_rels/name.rels."""
+        part = Path(part)
+        return part.parent / "_rels" / f"{part.name}.rels"
+
+
+if __name__ == "__main__":
+    raise RuntimeError("This module should not be run directly.")
@@ -25,54 +25,26 @@ class PPTXSchemaValidator(BaseSchemaValidator):
         "tablestyleid": "tablestyles",
     }
 
-    def validate(self):
-        """Run all validation checks and return True if all pass."""
-        # Test 0: XML well-formedness
-        if not self.validate_xml():
-            return False
-
-        # Test 1: Namespace declarations
-        all_valid = True
-        if not self.validate_namespaces():
-            all_valid = False
-
-        # Test 2: Unique IDs
-        if not self.validate_unique_ids():
-            all_valid = False
-
-        # Test 3: UUID ID validation
-        if not self.validate_uuid_ids():
-            all_valid = False
-
-        # Test 4: Relationship and file reference validation
-        if not self.validate_file_references():
-            all_valid = False
-
-        # Test 5: Slide layout ID validation
-        if not self.validate_slide_layout_ids():
-            all_valid = False
-
-        # Test 6: Content type declarations
-        if not self.validate_content_types():
-            all_valid = False
-
-        # Test 7: XSD schema validation
-        if not self.validate_against_xsd():
-            all_valid = False
-
-        # Test 8: Notes slide reference validation
-        if not self.validate_notes_slide_references():
-            all_valid = False
-
-        # Test 9: Relationship ID reference validation
-        if not self.validate_all_relationship_ids():
-            all_valid = False
-
-        # Test 10: Duplicate slide layout references validation
-        if not self.validate_no_duplicate_slide_layouts():
-            all_valid = False
+    # Checks that only look at slide masters or slide relationships
+    CHECK_INPUTS = {
+        "validate_slide_layout_ids": ("ppt/slideMasters/*",),
+        "validate_notes_slide_references": ("ppt/slides/_rels/*",),
+        "validate_no_duplicate_slide_layouts": ("ppt/slides/_rels/*",),
+    }
 
-        return all_valid
+    # Test 0 (XML well-formedness) runs first as a prerequisite, see base class
+    CHECKS = (
+        "validate_namespaces",  # Test 1: Namespace declarations
+        "validate_unique_ids",  # Test 2: Unique IDs
+        "validate_uuid_ids",  # Test 3: UUID ID validation
+        "validate_file_references",  # Test 4: Relationship and file references
+        "validate_slide_layout_ids",  # Test 5: Slide layout ID validation
+        "validate_content_types",  # Test 6: Content type declarations
+        "validate_against_xsd",  # Test 7: XSD schema validation
+        "validate_notes_slide_references",  # Test 8: Notes slide references
+        "validate_all_relationship_ids",  # Test 9: Relationship ID references
+        "validate_no_duplicate_slide_layouts",  # Test 10: Duplicate slide layouts
+    )
 
     def validate_uuid_ids(self):
         """Validate that ID attributes that look like UUIDs contain only hex values."""
@@ -86,10 +58,8 @@ class PPTXSchemaValidator(BaseSchemaValidator):
 
         for xml_file in self.xml_files:
             try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
-
                 # Check all elements for ID attributes
-                for elem in root.iter():
+                for elem in self._iter_elements(xml_file):
                     for attr, value in elem.attrib.items():
                         # Check if this is an ID attribute
                         attr_name = attr.split("}")[-1].lower()
@@ -109,6 +79,7 @@ class PPTXSchemaValidator(BaseSchemaValidator):
                 )
 
         if errors:
+            self._record_errors(errors)
             print(f"FAILED - Found {len(errors)} UUID ID validation errors:")
             for error in errors:
                 print(error)
@@ -141,44 +112,41 @@ class PPTXSchemaValidator(BaseSchemaValidator):
 
         for slide_master in slide_masters:
             try:
-                # Parse the slide master file
-                root = lxml.etree.parse(str(slide_master)).getroot()
+                # Read the slide master's sldLayoutId references
+                layout_refs = [
+                    (
+                        elem.get(f"{{{self.OFFICE_RELATIONSHIPS_NAMESPACE}}}id"),
+                        elem.get("id"),
+                        elem.sourceline,
+                    )
+                    for elem in self._iter_elements(
+                        slide_master, f"{{{self.PRESENTATIONML_NAMESPACE}}}sldLayoutId"
+                    )
+                ]
 
                 # Find the corresponding _rels file for this slide master
-                rels_file = slide_master.parent / "_rels" / f"{slide_master.name}.rels"
+                graph = self._relationship_graph()
+                rels_file = graph.rels_file_for(slide_master)
 
-                if not rels_file.exists():
+                if not graph.has_rels(rels_file):
                     errors.append(
                         f"  {slide_master.relative_to(self.unpacked_dir)}: "
                         f"Missing relationships file: {rels_file.relative_to(self.unpacked_dir)}"
                     )
                     continue
 
-                # Parse the relationships file
-                rels_root = lxml.etree.parse(str(rels_file)).getroot()
-
                 # Build a set of valid relationship IDs that point to slide layouts
-                valid_layout_rids = set()
-                for rel in rels_root.findall(
-                    f".//{{{self.PACKAGE_RELATIONSHIPS_NAMESPACE}}}Relationship"
-                ):
-                    rel_type = rel.get("Type", "")
-                    if "slideLayout" in rel_type:
-                        valid_layout_rids.add(rel.get("Id"))
-
-                # Find all sldLayoutId elements in the slide master
-                for sld_layout_id in root.findall(
-                    f".//{{{self.PRESENTATIONML_NAMESPACE}}}sldLayoutId"
-                ):
-                    r_id = sld_layout_id.get(
-                        f"{{{self.OFFICE_RELATIONSHIPS_NAMESPACE}}}id"
-                    )
-                    layout_id = sld_layout_id.get("id")
+                valid_layout_rids = {
+                    rel.id
+                    for rel in self._relationships(rels_file)
+                    if "slideLayout" in rel.type
+                }
 
+                for r_id, layout_id, line in layout_refs:
                     if r_id and r_id not in valid_layout_rids:
                         errors.append(
                             f"  {slide_master.relative_to(self.unpacked_dir)}: "
-                            f"Line {sld_layout_id.sourceline}: sldLayoutId with id='{layout_id}' "
+                            f"Line {line}: sldLayoutId with id='{layout_id}' "
                             f"references r:id='{r_id}' which is not found in slide layout relationships"
                         )
 
@@ -188,6 +156,7 @@ class PPTXSchemaValidator(BaseSchemaValidator):
                 )
 
         if errors:
+            self._record_errors(errors)
             print(f"FAILED - Found {len(errors)} slide layout ID validation errors:")
             for error in errors:
                 print(error)
@@ -202,22 +171,16 @@ class PPTXSchemaValidator(BaseSchemaValidator):
 
     def validate_no_duplicate_slide_layouts(self):
         """Validate that each slide has exactly one slideLayout reference."""
-        import lxml.etree
-
         errors = []
         slide_rels_files = list(self.unpacked_dir.glob("ppt/slides/_rels/*.xml.rels"))
 
         for rels_file in slide_rels_files:
             try:
-                root = lxml.etree.parse(str(rels_file)).getroot()
-
                 # Find all slideLayout relationships
                 layout_rels = [
                     rel
-                    for rel in root.findall(
-                        f".//{{{self.PACKAGE_RELATIONSHIPS_NAMESPACE}}}Relationship"
-                    )
-                    if "slideLayout" in rel.get("Type", "")
+                    for rel in self._relationships(rels_file)
+                    if "slideLayout" in rel.type
                 ]
 
                 if len(layout_rels) > 1:
@@ -231,6 +194,7 @@ class PPTXSchemaValidator(BaseSchemaValidator):
                 )
 
         if errors:
+            self._record_errors(errors)
             print("FAILED - Found slides with duplicate slideLayout references:")
             for error in errors:
                 print(error)
@@ -257,16 +221,10 @@ class PPTXSchemaValidator(BaseSchemaValidator):
 
         for rels_file in slide_rels_files:
             try:
-                # Parse the relationships file
-                root = lxml.etree.parse(str(rels_file)).getroot()
-
                 # Find all notesSlide relationships
-                for rel in root.findall(
-                    f".//{{{self.PACKAGE_RELATIONSHIPS_NAMESPACE}}}Relationship"
-                ):
-                    rel_type = rel.get("Type", "")
-                    if "notesSlide" in rel_type:
-                        target = rel.get("Target", "")
+                for rel in self._relationships(rels_file):
+                    if "notesSlide" in rel.type:
+                        target = rel.target or ""
                         if target:
                             # Normalize the target path to handle relative paths
                             normalized_target = target.replace("../", "")
@@ -298,6 +256,8 @@ class PPTXSchemaValidator(BaseSchemaValidator):
                     errors.append(f"    - {rels_file.relative_to(self.unpacked_dir)}")
 
         if errors:
+            # The indented lines only list the slides of the error above them
+            self._record_errors([e for e in errors if not e.startswith("    ")])
             print(
                 f"FAILED - Found {len([e for e in errors if not e.startswith('    ')])} notes slide reference validation errors:"
             )
@@ -4,17 +4,31 @@ Validator for tracked changes in Word documents.
 
 import subprocess
 import tempfile
-import zipfile
 from pathlib import Path
 
+from .package import read_original_part
+
 
 class RedliningValidator:
     """Validator for tracked changes in Word documents."""
 
+    # A single check, so there is nothing to gate or split up
+    PREREQUISITE_CHECKS = ()
+    CHECKS = ("validate",)
+    CHECK_INPUTS = {"validate": ("word/document.xml",)}
+    PER_PART_CHECKS = ()
+
     def __init__(self, unpacked_dir, original_docx, verbose=False):
         self.unpacked_dir = Path(unpacked_dir)
         self.original_docx = Path(original_docx)
         self.verbose = verbose
+        self.cache = None
+        self.executor = None
+        self.jobs = 1
+        # Structured results of the current check, reset by run_check
+        self.parse_count = 0
+        self.parts_examined = set()
+        self.check_errors = []
         self.namespaces = {
             "w": "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
         }
@@ -24,13 +38,18 @@ class RedliningValidator:
         # Verify unpacked directory exists and has correct structure
         modified_file = self.unpacked_dir / "word" / "document.xml"
         if not modified_file.exists():
+            self.check_errors.append(
+                f"Modified document.xml not found at {modified_file}"
+            )
             print(f"FAILED - Modified document.xml not found at {modified_file}")
             return False
+        self.parts_examined.add(modified_file)
 
         # First, check if there are any tracked changes by Claude to validate
         try:
             import xml.etree.ElementTree as ET
 
+            self.parse_count += 1
             tree = ET.parse(modified_file)
             root = tree.getroot()
 
@@ -60,56 +79,56 @@ class RedliningValidator:
             # If we can't parse the XML, continue with full validation
             pass
 
-        # Create temporary directory for unpacking original docx
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_path = Path(temp_dir)
-
-            # Unpack original docx
-            try:
-                with zipfile.ZipFile(self.original_docx, "r") as zip_ref:
-                    zip_ref.extractall(temp_path)
-            except Exception as e:
-                print(f"FAILED - Error unpacking original docx: {e}")
-                return False
-
-            original_file = temp_path / "word" / "document.xml"
-            if not original_file.exists():
-                print(
-                    f"FAILED - Original document.xml not found in {self.original_docx}"
-                )
-                return False
-
-            # Parse both XML files using xml.etree.ElementTree for redlining validation
-            try:
-                import xml.etree.ElementTree as ET
-
-                modified_tree = ET.parse(modified_file)
-                modified_root = modified_tree.getroot()
-                original_tree = ET.parse(original_file)
-                original_root = original_tree.getroot()
-            except ET.ParseError as e:
-                print(f"FAILED - Error parsing XML files: {e}")
-                return False
-
-            # Remove Claude's tracked changes from both documents
-            self._remove_claude_tracked_changes(original_root)
-            self._remove_claude_tracked_changes(modified_root)
-
-            # Extract and compare text content
-            modified_text = self._extract_text_content(modified_root)
-            original_text = self._extract_text_content(original_root)
-
-            if modified_text != original_text:
-                # Show detailed character-level differences for each paragraph
-                error_message = self._generate_detailed_diff(
-                    original_text, modified_text
-                )
-                print(error_message)
-                return False
+        # Read document.xml straight from the original docx
+        try:
+            original_content = read_original_part(
+                self.original_docx, "word/document.xml"
+            )
+        except Exception as e:
+            self.check_errors.append(f"Error unpacking original docx: {e}")
+            print(f"FAILED - Error unpacking original docx: {e}")
+            return False
+
+        if original_content is None:
+            self.check_errors.append(
+                f"Original document.xml not found in {self.original_docx}"
+            )
+            print(f"FAILED - Original document.xml not found in {self.original_docx}")
+            return False
+
+        # Parse both XML files using xml.etree.ElementTree for redlining validation
+        try:
+            import xml.etree.ElementTree as ET
+
+            self.parse_count += 2
+            modified_tree = ET.parse(modified_file)
+            modified_root = modified_tree.getroot()
+            original_root = ET.fromstring(original_content)
+        except ET.ParseError as e:
+            self.check_errors.append(f"Error parsing XML files: {e}")
+            print(f"FAILED - Error parsing XML files: {e}")
+            return False
+
+        # Remove Claude's tracked changes from both documents
+        self._remove_claude_tracked_changes(original_root)
+        self._remove_claude_tracked_changes(modified_root)
+
+        # Extract and compare text content
+        modified_text = self._extract_text_content(modified_root)
+        original_text = self._extract_text_content(original_root)
+
+        if modified_text != original_text:
+            # Show detailed character-level differences for each paragraph
+            error_message = self._generate_detailed_diff(original_text, modified_text)
+            self.check_errors.append(
+                "Document text doesn't match after removing Claude's tracked changes"
+            )
+            print(error_message)
+            return False
 
-            if self.verbose:
-                print("PASSED - All changes by Claude are properly tracked")
-            return True
+        if self.verbose:
+            print("PASSED - All changes by Claude are properly tracked")
+        return True
 
     def _generate_detailed_diff(self, original_text, modified_text):
         """Generate detailed word-level differences using git word diff."""
@@ -0,0 +1,291 @@
+"""
+Run validator checks serially or across a process pool with deterministic output.
+"""
+
+import contextlib
+import io
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+
+@dataclass
+class CheckResult:
+    """Outcome of a single check and everything it printed.
+
+    Besides the printed output, errors holds each error the check reported,
+    parts_examined the number of parts it read and parses how many times it
+    had to parse XML to do so. A result replayed from the incremental cache
+    examined and parsed nothing.
+    """
+
+    validator: str
+    check: str
+    passed: bool
+    output: str
+    duration_ms: float
+    cached: bool = False
+    errors: list = field(default_factory=list)
+    parts_examined: int = 0
+    parses: int = 0
+
+
+def run_check(validator, check):
+    """Run one check method on a validator, capturing its output."""
+    validator.parts_examined = set()
+    validator.check_errors = []
+    parse_count = validator.parse_count
+
+    buffer = io.StringIO()
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(buffer):
+        # Informational checks return None, which does not count as a failure
+        passed = getattr(validator, check)() is not False
+    return CheckResult(
+        validator=type(validator).__name__,
+        check=check,
+        passed=passed,
+        output=buffer.getvalue(),
+        duration_ms=(time.perf_counter() - started) * 1000,
+        errors=validator.check_errors,
+        parts_examined=len(validator.parts_examined),
+        parses=validator.parse_count - parse_count,
+    )
+
+
+# One validator per worker process, reused for every check it is handed.
+# Forked workers start with the parent's entries, parsed trees included;
+# without fork each worker builds its own on first use.
+_WORKER_VALIDATORS = {}
+
+
+def _pool_context():
+    """Prefer fork so workers inherit _WORKER_VALIDATORS, whatever the default."""
+    try:
+        return multiprocessing.get_context("fork")
+    except ValueError:
+        return None
+
+
+def _worker_key(validator_class, unpacked_dir, original_file, verbose, stream):
+    return validator_class, str(unpacked_dir), str(original_file), verbose, stream
+
+
+def _worker_validator(validator_class, unpacked_dir, original_file, verbose, stream):
+    key = _worker_key(validator_class, unpacked_dir, original_file, verbose, stream)
+    validator = _WORKER_VALIDATORS.get(key)
+    if validator is None:
+        # The parent process has already printed any constructor warnings
+        with contextlib.redirect_stdout(io.StringIO()):
+            validator = validator_class(unpacked_dir, original_file, verbose=verbose)
+        validator.stream = stream
+        _WORKER_VALIDATORS[key] = validator
+    return validator
+
+
+def _run_check_in_worker(
+    validator_class, unpacked_dir, original_file, verbose, stream, check
+):
+    validator = _worker_validator(
+        validator_class, unpacked_dir, original_file, verbose, stream
+    )
+    return run_check(validator, check)
+
+
+def run_parts_in_worker(
+    validator_class, unpacked_dir, original_file, verbose, stream, method, parts
+):
+    """Call a validator method on each of a chunk of parts inside a worker.
+
+    Used by PER_PART_CHECKS to spread their parts over the pool. The worker's
+    validator, and whatever it has cached such as compiled schemas, is kept
+    for the next chunk.
+
+    Returns:
+        tuple: (results in the order of parts, number of XML parses it took)
+    """
+    validator = _worker_validator(
+        validator_class, unpacked_dir, original_file, verbose, stream
+    )
+    parse_count = validator.parse_count
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = [getattr(validator, method)(part) for part in parts]
+    return results, validator.parse_count - parse_count
+
+
+def run_validators(
+    validator_classes,
+    unpacked_dir,
+    original_file,
+    verbose=False,
+    jobs=1,
+    on_result=None,
+    cache=None,
+    stream=False,
+):
+    """Run every check of every validator and return their CheckResults.
+
+    Prerequisite checks (XML well-formedness) always run in this process and
+    skip the rest of a validator's checks when they fail. With jobs > 1 the
+    remaining checks of all validators are spread over a process pool. Results
+    are returned, and passed to on_result, in validator and CHECKS order
+    whichever worker finishes first, so the output matches a serial run.
+
+    Args:
+        validator_classes: Validator classes to instantiate, in reporting order
+        unpacked_dir: Path to the unpacked Office document directory
+        original_file: Path to the original Office file
+        verbose: Enable verbose output
+        jobs: Number of worker processes; 1 runs serially, 0 uses every CPU.
+            Per-part checks such as XSD validation also split their parts
+            over the workers
+        on_result: Optional callback invoked with each CheckResult in order
+        cache: Optional ValidationCache; checks whose inputs are unchanged
+            replay their stored result, and the cache is saved afterwards
+        stream: Read parts with iterparse in the checks that only look at
+            elements and attributes, and keep no parsed trees between checks.
+            XSD and redlining validation still need each part's whole tree,
+            so their memory is bounded by the largest part, not the package
+
+    Returns:
+        list: CheckResult for every check that ran
+    """
+    validators = [
+        V(unpacked_dir, original_file, verbose=verbose) for V in validator_classes
+    ]
+    for validator in validators:
+        validator.cache = cache
+        validator.stream = stream
+    results = []
+
+    def record(result):
+        results.append(result)
+        if on_result:
+            on_result(result)
+
+    if jobs == 1:
+        for validator in validators:
+            if _run_prerequisites(validator, record, cache):
+                for check in validator.CHECKS:
+                    record(_run_cached(validator, check, cache))
+    else:
+        jobs = jobs or os.cpu_count() or 1
+        _run_in_pool(
+            validators,
+            unpacked_dir,
+            original_file,
+            verbose,
+            stream,
+            jobs,
+            record,
+            cache,
+        )
+
+    if cache is not None:
+        cache.save()
+    return results
+
+
+def _run_in_pool(
+    validators, unpacked_dir, original_file, verbose, stream, jobs, record, cache
+):
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=_pool_context()) as pool:
+        planned = []
+        for validator in validators:
+            if not _run_prerequisites(validator, planned.append, cache):
+                continue
+            # Workers forked from here on inherit the trees parsed so far
+            key = _worker_key(
+                type(validator), unpacked_dir, original_file, verbose, stream
+            )
+            _WORKER_VALIDATORS[key] = validator
+            validator.executor = pool
+            validator.jobs = jobs
+            for check in validator.CHECKS:
+                cached, cache_key = _lookup(validator, check, cache)
+                if cached is not None:
+                    planned.append(cached)
+                elif check in validator.PER_PART_CHECKS:
+                    # These hand their parts to the pool themselves and keep
+                    # per-part results in this process's cache, so run them
+                    # here once everything else has been handed out
+                    planned.append((validator, check, cache_key, None))
+                else:
+                    future = pool.submit(
+                        _run_check_in_worker,
+                        type(validator),
+                        unpacked_dir,
+                        original_file,
+                        verbose,
+                        stream,
+                        check,
+                    )
+                    planned.append((validator, check, cache_key, future))
+        try:
+            for item in planned:
+                if isinstance(item, CheckResult):
+                    record(item)
+                    continue
+                validator, check, cache_key, future = item
+                if future is None:
+                    result = run_check(validator, check)
+                else:
+                    result = future.result()
+                _store(validator, check, cache_key, result, cache)
+                record(result)
+        finally:
+            _WORKER_VALIDATORS.clear()
+            for validator in validators:
+                validator.executor = None
+
+
+def _lookup(validator, check, cache):
+    """Return (stored CheckResult or None, cache key) for a check."""
+    if cache is None:
+        return None, None
+    key = cache.check_key(validator, check)
+    stored = cache.get_check(validator, check, key)
+    if stored is None:
+        return None, key
+    passed, output, errors = stored
+    result = CheckResult(
+        validator=type(validator).__name__,
+        check=check,
+        passed=passed,
+        output=output,
+        duration_ms=0.0,
+        cached=True,
+        errors=errors,
+    )
+    return result, key
+
+
+def _store(validator, check, key, result, cache):
+    if cache is not None:
+        cache.put_check(
+            validator, check, key, result.passed, result.output, result.errors
+        )
+
+
+def _run_cached(validator, check, cache):
+    cached, key = _lookup(validator, check, cache)
+    if cached is not None:
+        return cached
+    result = run_check(validator, check)
+    _store(validator, check, key, result, cache)
+    return result
+
+
+def _run_prerequisites(validator, record, cache=None):
+    for check in validator.PREREQUISITE_CHECKS:
+        result = _run_cached(validator, check, cache)
+        record(result)
+        if not result.passed:
+            return False
+    return True
+
+
+if __name__ == "__main__":
+    raise RuntimeError("This module should not be run directly.")
@@ -515,3 +515,12 @@ dev-zed() {
     tmux select-window -t "${session_name}:opencode"
     tmux attach -t "$session_name"
 }
+
+# Warm the tier detector's embedding model in a detached daemon so the first
+# classification after login skips the multi-second model load. Returns at
+# once and is a no-op while another warm-up is still running.
+# Usage: tier-detector-prewarm [--backend onnx]
+tier-detector-prewarm() {
+    pkgx python "$HOME/.dotfiles/opencode/scripts/tier-detector-fast.py" \
+        --prewarm --serve --idle-timeout 3600 "$@" >/dev/null 2>&1
+}